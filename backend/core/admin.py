@@ -1,16 +1,150 @@
 from django.contrib import admin
+from django.db import transaction
+from django.utils import timezone
+
 from .models import (
+    Colaborador,
     Departamento,
-    Treinamento,
     Modulo,
-    Colaborador,
-    TreinamentoMatricula,
     ModuloProgresso,
+    Treinamento,
+    TreinamentoMatricula,
+    TreinamentoMatriculaArquivada,
 )
+from .pagination import ContagemEstimadaPaginator
+from .progresso import reconciliar_matriculas
+from .resumos import reconstruir_resumos
+
+
+class TabelaGrandeAdmin(admin.ModelAdmin):
+    paginator = ContagemEstimadaPaginator
+    show_full_result_count = False
+    list_per_page = 50
+    ordering = ("-id",)
+
+
+@admin.register(Departamento)
+class DepartamentoAdmin(admin.ModelAdmin):
+    list_display = ("nome",)
+    search_fields = ("nome",)
+
+
+@admin.register(Treinamento)
+class TreinamentoAdmin(admin.ModelAdmin):
+    list_display = ("codigo", "nome", "departamento", "total_modulos", "ultima_atualizacao")
+    list_select_related = ("departamento",)
+    list_filter = ("departamento",)
+    search_fields = ("=codigo", "nome")
+    autocomplete_fields = ("departamento",)
+
+
+@admin.register(Modulo)
+class ModuloAdmin(TabelaGrandeAdmin):
+    list_display = ("titulo", "treinamento", "ordinal", "video_origem")
+    list_select_related = ("treinamento",)
+    search_fields = ("^titulo", "=treinamento__codigo")
+    autocomplete_fields = ("treinamento",)
+
+
+@admin.register(Colaborador)
+class ColaboradorAdmin(TabelaGrandeAdmin):
+    list_display = ("nome", "email", "administrador")
+    list_filter = ("administrador",)
+    search_fields = ("^email",)
+
+
+@admin.register(TreinamentoMatricula)
+class TreinamentoMatriculaAdmin(TabelaGrandeAdmin):
+    list_display = ("id", "colaborador", "treinamento", "status", "percentual_conclusao", "atualizado_em")
+    list_select_related = ("colaborador", "treinamento")
+    list_filter = ("status",)
+    search_fields = ("=colaborador__email", "=treinamento__codigo")
+    autocomplete_fields = ("colaborador", "treinamento")
+    readonly_fields = ("atualizado_em",)
+    actions = ("reiniciar_progresso", "reconciliar_progresso")
+
+    @admin.action(description="Reiniciar o progresso das matriculas selecionadas")
+    def reiniciar_progresso(self, request, queryset):
+        agora = timezone.now()
+        treinamento_ids = list(queryset.order_by().values_list("treinamento_id", flat=True).distinct())
+        with transaction.atomic():
+            ModuloProgresso.objects.filter(matricula__in=queryset.values("pk"), concluido=True).update(
+                concluido=False, concluido_em=None, atualizado_em=agora
+            )
+            total = queryset.update(
+                status="nao_iniciado",
+                percentual_conclusao=0,
+                modulos_concluidos=0,
+                iniciado_em=None,
+                concluido_em=None,
+                modulos_bitmap=b"",
+                atualizado_em=agora,
+            )
+            reconstruir_resumos(treinamento_ids)
+        self.message_user(request, f"Matriculas reiniciadas: {total}")
+
+    @admin.action(description="Reconciliar contadores das matriculas selecionadas")
+    def reconciliar_progresso(self, request, queryset):
+        corrigidas = reconciliar_matriculas(TreinamentoMatricula.objects.filter(pk__in=queryset.values("pk")))
+        self.message_user(request, f"Matriculas corrigidas: {corrigidas}")
+
+
+@admin.register(ModuloProgresso)
+class ModuloProgressoAdmin(TabelaGrandeAdmin):
+    list_display = ("id", "matricula", "modulo", "concluido", "concluido_em", "atualizado_em")
+    list_select_related = ("matricula__colaborador", "matricula__treinamento", "modulo")
+    list_filter = ("concluido",)
+    search_fields = ("=matricula__colaborador__email",)
+    raw_id_fields = ("matricula", "modulo")
+    readonly_fields = ("atualizado_em",)
+    actions = ("marcar_concluidos", "desmarcar_concluidos")
+
+    def _marcar(self, request, queryset, concluido: bool):
+        agora = timezone.now()
+        matricula_ids = set(queryset.order_by().values_list("matricula_id", flat=True))
+        with transaction.atomic():
+            total = queryset.filter(concluido=not concluido).update(
+                concluido=concluido, concluido_em=agora if concluido else None, atualizado_em=agora
+            )
+            reconciliar_matriculas(TreinamentoMatricula.objects.filter(pk__in=matricula_ids))
+        self.message_user(request, f"Modulos alterados: {total}")
+
+    @admin.action(description="Marcar os modulos selecionados como concluidos")
+    def marcar_concluidos(self, request, queryset):
+        self._marcar(request, queryset, True)
+
+    @admin.action(description="Desmarcar a conclusao dos modulos selecionados")
+    def desmarcar_concluidos(self, request, queryset):
+        self._marcar(request, queryset, False)
+
+    def save_model(self, request, obj, form, change):
+        matricula_anterior = form.initial.get("matricula") if change else None
+        super().save_model(request, obj, form, change)
+        reconciliar_matriculas(TreinamentoMatricula.objects.filter(pk__in={matricula_anterior, obj.matricula_id}))
+
+    def delete_model(self, request, obj):
+        matricula_id = obj.matricula_id
+        super().delete_model(request, obj)
+        reconciliar_matriculas(TreinamentoMatricula.objects.filter(pk=matricula_id))
+
+    def delete_queryset(self, request, queryset):
+        matricula_ids = set(queryset.order_by().values_list("matricula_id", flat=True))
+        super().delete_queryset(request, queryset)
+        reconciliar_matriculas(TreinamentoMatricula.objects.filter(pk__in=matricula_ids))
+
+
+@admin.register(TreinamentoMatriculaArquivada)
+class TreinamentoMatriculaArquivadaAdmin(TabelaGrandeAdmin):
+    list_display = ("id", "colaborador", "treinamento", "percentual_conclusao", "concluido_em", "arquivado_em")
+    list_select_related = ("colaborador", "treinamento")
+    search_fields = ("=colaborador__email", "=treinamento__codigo")
+    raw_id_fields = ("colaborador", "treinamento")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
-admin.site.register(Departamento)
-admin.site.register(Treinamento)
-admin.site.register(Modulo)
-admin.site.register(Colaborador)
-admin.site.register(TreinamentoMatricula)
-admin.site.register(ModuloProgresso)
+    def has_delete_permission(self, request, obj=None):
+        return False
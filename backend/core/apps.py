@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import signals  # noqa: F401
+        from .middleware import instalar_contador
+        from .roteamento import instalar_vigia
+
+        connection_created.connect(instalar_contador)
+        connection_created.connect(instalar_vigia)
@@ -0,0 +1,123 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import ModuloProgresso, ModuloProgressoArquivado, TreinamentoMatricula, TreinamentoMatriculaArquivada
+
+CAMPOS_ESTADO = [
+    "status",
+    "percentual_conclusao",
+    "modulos_concluidos",
+    "iniciado_em",
+    "concluido_em",
+    "modulos_bitmap",
+]
+CAMPOS_MATRICULA = ["id", "colaborador_id", "treinamento_id", "atualizado_em"] + CAMPOS_ESTADO
+CAMPOS_PROGRESSO = ["id", "matricula_id", "modulo_id", "concluido", "concluido_em", "atualizado_em"]
+
+
+def _idade_minima() -> timedelta:
+    return timedelta(days=getattr(settings, "ARQUIVO_MATRICULAS_DIAS", 365))
+
+
+def _apagar(modelo, campo: str, ids):
+    tabela = connection.ops.quote_name(modelo._meta.db_table)
+    coluna = connection.ops.quote_name(modelo._meta.get_field(campo).column)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {tabela} WHERE {coluna} IN ({', '.join(['%s'] * len(ids))})", list(ids))
+
+
+def _candidatas_ao_arquivo(corte):
+    return TreinamentoMatricula.objects.filter(status="concluido", concluido_em__lt=corte)
+
+
+def _proximas_candidatas(candidatas, ultimo: int, batch_size: int):
+    return candidatas.filter(id__gt=ultimo).order_by("id").values_list("id", flat=True)[:batch_size]
+
+
+def _consulta_arquivadas(colaborador_ids, treinamento_ids):
+    return TreinamentoMatriculaArquivada.objects.filter(
+        colaborador_id__in=colaborador_ids, treinamento_id__in=treinamento_ids
+    )
+
+
+def _consulta_progresso_arquivado(matricula_ids):
+    return ModuloProgressoArquivado.objects.filter(matricula_id__in=matricula_ids).values_list(
+        "matricula_id", "modulo_id", "concluido", "concluido_em"
+    )
+
+
+def arquivar_matriculas(dias=None, batch_size: int = 1000):
+    corte = timezone.now() - (timedelta(days=dias) if dias is not None else _idade_minima())
+    candidatas = _candidatas_ao_arquivo(corte)
+    matriculas = 0
+    progresso = 0
+    ultimo = 0
+    while True:
+        ids = list(_proximas_candidatas(candidatas, ultimo, batch_size))
+        if not ids:
+            return matriculas, progresso
+        ultimo = ids[-1]
+        with transaction.atomic():
+            lote = list(candidatas.select_for_update().filter(id__in=ids).values(*CAMPOS_MATRICULA))
+            if not lote:
+                continue
+            ids = [linha["id"] for linha in lote]
+            linhas = list(ModuloProgresso.objects.filter(matricula_id__in=ids).values(*CAMPOS_PROGRESSO))
+            TreinamentoMatriculaArquivada.objects.bulk_create(
+                [TreinamentoMatriculaArquivada(**linha) for linha in lote], ignore_conflicts=True
+            )
+            ModuloProgressoArquivado.objects.bulk_create(
+                [ModuloProgressoArquivado(**linha) for linha in linhas], ignore_conflicts=True
+            )
+            if linhas:
+                _apagar(ModuloProgresso, "matricula", ids)
+            _apagar(TreinamentoMatricula, "id", ids)
+        matriculas += len(lote)
+        progresso += len(linhas)
+
+
+def restaurar_arquivadas(matriculas) -> dict:
+    por_par = {(matricula.colaborador_id, matricula.treinamento_id): matricula for matricula in matriculas}
+    if not por_par:
+        return {}
+    arquivadas = [
+        arquivada
+        for arquivada in _consulta_arquivadas(
+            {colaborador_id for colaborador_id, _ in por_par}, {treinamento_id for _, treinamento_id in por_par}
+        )
+        if (arquivada.colaborador_id, arquivada.treinamento_id) in por_par
+    ]
+    if not arquivadas:
+        return {}
+
+    agora = timezone.now()
+    destinos = {}
+    estados = {}
+    for arquivada in arquivadas:
+        chave = (arquivada.colaborador_id, arquivada.treinamento_id)
+        matricula = por_par[chave]
+        for campo in CAMPOS_ESTADO:
+            setattr(matricula, campo, getattr(arquivada, campo))
+        matricula.atualizado_em = agora
+        destinos[arquivada.id] = matricula.pk
+        estados[chave] = arquivada.estado_resumo()
+    TreinamentoMatricula.objects.bulk_update(
+        [por_par[chave] for chave in estados], CAMPOS_ESTADO + ["atualizado_em"]
+    )
+    ModuloProgresso.objects.bulk_create(
+        [
+            ModuloProgresso(
+                matricula_id=destinos[matricula_id],
+                modulo_id=modulo_id,
+                concluido=concluido,
+                concluido_em=concluido_em,
+            )
+            for matricula_id, modulo_id, concluido, concluido_em in _consulta_progresso_arquivado(list(destinos))
+        ]
+    )
+    _apagar(ModuloProgressoArquivado, "matricula", list(destinos))
+    _apagar(TreinamentoMatriculaArquivada, "id", list(destinos))
+    return estados
@@ -0,0 +1,72 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from .colaboradores import colaborador_id_por_email, email_do_usuario
+
+CLAIMS_COLABORADOR = ("email", "is_staff", "colaborador_id")
+INATIVO_KEY = "usuario:inativo:{user_id}"
+
+
+def _chave_inativo(user_id) -> str:
+    return INATIVO_KEY.format(user_id=user_id)
+
+
+def registrar_situacao_usuario(user_id, ativo: bool):
+    chave = _chave_inativo(user_id)
+    if ativo:
+        cache.delete(chave)
+    else:
+        cache.set(chave, True, api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+
+
+def _usuario_inativo() -> AuthenticationFailed:
+    return AuthenticationFailed("Usuario inativo.", code="user_inactive")
+
+
+class TokenColaboradorSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        email = email_do_usuario(user)
+        token["username"] = user.get_username()
+        token["email"] = email
+        token["is_staff"] = user.is_staff
+        token["colaborador_id"] = colaborador_id_por_email(email)
+        return token
+
+
+class UsuarioToken(TokenUser):
+    @property
+    def email(self) -> str:
+        return self.token.get("email", "")
+
+    @property
+    def colaborador_id(self):
+        return self.token.get("colaborador_id")
+
+
+class JWTColaboradorAuthentication(JWTAuthentication):
+    @staticmethod
+    def possui_claims(validated_token) -> bool:
+        return all(claim in validated_token for claim in CLAIMS_COLABORADOR)
+
+    def get_user(self, validated_token):
+        if not self.possui_claims(validated_token):
+            return super().get_user(validated_token)
+        usuario = UsuarioToken(validated_token)
+        if cache.get(_chave_inativo(usuario.id)):
+            raise _usuario_inativo()
+        return usuario
+
+    async def aget_user(self, validated_token):
+        if not self.possui_claims(validated_token):
+            return await sync_to_async(super().get_user)(validated_token)
+        usuario = UsuarioToken(validated_token)
+        if await cache.aget(_chave_inativo(usuario.id)):
+            raise _usuario_inativo()
+        return usuario
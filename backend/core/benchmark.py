@@ -0,0 +1,201 @@
+import random
+import statistics
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from rest_framework.test import APIClient
+
+from .autenticacao import TokenColaboradorSerializer
+from .catalogo import invalidar_catalogo
+from .models import Colaborador, Modulo, Treinamento
+
+
+@dataclass
+class Cenario:
+    nome: str
+    executar: Callable[["Contexto"], object]
+    preparar: Optional[Callable[["Contexto"], None]] = None
+
+
+@dataclass
+class Contexto:
+    rng: random.Random
+    usuarios: list
+    admin: object
+    treinamentos: list
+    modulos: list
+    modulos_por_usuario: dict = field(default_factory=dict)
+    clientes: dict = field(default_factory=dict)
+    atual: dict = field(default_factory=dict)
+
+    def cliente(self, user):
+        cliente = self.clientes.get(user.pk)
+        if cliente is None:
+            cliente = APIClient()
+            cliente.credentials(
+                HTTP_AUTHORIZATION=f"Bearer {TokenColaboradorSerializer.get_token(user).access_token}"
+            )
+            self.clientes[user.pk] = cliente
+        return cliente
+
+    def usuario(self):
+        return self.rng.choice(self.usuarios)
+
+
+def percentil(valores, p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, int(round(p * len(ordenados) + 0.5)) - 1))
+    return ordenados[indice]
+
+
+def resumir(latencias, queries, status_codes):
+    return {
+        "amostras": len(latencias),
+        "min_ms": round(min(latencias), 3),
+        "media_ms": round(statistics.fmean(latencias), 3),
+        "p50_ms": round(percentil(latencias, 0.50), 3),
+        "p90_ms": round(percentil(latencias, 0.90), 3),
+        "p95_ms": round(percentil(latencias, 0.95), 3),
+        "p99_ms": round(percentil(latencias, 0.99), 3),
+        "max_ms": round(max(latencias), 3),
+        "queries_media": round(statistics.fmean(queries), 2),
+        "queries_max": max(queries),
+        "status": {str(codigo): status_codes.count(codigo) for codigo in sorted(set(status_codes))},
+    }
+
+
+def medir(cenario: Cenario, contexto: Contexto, iteracoes: int, aquecimento: int):
+    contador = {"queries": 0}
+
+    def contar(execute, sql, params, many, context):
+        contador["queries"] += 1
+        return execute(sql, params, many, context)
+
+    latencias, queries, status_codes = [], [], []
+    for indice in range(aquecimento + iteracoes):
+        if cenario.preparar:
+            cenario.preparar(contexto)
+        contador["queries"] = 0
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(contar))
+            inicio = time.perf_counter()
+            response = cenario.executar(contexto)
+            decorrido = (time.perf_counter() - inicio) * 1000
+        if indice < aquecimento:
+            continue
+        latencias.append(decorrido)
+        queries.append(contador["queries"])
+        status_codes.append(response.status_code)
+    return resumir(latencias, queries, status_codes)
+
+
+def montar_contexto(usuarios: int, seed: int) -> Contexto:
+    user_model = get_user_model()
+    rng = random.Random(seed)
+
+    emails = list(
+        Colaborador.objects.filter(matriculas__isnull=False)
+        .distinct()
+        .order_by("id")
+        .values_list("email", flat=True)[: usuarios * 10]
+    )
+    if not emails:
+        emails = list(Colaborador.objects.order_by("id").values_list("email", flat=True)[:usuarios])
+    amostra = rng.sample(emails, min(usuarios, len(emails)))
+    contas = []
+    for email in amostra:
+        user, criado = user_model.objects.get_or_create(username=email, defaults={"email": email})
+        if criado:
+            user.set_unusable_password()
+            user.save(update_fields=["password"])
+        contas.append(user)
+
+    admin, criado = user_model.objects.get_or_create(
+        username="benchmark-admin",
+        defaults={"email": "benchmark-admin@exemplo.com.br", "is_staff": True},
+    )
+    if criado:
+        admin.set_unusable_password()
+        admin.save(update_fields=["password"])
+
+    modulos_por_usuario = {}
+    for user in contas:
+        modulos_por_usuario[user.pk] = list(
+            Modulo.objects.filter(treinamento__matriculas__colaborador__email=user.email).values_list(
+                "id", flat=True
+            )
+        )
+
+    return Contexto(
+        rng=rng,
+        usuarios=contas,
+        admin=admin,
+        treinamentos=list(Treinamento.objects.values_list("id", flat=True)),
+        modulos=list(Modulo.objects.values_list("id", flat=True)),
+        modulos_por_usuario=modulos_por_usuario,
+    )
+
+
+def _get(url, admin=False, **extra):
+    def executar(contexto):
+        user = contexto.admin if admin else contexto.usuario()
+        return contexto.cliente(user).get(url, **extra)
+
+    return executar
+
+
+def _catalogo_304(contexto):
+    cliente = contexto.cliente(contexto.usuario())
+    etag = contexto.atual.get("etag")
+    if etag is None:
+        etag = contexto.atual["etag"] = cliente.get("/api/public/catalogo/")["ETag"]
+    return cliente.get("/api/public/catalogo/", HTTP_IF_NONE_MATCH=etag)
+
+
+def _iniciar_treinamento(contexto):
+    cliente = contexto.cliente(contexto.usuario())
+    treinamento_id = contexto.rng.choice(contexto.treinamentos)
+    return cliente.post("/api/public/iniciar-treinamento/", {"treinamento_id": treinamento_id}, format="json")
+
+
+def _concluir_modulo(contexto):
+    user = contexto.usuario()
+    modulo_id = contexto.rng.choice(contexto.modulos_por_usuario.get(user.pk) or contexto.modulos)
+    return contexto.cliente(user).post(
+        "/api/public/concluir-modulo/",
+        {"modulo_id": modulo_id, "concluido": contexto.rng.random() < 0.7},
+        format="json",
+    )
+
+
+def _detalhe(url, ids_attr):
+    def executar(contexto):
+        return contexto.cliente(contexto.admin).get(url.format(id=contexto.rng.choice(getattr(contexto, ids_attr))))
+
+    return executar
+
+
+CENARIOS = [
+    Cenario("catalogo", _get("/api/public/catalogo/")),
+    Cenario("catalogo_frio", _get("/api/public/catalogo/"), preparar=lambda contexto: invalidar_catalogo()),
+    Cenario("catalogo_304", _catalogo_304),
+    Cenario("catalogo_resumo", _get("/api/public/catalogo/?summary=1")),
+    Cenario("me_progresso", _get("/api/public/me/progresso/")),
+    Cenario("iniciar_treinamento", _iniciar_treinamento),
+    Cenario("concluir_modulo", _concluir_modulo),
+    Cenario("departamentos_lista", _get("/api/departamentos/", admin=True)),
+    Cenario("departamentos_resumo", _get("/api/departamentos/?summary=1", admin=True)),
+    Cenario("treinamentos_campos", _get("/api/treinamentos/?fields=id,codigo,nome", admin=True)),
+    Cenario("treinamentos_detalhe", _detalhe("/api/treinamentos/{id}/", "treinamentos")),
+    Cenario("modulos_detalhe", _detalhe("/api/modulos/{id}/", "modulos")),
+    Cenario("matriculas_cursor", _get("/api/matriculas/?paginacao=cursor", admin=True)),
+    Cenario("progresso_cursor", _get("/api/progresso/?paginacao=cursor", admin=True)),
+    Cenario("usuarios_lista", _get("/api/usuarios/", admin=True)),
+]
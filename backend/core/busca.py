@@ -0,0 +1,191 @@
+import re
+import unicodedata
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Sum, Value, When
+
+from .models import Modulo, TermoBusca, Treinamento
+
+PESOS = {"nome": 8, "titulo": 4, "responsavel": 2, "descricao": 1}
+TAMANHO_TERMO = TermoBusca._meta.get_field("termo").max_length
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "o", "as", "os", "um", "uma", "uns", "umas", "de", "do", "da", "dos", "das", "em", "no",
+    "na", "nos", "nas", "por", "pelo", "pela", "pelos", "pelas", "para", "pra", "com", "sem", "e",
+    "ou", "que", "se", "ao", "aos", "como", "mais", "mas", "seu", "sua", "seus", "suas", "ser",
+    "sao", "foi", "eh", "esta", "este", "essa", "esse", "isso", "isto", "entre", "sobre", "ate",
+}
+SUFIXOS_PLURAL = [
+    ("oes", "ao"),
+    ("aes", "ao"),
+    ("ais", "al"),
+    ("eis", "el"),
+    ("ois", "ol"),
+    ("ns", "m"),
+    ("res", "r"),
+    ("zes", "z"),
+    ("ses", "s"),
+]
+
+
+def normalizar(texto: str) -> str:
+    decomposto = unicodedata.normalize("NFKD", (texto or "").lower())
+    return "".join(caractere for caractere in decomposto if not unicodedata.combining(caractere))
+
+
+def reduzir(termo: str) -> str:
+    if len(termo) <= 3 or termo.isdigit():
+        return termo
+    for sufixo, troca in SUFIXOS_PLURAL:
+        if termo.endswith(sufixo):
+            return termo[: -len(sufixo)] + troca
+    if termo.endswith("s") and not termo.endswith("ss"):
+        return termo[:-1]
+    return termo
+
+
+def termos(texto: str) -> list:
+    return [
+        reduzir(token)[:TAMANHO_TERMO]
+        for token in TOKEN_RE.findall(normalizar(texto))
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def contar_termos(texto: str) -> Counter:
+    return Counter(termos(texto))
+
+
+def _linhas(treinamento_id, modulo_id, campos):
+    return [
+        TermoBusca(
+            termo=termo,
+            treinamento_id=treinamento_id,
+            modulo_id=modulo_id,
+            campo=campo,
+            frequencia=frequencia,
+        )
+        for campo, texto in campos.items()
+        for termo, frequencia in contar_termos(texto).items()
+    ]
+
+
+def linhas_do_treinamento(treinamento):
+    return _linhas(
+        treinamento.id, None, {"nome": treinamento.nome, "responsavel": treinamento.responsavel}
+    )
+
+
+def linhas_do_modulo(modulo):
+    return _linhas(
+        modulo.treinamento_id, modulo.id, {"titulo": modulo.titulo, "descricao": modulo.descricao}
+    )
+
+
+def indexar_treinamento(treinamento):
+    with transaction.atomic():
+        TermoBusca.objects.filter(treinamento_id=treinamento.id, modulo__isnull=True).delete()
+        TermoBusca.objects.bulk_create(linhas_do_treinamento(treinamento))
+
+
+def indexar_modulo(modulo):
+    with transaction.atomic():
+        TermoBusca.objects.filter(modulo_id=modulo.id).delete()
+        TermoBusca.objects.bulk_create(linhas_do_modulo(modulo))
+
+
+def reindexar(treinamento_ids=None, batch_size=500) -> int:
+    treinamentos = Treinamento.objects.order_by("id").only("id", "nome", "responsavel")
+    if treinamento_ids is not None:
+        treinamentos = treinamentos.filter(id__in=list(treinamento_ids))
+    total = 0
+    ultimo_id = 0
+    while True:
+        lote = list(treinamentos.filter(id__gt=ultimo_id)[:batch_size])
+        if not lote:
+            break
+        ultimo_id = lote[-1].id
+        ids = [treinamento.id for treinamento in lote]
+        linhas = [linha for treinamento in lote for linha in linhas_do_treinamento(treinamento)]
+        modulos = Modulo.objects.filter(treinamento_id__in=ids).only("id", "treinamento", "titulo", "descricao")
+        linhas.extend(linha for modulo in modulos for linha in linhas_do_modulo(modulo))
+        with transaction.atomic():
+            TermoBusca.objects.filter(treinamento_id__in=ids).delete()
+            TermoBusca.objects.bulk_create(linhas, batch_size=2000)
+        total += len(linhas)
+    return total
+
+
+def _ranking(queryset):
+    peso = Case(
+        *[When(campo=campo, then=Value(valor)) for campo, valor in PESOS.items()],
+        default=Value(1),
+        output_field=IntegerField(),
+    )
+    return queryset.annotate(
+        termos_encontrados=Count("termo", distinct=True),
+        pontuacao=Sum(F("frequencia") * peso),
+    )
+
+
+def _ocorrencias(procurados, departamento=None):
+    ocorrencias = TermoBusca.objects.filter(termo__in=procurados)
+    if departamento:
+        ocorrencias = ocorrencias.filter(treinamento__departamento_id=departamento)
+    return ocorrencias
+
+
+def _ranking_treinamentos(ocorrencias, limite):
+    return _ranking(ocorrencias.values("treinamento_id")).order_by(
+        "-termos_encontrados", "-pontuacao", "treinamento_id"
+    )[:limite]
+
+
+def buscar(consulta: str, limite=20, departamento=None, modulos_por_treinamento=5):
+    procurados = sorted(set(termos(consulta)))
+    if not procurados:
+        return []
+
+    ocorrencias = _ocorrencias(procurados, departamento)
+    ranking = list(_ranking_treinamentos(ocorrencias, limite))
+    if not ranking:
+        return []
+
+    ids = [linha["treinamento_id"] for linha in ranking]
+    modulos_por_id = {}
+    ocorrencias_modulos = ocorrencias.filter(treinamento_id__in=ids, modulo__isnull=False)
+    for linha in _ranking(ocorrencias_modulos.values("treinamento_id", "modulo_id")).order_by(
+        "-termos_encontrados", "-pontuacao", "modulo_id"
+    ):
+        modulos = modulos_por_id.setdefault(linha["treinamento_id"], [])
+        if len(modulos) < modulos_por_treinamento:
+            modulos.append(linha)
+
+    treinamentos = Treinamento.objects.only("id", "codigo", "nome", "departamento").in_bulk(ids)
+    modulos = Modulo.objects.only("id", "titulo").in_bulk(
+        [linha["modulo_id"] for linhas in modulos_por_id.values() for linha in linhas]
+    )
+    resultados = []
+    for linha in ranking:
+        treinamento = treinamentos[linha["treinamento_id"]]
+        resultados.append(
+            {
+                "treinamento_id": treinamento.id,
+                "codigo": treinamento.codigo,
+                "nome": treinamento.nome,
+                "departamento_id": treinamento.departamento_id,
+                "termos_encontrados": linha["termos_encontrados"],
+                "pontuacao": linha["pontuacao"],
+                "modulos": [
+                    {
+                        "modulo_id": item["modulo_id"],
+                        "titulo": modulos[item["modulo_id"]].titulo,
+                        "termos_encontrados": item["termos_encontrados"],
+                        "pontuacao": item["pontuacao"],
+                    }
+                    for item in modulos_por_id.get(treinamento.id, [])
+                ],
+            }
+        )
+    return resultados
@@ -0,0 +1,150 @@
+import hashlib
+from dataclasses import dataclass, field
+from typing import Optional
+
+from django.db.models import Prefetch
+from rest_framework.exceptions import ValidationError
+
+from .models import Departamento, Modulo, Treinamento
+
+VALORES_VERDADEIROS = {"1", "true", "sim", "on"}
+RECOLHIDOS_NO_RESUMO = {
+    Departamento: (),
+    Treinamento: ("modulos",),
+    Modulo: ("descricao", "video_iframe"),
+}
+CONTAGENS_NO_RESUMO = {
+    Treinamento: {"total_modulos": "modulos"},
+}
+
+
+def _caminhos(valor):
+    return [
+        [parte for parte in caminho.strip().split(".") if parte]
+        for caminho in (valor or "").split(",")
+        if caminho.strip()
+    ]
+
+
+def _arvore(caminhos):
+    arvore = {}
+    for partes in caminhos:
+        atual = arvore
+        for indice, parte in enumerate(partes):
+            if indice == len(partes) - 1:
+                atual[parte] = None
+                break
+            proximo = atual.get(parte, {})
+            if proximo is None:
+                break
+            atual = atual.setdefault(parte, proximo)
+    return arvore
+
+
+def _validar(arvore, esquema, caminho=()):
+    for nome, sub in arvore.items():
+        atual = caminho + (nome,)
+        if nome not in esquema:
+            raise ValueError(".".join(atual))
+        if sub is not None:
+            if esquema[nome] is None:
+                raise ValueError(".".join(atual + (min(sub),)))
+            _validar(sub, esquema[nome], atual)
+
+
+def _normalizar(arvore):
+    return ",".join(
+        nome if sub is None else f"{nome}({_normalizar(sub)})" for nome, sub in sorted(arvore.items())
+    )
+
+
+@dataclass(frozen=True)
+class Selecao:
+    campos: Optional[dict] = None
+    expandidos: dict = field(default_factory=dict)
+    resumo: bool = False
+
+    @classmethod
+    def da_requisicao(cls, params, esquema=None):
+        fields = _caminhos(params.get("fields"))
+        expand = _caminhos(params.get("expand"))
+        resumo = str(params.get("summary", "")).lower() in VALORES_VERDADEIROS
+        if esquema is not None:
+            for parametro, caminhos in (("fields", fields), ("expand", expand)):
+                try:
+                    _validar(_arvore(caminhos), esquema)
+                except ValueError as exc:
+                    raise ValidationError({parametro: [f"Campo desconhecido: {exc}"]})
+        campos = _arvore(fields + expand) if fields else None
+        return cls(campos, _arvore(expand) if resumo else {}, resumo)
+
+    @property
+    def completa(self) -> bool:
+        return self.campos is None and not self.resumo
+
+    def inclui(self, nome) -> bool:
+        return self.campos is None or nome in self.campos
+
+    def explicito(self, nome) -> bool:
+        return self.campos is not None and nome in self.campos
+
+    def recolhe(self, nome) -> bool:
+        return self.resumo and nome not in self.expandidos
+
+    def filha(self, nome) -> "Selecao":
+        campos = None if self.campos is None else self.campos.get(nome)
+        return Selecao(campos, self.expandidos.get(nome) or {}, self.resumo)
+
+    def chave(self) -> str:
+        campos = "*" if self.campos is None else _normalizar(self.campos)
+        bruto = f"{campos}|{_normalizar(self.expandidos)}|{int(self.resumo)}"
+        return hashlib.sha1(bruto.encode()).hexdigest()[:12]
+
+
+def campos_recolhidos(model, selecao):
+    return {nome for nome in RECOLHIDOS_NO_RESUMO.get(model, ()) if selecao.recolhe(nome)}
+
+
+def contagens_exibidas(model, selecao):
+    recolhidos = campos_recolhidos(model, selecao)
+    return [
+        nome
+        for nome, origem in CONTAGENS_NO_RESUMO.get(model, {}).items()
+        if selecao.explicito(nome) or (origem in recolhidos and selecao.inclui(origem))
+    ]
+
+
+def _restringir_colunas(queryset, selecao, obrigatorias):
+    model = queryset.model
+    recolhidos = campos_recolhidos(model, selecao)
+    concretos = {campo.name for campo in model._meta.concrete_fields}
+    if selecao.campos is not None:
+        colunas = {"id", *obrigatorias, *contagens_exibidas(model, selecao)}
+        colunas.update(nome for nome in selecao.campos if nome in concretos and nome not in recolhidos)
+        return queryset.only(*sorted(colunas))
+    adiados = sorted(recolhidos & concretos - set(obrigatorias))
+    if adiados:
+        return queryset.defer(*adiados)
+    return queryset
+
+
+def otimizar_modulos(queryset, selecao=Selecao(), obrigatorias=()):
+    return _restringir_colunas(queryset, selecao, obrigatorias)
+
+
+def otimizar_treinamentos(queryset, selecao=Selecao(), obrigatorias=()):
+    queryset = _restringir_colunas(queryset, selecao, obrigatorias)
+    if selecao.inclui("modulos") and not selecao.recolhe("modulos"):
+        modulos = otimizar_modulos(Modulo.objects.all(), selecao.filha("modulos"), obrigatorias=["treinamento"])
+        queryset = queryset.prefetch_related(Prefetch("modulos", queryset=modulos))
+    return queryset
+
+
+def otimizar_departamentos(queryset, selecao=Selecao(), obrigatorias=()):
+    queryset = _restringir_colunas(queryset, selecao, obrigatorias)
+    if selecao.inclui("treinamentos"):
+        treinamentos = otimizar_treinamentos(
+            Treinamento.objects.all(), selecao.filha("treinamentos"), obrigatorias=["departamento"]
+        )
+        queryset = queryset.prefetch_related(Prefetch("treinamentos", queryset=treinamentos))
+    return queryset
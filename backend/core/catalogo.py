@@ -0,0 +1,81 @@
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_etags
+
+from .campos import Selecao, otimizar_departamentos
+from .compacto import modo_compacto
+from .models import Departamento
+from .serializacao import catalogo_compilado, renderizar_json
+from .serializers import DepartamentoSerializer
+
+VERSAO_KEY = "catalogo:versao"
+SNAPSHOT_KEY = "catalogo:snapshot:{versao}:{selecao}"
+
+
+def _timeout():
+    return getattr(settings, "CATALOGO_CACHE_TIMEOUT", 60 * 60 * 24)
+
+
+def versao_atual() -> str:
+    versao = cache.get(VERSAO_KEY)
+    if versao is None:
+        cache.add(VERSAO_KEY, uuid.uuid4().hex, None)
+        versao = cache.get(VERSAO_KEY)
+    return versao
+
+
+async def aversao_atual() -> str:
+    versao = await cache.aget(VERSAO_KEY)
+    if versao is None:
+        await cache.aadd(VERSAO_KEY, uuid.uuid4().hex, None)
+        versao = await cache.aget(VERSAO_KEY)
+    return versao
+
+
+def _variante(versao: str) -> str:
+    return f"{versao}-bitmap" if modo_compacto() else versao
+
+
+def etag_para(versao: str, selecao: Selecao = Selecao()) -> str:
+    versao = _variante(versao)
+    if selecao.completa:
+        return f'"catalogo-{versao}"'
+    return f'"catalogo-{versao}-{selecao.chave()}"'
+
+
+def etag_confere(if_none_match: str, etag: str) -> bool:
+    etags = {tag.removeprefix("W/") for tag in parse_etags(if_none_match or "")}
+    return etag in etags or "*" in etags
+
+
+def invalidar_catalogo():
+    cache.set(VERSAO_KEY, uuid.uuid4().hex, None)
+
+
+def renderizar_catalogo(selecao: Selecao = Selecao()) -> bytes:
+    if selecao.completa:
+        return renderizar_json(catalogo_compilado())
+    departamentos = otimizar_departamentos(Departamento.objects.all(), selecao)
+    serializer = DepartamentoSerializer(departamentos, many=True, selecao=selecao)
+    return renderizar_json(serializer.data)
+
+
+def obter_snapshot(versao: str, selecao: Selecao = Selecao()) -> bytes:
+    key = SNAPSHOT_KEY.format(versao=_variante(versao), selecao=selecao.chave())
+    conteudo = cache.get(key)
+    if conteudo is None:
+        conteudo = renderizar_catalogo(selecao)
+        cache.set(key, conteudo, _timeout())
+    return conteudo
+
+
+async def aobter_snapshot(versao: str, selecao: Selecao = Selecao()) -> bytes:
+    key = SNAPSHOT_KEY.format(versao=_variante(versao), selecao=selecao.chave())
+    conteudo = await cache.aget(key)
+    if conteudo is None:
+        conteudo = await sync_to_async(renderizar_catalogo)(selecao)
+        await cache.aset(key, conteudo, _timeout())
+    return conteudo
@@ -0,0 +1,153 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Colaborador
+
+CACHE_KEY = "colaborador:id:{digest}"
+GERACAO_KEY = "colaborador:geracao"
+
+
+class _CacheLocal:
+    def __init__(self, tamanho: int, ttl: float, intervalo_geracao: float):
+        self.tamanho = tamanho
+        self.ttl = ttl
+        self.intervalo_geracao = intervalo_geracao
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self._geracao = None
+        self._conferir_geracao_em = 0.0
+
+    def geracao_vencida(self) -> bool:
+        return self._conferir_geracao_em <= time.monotonic()
+
+    def registrar_geracao(self, geracao):
+        with self._lock:
+            if geracao != self._geracao:
+                self._itens.clear()
+                self._geracao = geracao
+            self._conferir_geracao_em = time.monotonic() + self.intervalo_geracao
+
+    def get(self, chave):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            valor, expira_em = item
+            if expira_em < time.monotonic():
+                del self._itens[chave]
+                return None
+            self._itens.move_to_end(chave)
+            return valor
+
+    def set(self, chave, valor):
+        with self._lock:
+            self._itens[chave] = (valor, time.monotonic() + self.ttl)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho:
+                self._itens.popitem(last=False)
+
+    def delete(self, chave):
+        with self._lock:
+            self._itens.pop(chave, None)
+
+    def clear(self):
+        with self._lock:
+            self._itens.clear()
+            self._geracao = None
+            self._conferir_geracao_em = 0.0
+
+
+_cache_local = _CacheLocal(
+    tamanho=getattr(settings, "COLABORADOR_CACHE_TAMANHO", 1024),
+    ttl=getattr(settings, "COLABORADOR_CACHE_TTL_LOCAL", 60),
+    intervalo_geracao=getattr(settings, "COLABORADOR_CACHE_GERACAO_SEGUNDOS", 5),
+)
+
+
+def email_do_usuario(user) -> str:
+    return user.email.lower() if user.email else user.username.lower()
+
+
+def _chave(email: str) -> str:
+    return CACHE_KEY.format(digest=hashlib.sha1(email.encode()).hexdigest())
+
+
+def colaborador_id_por_email(email: str) -> int:
+    chave = _chave(email)
+    if _cache_local.geracao_vencida():
+        _cache_local.registrar_geracao(cache.get(GERACAO_KEY, 0))
+    colaborador_id = _cache_local.get(chave)
+    if colaborador_id is None:
+        colaborador_id = cache.get(chave)
+        if colaborador_id is None:
+            colaborador, _ = Colaborador.objects.get_or_create(
+                email=email,
+                defaults={"nome": email.split("@", maxsplit=1)[0], "administrador": False},
+            )
+            colaborador_id = colaborador.pk
+            cache.set(chave, colaborador_id, getattr(settings, "COLABORADOR_CACHE_TIMEOUT", 60 * 60))
+        _cache_local.set(chave, colaborador_id)
+    return colaborador_id
+
+
+async def acolaborador_id_por_email(email: str) -> int:
+    chave = _chave(email)
+    if _cache_local.geracao_vencida():
+        _cache_local.registrar_geracao(await cache.aget(GERACAO_KEY, 0))
+    colaborador_id = _cache_local.get(chave)
+    if colaborador_id is None:
+        colaborador_id = await cache.aget(chave)
+        if colaborador_id is None:
+            colaborador, _ = await Colaborador.objects.aget_or_create(
+                email=email,
+                defaults={"nome": email.split("@", maxsplit=1)[0], "administrador": False},
+            )
+            colaborador_id = colaborador.pk
+            await cache.aset(chave, colaborador_id, getattr(settings, "COLABORADOR_CACHE_TIMEOUT", 60 * 60))
+        _cache_local.set(chave, colaborador_id)
+    return colaborador_id
+
+
+def resolver_colaborador_id(request) -> int:
+    colaborador_id = getattr(request, "_colaborador_id", None)
+    if colaborador_id is None:
+        colaborador_id = getattr(request.user, "colaborador_id", None)
+    if colaborador_id is None:
+        colaborador_id = colaborador_id_por_email(email_do_usuario(request.user))
+    request._colaborador_id = colaborador_id
+    return colaborador_id
+
+
+async def aresolver_colaborador_id(request) -> int:
+    colaborador_id = getattr(request, "_colaborador_id", None)
+    if colaborador_id is None:
+        colaborador_id = getattr(request.user, "colaborador_id", None)
+    if colaborador_id is None:
+        colaborador_id = await acolaborador_id_por_email(email_do_usuario(request.user))
+    request._colaborador_id = colaborador_id
+    return colaborador_id
+
+
+def invalidar_colaborador(email: str, avancar: bool = False):
+    chave = _chave(email.lower())
+    cache.delete(chave)
+    _cache_local.delete(chave)
+    if avancar:
+        avancar_geracao()
+
+
+def avancar_geracao():
+    if not cache.add(GERACAO_KEY, 1, None):
+        try:
+            cache.incr(GERACAO_KEY)
+        except ValueError:
+            cache.add(GERACAO_KEY, 1, None)
+
+
+def limpar_cache_local():
+    _cache_local.clear()
@@ -0,0 +1,157 @@
+import base64
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Modulo, ModuloProgresso, RemocaoProgresso, TreinamentoMatricula
+
+
+def modo_compacto() -> bool:
+    return getattr(settings, "PROGRESSO_COMPACTO", False)
+
+
+def para_inteiro(bitmap) -> int:
+    return int.from_bytes(bytes(bitmap or b""), "little")
+
+
+def para_bytes(valor: int) -> bytes:
+    return valor.to_bytes((valor.bit_length() + 7) // 8, "little")
+
+
+def codificar(valor: int) -> str:
+    return base64.b64encode(para_bytes(valor)).decode()
+
+
+def mascara(ordinais) -> int:
+    valor = 0
+    for ordinal in ordinais:
+        valor |= 1 << ordinal
+    return valor
+
+
+def contar(valor: int, ordinais) -> int:
+    return (valor & mascara(ordinais)).bit_count()
+
+
+def identificador(matricula_id: int, modulo_id: int) -> str:
+    return f"{matricula_id}-{modulo_id}"
+
+
+def ler_identificador(valor: str):
+    matricula_id, _, modulo_id = str(valor).partition("-")
+    return int(matricula_id), int(modulo_id)
+
+
+def _consulta_ordinais(treinamento_ids):
+    return (
+        Modulo.objects.filter(treinamento_id__in=list(treinamento_ids))
+        .order_by("treinamento_id", "ordinal")
+        .values_list("treinamento_id", "ordinal", "id")
+    )
+
+
+def _agrupar_ordinais(linhas) -> dict:
+    ordinais = defaultdict(dict)
+    for treinamento_id, ordinal, modulo_id in linhas:
+        ordinais[treinamento_id][ordinal] = modulo_id
+    return ordinais
+
+
+def ordinais_dos_treinamentos(treinamento_ids) -> dict:
+    return _agrupar_ordinais(_consulta_ordinais(treinamento_ids))
+
+
+async def aordinais_dos_treinamentos(treinamento_ids) -> dict:
+    return _agrupar_ordinais([linha async for linha in _consulta_ordinais(treinamento_ids)])
+
+
+def linha_virtual(matricula, modulo_id: int, concluido: bool) -> ModuloProgresso:
+    linha = ModuloProgresso(matricula=matricula, modulo_id=modulo_id, concluido=concluido)
+    linha.id = identificador(matricula.pk, modulo_id)
+    return linha
+
+
+def linhas_virtuais(matricula, ordinais: dict, todas=False) -> list:
+    valor = para_inteiro(matricula.modulos_bitmap)
+    return [
+        linha_virtual(matricula, modulo_id, bool(valor >> ordinal & 1))
+        for ordinal, modulo_id in sorted(ordinais.items())
+        if todas or valor >> ordinal & 1
+    ]
+
+
+def _lotes_de_matriculas(consulta, batch_size):
+    ultimo = 0
+    while True:
+        lote = list(consulta.filter(id__gt=ultimo).order_by("id")[:batch_size])
+        if not lote:
+            return
+        yield lote
+        ultimo = lote[-1].id
+
+
+def compactar_linhas(batch_size: int = 2000, remover: bool = False) -> int:
+    tabela = connection.ops.quote_name(ModuloProgresso._meta.db_table)
+    coluna = connection.ops.quote_name(ModuloProgresso._meta.get_field("matricula").column)
+    campos = ["modulos_bitmap", "atualizado_em"] if remover else ["modulos_bitmap"]
+    total = 0
+    for lote in _lotes_de_matriculas(TreinamentoMatricula.objects.only("id", *campos), batch_size):
+        valores = dict.fromkeys((matricula.id for matricula in lote), 0)
+        for matricula_id, ordinal in ModuloProgresso.objects.filter(
+            matricula_id__in=list(valores), concluido=True, modulo__treinamento=F("matricula__treinamento")
+        ).values_list("matricula_id", "modulo__ordinal"):
+            valores[matricula_id] |= 1 << ordinal
+        agora = timezone.now()
+        for matricula in lote:
+            matricula.modulos_bitmap = para_bytes(valores[matricula.id])
+            matricula.atualizado_em = agora
+        with transaction.atomic():
+            TreinamentoMatricula.objects.bulk_update(lote, campos)
+            if remover:
+                RemocaoProgresso.objects.registrar_de(
+                    ModuloProgresso.objects.filter(matricula_id__in=list(valores)),
+                    "modulo",
+                    "matricula__colaborador_id",
+                    "modulo_id",
+                )
+                with connection.cursor() as cursor:
+                    marcadores = ", ".join(["%s"] * len(valores))
+                    cursor.execute(f"DELETE FROM {tabela} WHERE {coluna} IN ({marcadores})", list(valores))
+        total += len(lote)
+    return total
+
+
+def expandir_bitmaps(batch_size: int = 2000) -> int:
+    agora = timezone.now()
+    total = 0
+    consulta = TreinamentoMatricula.objects.exclude(modulos_bitmap=b"").only("id", "treinamento_id", "modulos_bitmap")
+    for lote in _lotes_de_matriculas(consulta, batch_size):
+        ordinais = ordinais_dos_treinamentos({matricula.treinamento_id for matricula in lote})
+        existentes = {
+            (progresso.matricula_id, progresso.modulo_id): progresso
+            for progresso in ModuloProgresso.objects.filter(matricula_id__in=[matricula.id for matricula in lote])
+        }
+        novos = []
+        alterados = []
+        for matricula in lote:
+            valor = para_inteiro(matricula.modulos_bitmap)
+            for ordinal, modulo_id in ordinais[matricula.treinamento_id].items():
+                concluido = bool(valor >> ordinal & 1)
+                progresso = existentes.get((matricula.id, modulo_id))
+                if progresso is None:
+                    if concluido:
+                        novos.append(ModuloProgresso(matricula_id=matricula.id, modulo_id=modulo_id, concluido=True))
+                elif progresso.concluido != concluido:
+                    progresso.concluido = concluido
+                    progresso.atualizado_em = agora
+                    if not concluido:
+                        progresso.concluido_em = None
+                    alterados.append(progresso)
+        with transaction.atomic():
+            ModuloProgresso.objects.bulk_create(novos)
+            ModuloProgresso.objects.bulk_update(alterados, ["concluido", "concluido_em", "atualizado_em"])
+        total += len(novos) + len(alterados)
+    return total
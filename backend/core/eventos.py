@@ -0,0 +1,102 @@
+from django.conf import settings
+from django.db import connection, transaction
+from rest_framework.exceptions import ValidationError
+
+from .models import EventoProgresso, Modulo, ModuloProgresso, TreinamentoMatricula
+from .progresso import aplicar_percentual, marcar_progresso
+
+
+def em_segundo_plano() -> bool:
+    return getattr(settings, "PROGRESSO_EM_SEGUNDO_PLANO", False)
+
+
+def _conferir_modulos(modulo_ids, existentes):
+    inexistentes = sorted(set(modulo_ids) - set(existentes))
+    if inexistentes:
+        raise ValidationError({"modulo_id": [f"Modulo inexistente: {modulo_id}" for modulo_id in inexistentes]})
+
+
+def validar_modulos(modulo_ids):
+    _conferir_modulos(modulo_ids, Modulo.objects.filter(id__in=list(modulo_ids)).values_list("id", flat=True))
+
+
+async def avalidar_modulos(modulo_ids):
+    consulta = Modulo.objects.filter(id__in=list(modulo_ids)).values_list("id", flat=True)
+    _conferir_modulos(modulo_ids, [modulo_id async for modulo_id in consulta])
+
+
+def _novos_eventos(colaborador_id: int, itens) -> list:
+    return [
+        EventoProgresso(colaborador_id=colaborador_id, modulo_id=item["modulo_id"], concluido=item["concluido"])
+        for item in itens
+    ]
+
+
+def registrar_eventos(colaborador_id: int, itens):
+    itens = list(itens)
+    validar_modulos({item["modulo_id"] for item in itens})
+    return EventoProgresso.objects.bulk_create(_novos_eventos(colaborador_id, itens))
+
+
+async def aregistrar_eventos(colaborador_id: int, itens):
+    itens = list(itens)
+    await avalidar_modulos({item["modulo_id"] for item in itens})
+    return await EventoProgresso.objects.abulk_create(_novos_eventos(colaborador_id, itens))
+
+
+def pendentes_do_colaborador(colaborador_id: int):
+    return (
+        EventoProgresso.objects.filter(colaborador_id=colaborador_id)
+        .order_by("id")
+        .values_list("modulo_id", "concluido", "modulo__treinamento_id", "modulo__treinamento__total_modulos")
+    )
+
+
+def mesclar_pendentes(colaborador_id: int, matriculas, progresso, pendentes):
+    if not pendentes:
+        return matriculas, progresso
+
+    por_treinamento = {matricula.treinamento_id: matricula for matricula in matriculas}
+    por_modulo = {item.modulo_id: item for item in progresso}
+    totais = {}
+    for modulo_id, concluido, treinamento_id, total_modulos in pendentes:
+        totais[treinamento_id] = total_modulos
+        matricula = por_treinamento.get(treinamento_id)
+        if matricula is None:
+            matricula = por_treinamento[treinamento_id] = TreinamentoMatricula(
+                colaborador_id=colaborador_id, treinamento_id=treinamento_id
+            )
+            matriculas.append(matricula)
+        item = por_modulo.get(modulo_id)
+        if item is None:
+            item = por_modulo[modulo_id] = ModuloProgresso(modulo_id=modulo_id, concluido=False)
+            progresso.append(item)
+        if item.concluido != concluido:
+            matricula.modulos_concluidos += 1 if concluido else -1
+            item.concluido = concluido
+
+    for treinamento_id, total_modulos in totais.items():
+        aplicar_percentual(por_treinamento[treinamento_id], total_modulos)
+    return matriculas, progresso
+
+
+def aplicar_eventos(eventos) -> int:
+    finais = {}
+    for evento in sorted(eventos, key=lambda evento: evento.id):
+        finais[(evento.colaborador_id, evento.modulo_id)] = evento
+    _, aplicados, _ = marcar_progresso(
+        {chave: evento.concluido for chave, evento in finais.items()},
+        {chave: evento.criado_em for chave, evento in finais.items()},
+    )
+    return len(aplicados)
+
+
+def processar_lote(batch_size=1000):
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    with transaction.atomic():
+        eventos = list(EventoProgresso.objects.select_for_update(skip_locked=skip_locked).order_by("id")[:batch_size])
+        if not eventos:
+            return 0, 0
+        aplicados = aplicar_eventos(eventos)
+        EventoProgresso.objects.filter(id__in=[evento.id for evento in eventos]).delete()
+    return len(eventos), aplicados
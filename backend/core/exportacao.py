@@ -0,0 +1,107 @@
+import csv
+import tempfile
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import TreinamentoMatricula, TreinamentoMatriculaArquivada
+
+CABECALHO = [
+    "colaborador",
+    "email",
+    "departamento",
+    "codigo_treinamento",
+    "treinamento",
+    "status",
+    "percentual_conclusao",
+    "iniciado_em",
+    "concluido_em",
+]
+COLUNAS = [
+    "id",
+    "colaborador__nome",
+    "colaborador__email",
+    "treinamento__departamento__nome",
+    "treinamento__codigo",
+    "treinamento__nome",
+    "status",
+    "percentual_conclusao",
+    "iniciado_em",
+    "concluido_em",
+]
+
+
+class _Eco:
+    def write(self, valor):
+        return valor
+
+
+def _inicio_do_dia(data):
+    inicio = datetime.combine(data, time.min)
+    return timezone.make_aware(inicio) if settings.USE_TZ else inicio
+
+
+def filtrar_matriculas(filtros, modelo=TreinamentoMatricula):
+    queryset = modelo.objects.all()
+    if filtros.get("departamento"):
+        queryset = queryset.filter(treinamento__departamento_id=filtros["departamento"])
+    if filtros.get("treinamento"):
+        queryset = queryset.filter(treinamento_id=filtros["treinamento"])
+    if filtros.get("status"):
+        queryset = queryset.filter(status=filtros["status"])
+    if filtros.get("iniciado_de"):
+        queryset = queryset.filter(iniciado_em__gte=_inicio_do_dia(filtros["iniciado_de"]))
+    if filtros.get("iniciado_ate"):
+        queryset = queryset.filter(iniciado_em__lt=_inicio_do_dia(filtros["iniciado_ate"] + timedelta(days=1)))
+    if filtros.get("concluido_de"):
+        queryset = queryset.filter(concluido_em__gte=_inicio_do_dia(filtros["concluido_de"]))
+    if filtros.get("concluido_ate"):
+        queryset = queryset.filter(concluido_em__lt=_inicio_do_dia(filtros["concluido_ate"] + timedelta(days=1)))
+    return queryset
+
+
+def _bloco_exportacao(queryset, ultimo_id: int, chunk_size: int):
+    return queryset.filter(id__gt=ultimo_id).order_by("id").values_list(*COLUNAS)[:chunk_size]
+
+
+def linhas_exportacao(queryset, chunk_size=2000):
+    formato = settings.REST_FRAMEWORK.get("DATETIME_FORMAT")
+    ultimo_id = 0
+    while True:
+        bloco = list(_bloco_exportacao(queryset, ultimo_id, chunk_size))
+        if not bloco:
+            return
+        for linha in bloco:
+            yield [
+                valor.strftime(formato) if formato and isinstance(valor, datetime) else valor
+                for valor in linha[1:]
+            ]
+        ultimo_id = bloco[-1][0]
+
+
+def linhas_com_arquivo(filtros, chunk_size=2000):
+    yield from linhas_exportacao(filtrar_matriculas(filtros), chunk_size)
+    if filtros.get("status") in (None, "", "concluido"):
+        yield from linhas_exportacao(filtrar_matriculas(filtros, TreinamentoMatriculaArquivada), chunk_size)
+
+
+def gerar_csv(linhas):
+    writer = csv.writer(_Eco(), delimiter=";")
+    yield "\ufeff" + writer.writerow(CABECALHO)
+    for linha in linhas:
+        yield writer.writerow(["" if valor is None else valor for valor in linha])
+
+
+def gerar_xlsx(linhas):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    planilha = workbook.create_sheet("matriculas")
+    planilha.append(CABECALHO)
+    for linha in linhas:
+        planilha.append(linha)
+    arquivo = tempfile.TemporaryFile()
+    workbook.save(arquivo)
+    arquivo.seek(0)
+    return arquivo
@@ -0,0 +1,216 @@
+import csv
+import json
+from collections import Counter
+from datetime import date
+from itertools import islice
+
+from django.db import transaction
+
+from .busca import reindexar
+from .catalogo import invalidar_catalogo
+from .models import Departamento, Modulo, Treinamento
+from .progresso import reconciliar_totais
+from .resumos import reconstruir_resumos
+
+CAMPOS_TREINAMENTO = ["nome", "responsavel", "departamento_id"]
+CAMPOS_MODULO = ["descricao", "video_iframe", "video_origem"]
+ORIGENS_VALIDAS = {valor for valor, _ in Modulo._meta.get_field("video_origem").choices}
+
+
+def ler_csv(arquivo, delimitador=","):
+    yield from csv.DictReader(arquivo, delimiter=delimitador)
+
+
+def ler_json(arquivo, tamanho_bloco=65536):
+    decoder = json.JSONDecoder()
+    buffer = ""
+    inicio_lista = False
+    fim = False
+    while not fim:
+        bloco = arquivo.read(tamanho_bloco)
+        fim = not bloco
+        buffer += bloco
+        posicao = 0
+        while True:
+            while posicao < len(buffer) and (buffer[posicao].isspace() or buffer[posicao] == ","):
+                posicao += 1
+            if posicao < len(buffer) and buffer[posicao] == "[" and not inicio_lista:
+                inicio_lista = True
+                posicao += 1
+                continue
+            if posicao < len(buffer) and buffer[posicao] == "]":
+                posicao += 1
+                continue
+            if posicao >= len(buffer):
+                break
+            try:
+                item, posicao = decoder.raw_decode(buffer, posicao)
+            except json.JSONDecodeError:
+                if fim:
+                    raise
+                break
+            yield item
+        buffer = buffer[posicao:]
+
+
+def _texto(linha, campo):
+    return (linha.get(campo) or "").strip()
+
+
+class ImportadorTreinamentos:
+    def __init__(self, chunk_size=1000, stdout=None):
+        self.chunk_size = chunk_size
+        self.stdout = stdout
+        self.contagem = Counter()
+        self.departamentos = dict(Departamento.objects.values_list("nome", "id"))
+        self.treinamentos_afetados = set()
+
+    def importar(self, linhas):
+        numero = 0
+        linhas = iter(linhas)
+        while True:
+            bloco = list(islice(linhas, self.chunk_size))
+            if not bloco:
+                break
+            validas = []
+            for linha in bloco:
+                numero += 1
+                if not _texto(linha, "departamento") or not _texto(linha, "treinamento"):
+                    self.contagem["linhas_invalidas"] += 1
+                    self._avisar(f"Linha {numero}: departamento e treinamento sao obrigatorios.")
+                    continue
+                validas.append(linha)
+            with transaction.atomic():
+                self._importar_bloco(validas)
+
+        if self.treinamentos_afetados:
+            reconciliar_totais(Treinamento.objects.filter(id__in=self.treinamentos_afetados))
+            reindexar(self.treinamentos_afetados)
+            invalidar_catalogo()
+        return self.contagem
+
+    def _avisar(self, mensagem):
+        if self.stdout:
+            self.stdout.write(mensagem)
+
+    def _resolver_departamentos(self, linhas):
+        faltantes = {_texto(linha, "departamento") for linha in linhas} - set(self.departamentos)
+        if faltantes:
+            Departamento.objects.bulk_create([Departamento(nome=nome) for nome in sorted(faltantes)])
+            self.departamentos.update(
+                Departamento.objects.filter(nome__in=faltantes).values_list("nome", "id")
+            )
+            self.contagem["departamentos_inseridos"] += len(faltantes)
+
+    def _chave_treinamento(self, linha):
+        codigo = _texto(linha, "codigo")
+        if codigo:
+            return ("codigo", codigo)
+        return ("nome", self.departamentos[_texto(linha, "departamento")], _texto(linha, "treinamento"))
+
+    def _importar_bloco(self, linhas):
+        if not linhas:
+            return
+        self._resolver_departamentos(linhas)
+
+        desejados = {}
+        for linha in linhas:
+            desejados[self._chave_treinamento(linha)] = {
+                "codigo": _texto(linha, "codigo"),
+                "nome": _texto(linha, "treinamento"),
+                "responsavel": _texto(linha, "responsavel"),
+                "departamento_id": self.departamentos[_texto(linha, "departamento")],
+            }
+        treinamentos = self._upsert_treinamentos(desejados)
+        self._upsert_modulos(linhas, treinamentos)
+
+    def _upsert_treinamentos(self, desejados):
+        codigos = [chave[1] for chave in desejados if chave[0] == "codigo"]
+        nomes = [chave[2] for chave in desejados if chave[0] == "nome"]
+        existentes = {}
+        if codigos:
+            for treinamento in Treinamento.objects.filter(codigo__in=codigos):
+                existentes[("codigo", treinamento.codigo)] = treinamento
+        if nomes:
+            for treinamento in Treinamento.objects.filter(nome__in=nomes).order_by("id"):
+                existentes.setdefault(("nome", treinamento.departamento_id, treinamento.nome), treinamento)
+
+        novos = []
+        alterados = []
+        hoje = date.today()
+        for chave, dados in desejados.items():
+            treinamento = existentes.get(chave)
+            if treinamento is None:
+                treinamento = Treinamento(**dados)
+                novos.append(treinamento)
+                existentes[chave] = treinamento
+            elif any(getattr(treinamento, campo) != dados[campo] for campo in CAMPOS_TREINAMENTO):
+                for campo in CAMPOS_TREINAMENTO:
+                    setattr(treinamento, campo, dados[campo])
+                treinamento.ultima_atualizacao = hoje
+                alterados.append(treinamento)
+            else:
+                self.contagem["treinamentos_ignorados"] += 1
+
+        if novos:
+            sem_codigo = [treinamento for treinamento in novos if not treinamento.codigo]
+            for treinamento, codigo in zip(sem_codigo, Treinamento.reservar_codigos(len(sem_codigo))):
+                treinamento.codigo = codigo
+            Treinamento.objects.bulk_create(novos)
+            ids = dict(Treinamento.objects.filter(codigo__in=[t.codigo for t in novos]).values_list("codigo", "id"))
+            for treinamento in novos:
+                treinamento.id = ids[treinamento.codigo]
+        Treinamento.objects.bulk_update(alterados, CAMPOS_TREINAMENTO + ["ultima_atualizacao"])
+        if novos or alterados:
+            reconstruir_resumos([treinamento.id for treinamento in novos + alterados])
+        self.treinamentos_afetados.update(treinamento.id for treinamento in novos + alterados)
+        self.contagem["treinamentos_inseridos"] += len(novos)
+        self.contagem["treinamentos_atualizados"] += len(alterados)
+        return existentes
+
+    def _upsert_modulos(self, linhas, treinamentos):
+        desejados = {}
+        for linha in linhas:
+            titulo = _texto(linha, "modulo")
+            if not titulo:
+                continue
+            origem = _texto(linha, "video_origem") or "youtube"
+            if origem not in ORIGENS_VALIDAS:
+                self.contagem["linhas_invalidas"] += 1
+                self._avisar(f"Modulo '{titulo}': video_origem invalido '{origem}'.")
+                continue
+            treinamento = treinamentos[self._chave_treinamento(linha)]
+            desejados[(treinamento.id, titulo)] = {
+                "descricao": linha.get("descricao") or "",
+                "video_iframe": _texto(linha, "video_iframe"),
+                "video_origem": origem,
+            }
+        if not desejados:
+            return
+
+        existentes = {
+            (modulo.treinamento_id, modulo.titulo): modulo
+            for modulo in Modulo.objects.filter(
+                treinamento_id__in={chave[0] for chave in desejados},
+                titulo__in={chave[1] for chave in desejados},
+            )
+        }
+        novos = []
+        alterados = []
+        for (treinamento_id, titulo), dados in desejados.items():
+            modulo = existentes.get((treinamento_id, titulo))
+            if modulo is None:
+                novos.append(Modulo(treinamento_id=treinamento_id, titulo=titulo, **dados))
+            elif any(getattr(modulo, campo) != dados[campo] for campo in CAMPOS_MODULO):
+                for campo in CAMPOS_MODULO:
+                    setattr(modulo, campo, dados[campo])
+                alterados.append(modulo)
+            else:
+                self.contagem["modulos_ignorados"] += 1
+                continue
+            self.treinamentos_afetados.add(treinamento_id)
+
+        Modulo.objects.bulk_create(Modulo.atribuir_ordinais(novos))
+        Modulo.objects.bulk_update(alterados, CAMPOS_MODULO)
+        self.contagem["modulos_inseridos"] += len(novos)
+        self.contagem["modulos_atualizados"] += len(alterados)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.arquivo import arquivar_matriculas
+
+
+class Command(BaseCommand):
+    help = "Move matriculas concluidas antigas e o progresso dos modulos para as tabelas de arquivo, em lotes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dias", type=int, default=None)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        matriculas, progresso = arquivar_matriculas(options["dias"], options["batch_size"])
+        self.stdout.write(f"Matriculas arquivadas: {matriculas}")
+        self.stdout.write(f"Linhas de progresso arquivadas: {progresso}")
+        self.stdout.write(self.style.SUCCESS("Arquivamento finalizado."))
@@ -0,0 +1,93 @@
+import json
+import platform
+import subprocess
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from core.benchmark import CENARIOS, medir, montar_contexto
+from core.models import (
+    Colaborador,
+    Departamento,
+    Modulo,
+    ModuloProgresso,
+    Treinamento,
+    TreinamentoMatricula,
+)
+
+
+class Command(BaseCommand):
+    help = "Mede latencia e queries dos endpoints principais e grava o resultado em JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iteracoes", type=int, default=50)
+        parser.add_argument("--aquecimento", type=int, default=5)
+        parser.add_argument("--usuarios", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--saida", default="benchmark.json")
+        parser.add_argument("--cenario", action="append", dest="cenarios", default=[])
+
+    def handle(self, *args, **options):
+        cenarios = CENARIOS
+        if options["cenarios"]:
+            cenarios = [cenario for cenario in CENARIOS if cenario.nome in options["cenarios"]]
+            desconhecidos = set(options["cenarios"]) - {cenario.nome for cenario in cenarios}
+            if desconhecidos:
+                raise CommandError(f"Cenarios desconhecidos: {', '.join(sorted(desconhecidos))}")
+        if not Colaborador.objects.exists():
+            raise CommandError("Banco vazio. Rode gerar_dados_sinteticos antes.")
+
+        contexto = montar_contexto(options["usuarios"], options["seed"])
+        resultados = {}
+        with override_settings(ALLOWED_HOSTS=["*"]):
+            for cenario in cenarios:
+                resultados[cenario.nome] = medir(cenario, contexto, options["iteracoes"], options["aquecimento"])
+                resumo = resultados[cenario.nome]
+                self.stdout.write(
+                    f"{cenario.nome:<24} p50={resumo['p50_ms']:>8.2f}ms p95={resumo['p95_ms']:>8.2f}ms "
+                    f"p99={resumo['p99_ms']:>8.2f}ms queries={resumo['queries_media']:>6.1f}"
+                )
+
+        relatorio = {
+            "meta": {
+                "gerado_em": timezone.now().isoformat(),
+                "commit": self._commit(),
+                "python": platform.python_version(),
+                "banco": connection.vendor,
+                "iteracoes": options["iteracoes"],
+                "aquecimento": options["aquecimento"],
+                "usuarios": options["usuarios"],
+                "seed": options["seed"],
+                "linhas": {
+                    model._meta.db_table: model.objects.count()
+                    for model in [
+                        Departamento,
+                        Treinamento,
+                        Modulo,
+                        Colaborador,
+                        TreinamentoMatricula,
+                        ModuloProgresso,
+                    ]
+                },
+            },
+            "endpoints": resultados,
+        }
+        saida = Path(options["saida"])
+        saida.write_text(json.dumps(relatorio, indent=2, ensure_ascii=False))
+        self.stdout.write(self.style.SUCCESS(f"Resultado gravado em {saida}"))
+
+    def _commit(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "HEAD"],
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
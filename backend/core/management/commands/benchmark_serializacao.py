@@ -0,0 +1,135 @@
+import random
+import statistics
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from core.benchmark import percentil
+from core.campos import otimizar_departamentos
+from core.models import (
+    Colaborador,
+    Departamento,
+    ModuloProgresso,
+    TreinamentoMatricula,
+    TreinamentoMatriculaArquivada,
+)
+from core.serializacao import (
+    catalogo_compilado,
+    orjson,
+    progresso_do_colaborador,
+    renderizar_json,
+    treinamentos_do_colaborador,
+)
+from core.serializers import DepartamentoSerializer, UsuarioTreinamentoSerializer
+
+
+def catalogo_serializer(colaborador_id):
+    departamentos = otimizar_departamentos(Departamento.objects.all())
+    return JSONRenderer().render(DepartamentoSerializer(departamentos, many=True).data)
+
+
+def me_progresso_serializer(colaborador_id):
+    matriculas = TreinamentoMatricula.objects.filter(colaborador_id=colaborador_id)
+    progresso = ModuloProgresso.objects.filter(matricula__in=matriculas)
+    return JSONRenderer().render(
+        {
+            "matriculas": [
+                {
+                    "treinamento_id": m.treinamento_id,
+                    "status": m.status,
+                    "percentual_conclusao": m.percentual_conclusao,
+                    "iniciado_em": m.iniciado_em,
+                    "concluido_em": m.concluido_em,
+                }
+                for m in matriculas
+            ],
+            "modulos": [{"modulo_id": p.modulo_id, "concluido": p.concluido} for p in progresso],
+        }
+    )
+
+
+def usuario_treinamentos_serializer(colaborador_id):
+    matriculas = (
+        TreinamentoMatricula.objects.select_related("treinamento")
+        .filter(colaborador_id=colaborador_id)
+        .order_by("-iniciado_em")
+    )
+    arquivadas = TreinamentoMatriculaArquivada.objects.select_related("treinamento").filter(
+        colaborador_id=colaborador_id
+    )
+    payload = [
+        {
+            "id": matricula.treinamento.id,
+            "nome": matricula.treinamento.nome,
+            "iniciado_em": matricula.iniciado_em,
+            "concluido_em": matricula.concluido_em,
+            "status": matricula.status,
+        }
+        for matricula in list(matriculas) + list(arquivadas)
+    ]
+    if len(payload) > len(matriculas):
+        payload.sort(
+            key=lambda item: (item["iniciado_em"] is not None, item["iniciado_em"] or datetime.min), reverse=True
+        )
+    return JSONRenderer().render(UsuarioTreinamentoSerializer(payload, many=True).data)
+
+
+CENARIOS = {
+    "catalogo": (catalogo_serializer, lambda colaborador_id: renderizar_json(catalogo_compilado())),
+    "me_progresso": (
+        me_progresso_serializer,
+        lambda colaborador_id: renderizar_json(progresso_do_colaborador(colaborador_id)),
+    ),
+    "usuario_treinamentos": (
+        usuario_treinamentos_serializer,
+        lambda colaborador_id: renderizar_json(treinamentos_do_colaborador(colaborador_id)),
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = "Compara o caminho de serializacao compilado com os serializers DRF e confere se a saida e identica"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iteracoes", type=int, default=50)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--cenario", action="append", dest="cenarios", default=[])
+
+    def handle(self, *args, **options):
+        nomes = options["cenarios"] or list(CENARIOS)
+        desconhecidos = set(nomes) - set(CENARIOS)
+        if desconhecidos:
+            raise CommandError(f"Cenarios desconhecidos: {', '.join(sorted(desconhecidos))}")
+        colaboradores = list(
+            TreinamentoMatricula.objects.order_by().values_list("colaborador_id", flat=True).distinct()[:500]
+        ) or list(Colaborador.objects.values_list("id", flat=True)[:500])
+        if not colaboradores:
+            raise CommandError("Banco vazio. Rode gerar_dados_sinteticos antes.")
+
+        self.stdout.write(f"encoder: {'orjson' if orjson is not None else 'json'}")
+        rng = random.Random(options["seed"])
+        sorteados = [rng.choice(colaboradores) for _ in range(options["iteracoes"])]
+        for nome in nomes:
+            referencia, compilado = CENARIOS[nome]
+            for colaborador_id in set(sorteados):
+                if referencia(colaborador_id) != compilado(colaborador_id):
+                    raise CommandError(f"{nome}: saida divergente para o colaborador {colaborador_id}")
+            tempos_referencia = self._medir(referencia, sorteados)
+            tempos_compilado = self._medir(compilado, sorteados)
+            media_referencia = statistics.mean(tempos_referencia)
+            media_compilado = statistics.mean(tempos_compilado)
+            self.stdout.write(
+                f"{nome:<22} serializer p50={percentil(tempos_referencia, 0.5):>8.2f}ms "
+                f"compilado p50={percentil(tempos_compilado, 0.5):>8.2f}ms "
+                f"ganho={media_referencia / media_compilado:>5.2f}x"
+            )
+
+    def _medir(self, funcao, colaboradores):
+        tempos = []
+        for colaborador_id in colaboradores:
+            inicio = time.perf_counter()
+            funcao(colaborador_id)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        return tempos
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core.compacto import compactar_linhas, expandir_bitmaps
+
+
+class Command(BaseCommand):
+    help = (
+        "Converte o progresso de modulos entre linhas (MODULO_PROGRESSO) e bitmaps por matricula. "
+        "O bitmap guarda apenas se cada modulo foi concluido: com PROGRESSO_COMPACTO ativo o concluido_em "
+        "por modulo e sempre nulo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--para", choices=["bitmap", "linhas"], required=True)
+        parser.add_argument("--remover-linhas", action="store_true")
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if options["para"] == "bitmap":
+            total = compactar_linhas(options["batch_size"], options["remover_linhas"])
+            self.stdout.write(f"Matriculas compactadas: {total}")
+        else:
+            total = expandir_bitmaps(options["batch_size"])
+            self.stdout.write(f"Linhas de progresso gravadas: {total}")
+        self.stdout.write(self.style.SUCCESS("Conversao de progresso finalizada."))
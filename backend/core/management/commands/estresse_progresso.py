@@ -0,0 +1,256 @@
+import random
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from core.benchmark import percentil
+from core.models import (
+    Colaborador,
+    Departamento,
+    Modulo,
+    ModuloProgresso,
+    RemocaoProgresso,
+    ResumoTreinamento,
+    SequenciaCodigo,
+    Treinamento,
+    TreinamentoMatricula,
+)
+from core.progresso import aplicar_percentual, calcular_percentual, concluir_modulo, iniciar_matricula
+
+
+def iniciar_legado(colaborador_id, treinamento_id):
+    treinamento = Treinamento.objects.get(id=treinamento_id)
+    matricula, _ = TreinamentoMatricula.objects.get_or_create(colaborador_id=colaborador_id, treinamento=treinamento)
+    matricula.status = "em_andamento"
+    if not matricula.iniciado_em:
+        matricula.iniciado_em = timezone.now()
+    matricula.save(update_fields=["status", "iniciado_em", "atualizado_em"])
+
+
+def concluir_legado(colaborador_id, modulo_id, concluido):
+    modulo = Modulo.objects.select_related("treinamento").get(id=modulo_id)
+    matricula, _ = TreinamentoMatricula.objects.get_or_create(
+        colaborador_id=colaborador_id, treinamento=modulo.treinamento
+    )
+    progresso, _ = ModuloProgresso.objects.get_or_create(matricula=matricula, modulo=modulo)
+    with transaction.atomic():
+        alterados = ModuloProgresso.objects.filter(pk=progresso.pk, concluido=not concluido).update(
+            concluido=concluido, concluido_em=timezone.now() if concluido else None, atualizado_em=timezone.now()
+        )
+        if alterados:
+            TreinamentoMatricula.objects.filter(pk=matricula.pk).update(
+                modulos_concluidos=F("modulos_concluidos") + (1 if concluido else -1)
+            )
+            matricula.refresh_from_db(fields=["modulos_concluidos"])
+        aplicar_percentual(matricula, modulo.treinamento.total_modulos)
+        matricula.save(
+            update_fields=["status", "percentual_conclusao", "iniciado_em", "concluido_em", "atualizado_em"]
+        )
+
+
+IMPLEMENTACOES = {
+    "upsert": {"iniciar": iniciar_matricula, "concluir": concluir_modulo},
+    "legado": {"iniciar": iniciar_legado, "concluir": concluir_legado},
+}
+
+
+class Command(BaseCommand):
+    help = "Dispara iniciar/concluir concorrentes com cliques duplicados e confere duplicatas, perdas e queries"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--rodadas", type=int, default=50)
+        parser.add_argument("--colaboradores", type=int, default=3)
+        parser.add_argument("--modulos", type=int, default=6)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--implementacao", action="append", dest="implementacoes", default=[])
+
+    def handle(self, *args, **options):
+        nomes = options["implementacoes"] or list(IMPLEMENTACOES)
+        desconhecidas = set(nomes) - set(IMPLEMENTACOES)
+        if desconhecidas:
+            raise CommandError(f"Implementacoes desconhecidas: {', '.join(sorted(desconhecidas))}")
+        if options["threads"] < 2:
+            raise CommandError("Use ao menos 2 threads para simular cliques duplicados.")
+        if connection.vendor == "sqlite":
+            self.stdout.write(
+                self.style.WARNING("SQLite serializa as escritas; use MySQL ou PostgreSQL para medir contencao real.")
+            )
+
+        falhou = False
+        for nome in nomes:
+            fixture = self._preparar(options["colaboradores"], options["modulos"])
+            try:
+                rodadas, esperado = self._planejar(fixture, options)
+                latencias, queries, erros = self._executar(IMPLEMENTACOES[nome], rodadas, options["threads"])
+                violacoes = self._conferir(fixture, esperado)
+            finally:
+                self._limpar(fixture)
+            self.stdout.write(
+                f"{nome:<8} operacoes={len(latencias):>5} p50={percentil(latencias, 0.5):>7.2f}ms "
+                f"p95={percentil(latencias, 0.95):>7.2f}ms queries={statistics.mean(queries):>5.2f} "
+                f"erros={sum(erros.values()):>4} violacoes={len(violacoes):>3}"
+            )
+            for tipo, total in sorted(erros.items()):
+                self.stdout.write(f"  erro {tipo}: {total}")
+            for violacao in violacoes:
+                self.stdout.write(f"  {violacao}")
+            falhou = falhou or (bool(violacoes) and nome != "legado")
+
+        if falhou:
+            raise CommandError("Foram encontradas duplicatas ou atualizacoes perdidas.")
+        self.stdout.write(self.style.SUCCESS("Estresse de progresso finalizado."))
+
+    def _preparar(self, colaboradores, modulos):
+        sufixo = uuid.uuid4().hex[:8]
+        departamento = Departamento.objects.create(nome=f"ESTRESSE {sufixo}")
+        treinamento = Treinamento.objects.create(
+            nome=f"Treinamento de estresse {sufixo}", responsavel="Estresse", departamento=departamento
+        )
+        ids_modulos = [
+            Modulo.objects.create(treinamento=treinamento, titulo=f"Modulo {i + 1}", descricao="Estresse").id
+            for i in range(modulos)
+        ]
+        ids_colaboradores = [
+            Colaborador.objects.create(nome=f"Estresse {i + 1}", email=f"estresse.{sufixo}.{i + 1}@exemplo.com.br").id
+            for i in range(colaboradores)
+        ]
+        return {
+            "departamento": departamento,
+            "treinamento": treinamento,
+            "modulos": ids_modulos,
+            "colaboradores": ids_colaboradores,
+        }
+
+    def _planejar(self, fixture, options):
+        rng = random.Random(options["seed"])
+        alvos = [(c, m) for c in fixture["colaboradores"] for m in fixture["modulos"]]
+        rodadas = []
+        esperado = {}
+        for _ in range(options["rodadas"]):
+            operacoes = []
+            for colaborador_id, modulo_id in rng.sample(alvos, min(options["threads"] // 2, len(alvos))):
+                if rng.random() < 0.25:
+                    operacao = ("iniciar", colaborador_id, fixture["treinamento"].id)
+                else:
+                    concluido = rng.random() < 0.7
+                    operacao = ("concluir", colaborador_id, modulo_id, concluido)
+                    esperado[(colaborador_id, modulo_id)] = concluido
+                operacoes += [operacao, operacao]
+            rodadas.append(operacoes)
+        return rodadas, esperado
+
+    def _executar(self, funcoes, rodadas, threads):
+        barreira = threading.Barrier(threads)
+        trava = threading.Lock()
+        latencias, queries, erros = [], [], Counter()
+
+        def trabalhar(indice):
+            contador = {"queries": 0}
+
+            def contar(execute, sql, params, many, context):
+                contador["queries"] += 1
+                return execute(sql, params, many, context)
+
+            try:
+                with connection.execute_wrapper(contar):
+                    for operacoes in rodadas:
+                        barreira.wait()
+                        if indice >= len(operacoes):
+                            continue
+                        tipo, *argumentos = operacoes[indice]
+                        contador["queries"] = 0
+                        inicio = time.perf_counter()
+                        try:
+                            funcoes[tipo](*argumentos)
+                            erro = None
+                        except Exception as exc:
+                            erro = type(exc).__name__
+                        decorrido = (time.perf_counter() - inicio) * 1000
+                        with trava:
+                            latencias.append(decorrido)
+                            queries.append(contador["queries"])
+                            if erro:
+                                erros[erro] += 1
+            finally:
+                connection.close()
+
+        trabalhadores = [threading.Thread(target=trabalhar, args=(indice,)) for indice in range(threads)]
+        for trabalhador in trabalhadores:
+            trabalhador.start()
+        for trabalhador in trabalhadores:
+            trabalhador.join()
+        return latencias, queries, erros
+
+    def _conferir(self, fixture, esperado):
+        treinamento = Treinamento.objects.get(pk=fixture["treinamento"].pk)
+        matriculas = TreinamentoMatricula.objects.filter(treinamento=treinamento)
+        violacoes = [
+            f"matricula duplicada: colaborador {linha['colaborador']} ({linha['total']} linhas)"
+            for linha in matriculas.order_by().values("colaborador").annotate(total=Count("id")).filter(total__gt=1)
+        ]
+        violacoes += [
+            f"progresso duplicado: matricula {linha['matricula']} modulo {linha['modulo']}"
+            for linha in ModuloProgresso.objects.filter(matricula__in=matriculas)
+            .order_by()
+            .values("matricula", "modulo")
+            .annotate(total=Count("id"))
+            .filter(total__gt=1)
+        ]
+
+        obtido = {
+            (colaborador_id, modulo_id): concluido
+            for colaborador_id, modulo_id, concluido in ModuloProgresso.objects.filter(
+                matricula__in=matriculas
+            ).values_list("matricula__colaborador_id", "modulo_id", "concluido")
+        }
+        violacoes += [
+            f"atualizacao perdida: colaborador {colaborador_id} modulo {modulo_id} "
+            f"esperado={concluido} obtido={obtido.get((colaborador_id, modulo_id))}"
+            for (colaborador_id, modulo_id), concluido in sorted(esperado.items())
+            if obtido.get((colaborador_id, modulo_id)) != concluido
+        ]
+
+        concluidos = Count("progresso_modulos", filter=Q(progresso_modulos__concluido=True))
+        for matricula in matriculas.annotate(reais=concluidos):
+            percentual = calcular_percentual(matricula.reais, treinamento.total_modulos)
+            if matricula.modulos_concluidos != matricula.reais or matricula.percentual_conclusao != percentual:
+                violacoes.append(
+                    f"contador divergente: colaborador {matricula.colaborador_id} "
+                    f"modulos_concluidos={matricula.modulos_concluidos} reais={matricula.reais} "
+                    f"percentual={matricula.percentual_conclusao} esperado={percentual}"
+                )
+            if (percentual == 100) != (matricula.status == "concluido"):
+                violacoes.append(
+                    f"status divergente: colaborador {matricula.colaborador_id} status={matricula.status} "
+                    f"percentual={percentual}"
+                )
+
+        resumo = ResumoTreinamento.objects.filter(treinamento=treinamento).values(
+            "matriculados", "em_andamento", "concluidos", "soma_percentual"
+        ).first() or {"matriculados": 0, "em_andamento": 0, "concluidos": 0, "soma_percentual": 0}
+        real = matriculas.aggregate(
+            matriculados=Count("id"),
+            em_andamento=Count("id", filter=Q(status="em_andamento")),
+            concluidos=Count("id", filter=Q(status="concluido")),
+            soma_percentual=Sum("percentual_conclusao"),
+        )
+        real["soma_percentual"] = real["soma_percentual"] or 0
+        if resumo != real:
+            violacoes.append(f"resumo divergente: gravado={resumo} real={real}")
+        return violacoes
+
+    def _limpar(self, fixture):
+        treinamento = fixture["treinamento"]
+        SequenciaCodigo.objects.filter(nome=f"modulo:{treinamento.pk}").delete()
+        treinamento.delete()
+        fixture["departamento"].delete()
+        Colaborador.objects.filter(id__in=fixture["colaboradores"]).delete()
+        RemocaoProgresso.objects.filter(colaborador_id__in=fixture["colaboradores"]).delete()
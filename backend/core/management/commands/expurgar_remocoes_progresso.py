@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.sincronizacao import expurgar_remocoes
+
+
+class Command(BaseCommand):
+    help = "Remove os registros de remocao de progresso mais antigos que a janela de retencao"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dias", type=int, default=None)
+
+    def handle(self, *args, **options):
+        removidas = expurgar_remocoes(options["dias"])
+        self.stdout.write(self.style.SUCCESS(f"Remocoes expurgadas: {removidas}"))
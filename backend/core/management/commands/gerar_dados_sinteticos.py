@@ -0,0 +1,227 @@
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from core.busca import reindexar
+from core.catalogo import invalidar_catalogo
+from core.compacto import modo_compacto, para_bytes
+from core.models import (
+    Colaborador,
+    Departamento,
+    Modulo,
+    ModuloProgresso,
+    SequenciaCodigo,
+    Treinamento,
+    TreinamentoMatricula,
+)
+from core.progresso import calcular_percentual
+from core.resumos import reconstruir_resumos
+
+
+class Command(BaseCommand):
+    help = "Gera uma massa de dados sintetica em larga escala para benchmarks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--departamentos", type=int, default=20)
+        parser.add_argument("--treinamentos", type=int, default=300)
+        parser.add_argument("--modulos-por-treinamento", type=int, default=12)
+        parser.add_argument("--colaboradores", type=int, default=5000)
+        parser.add_argument("--matriculas", type=int, default=30000)
+        parser.add_argument("--prefixo", default="sint")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.compacto = modo_compacto()
+        prefixo = options["prefixo"]
+
+        total_pares = options["colaboradores"] * options["treinamentos"]
+        if options["matriculas"] > total_pares:
+            raise CommandError("Numero de matriculas maior que colaboradores x treinamentos.")
+        if Colaborador.objects.filter(email__startswith=f"{prefixo}.").exists():
+            raise CommandError(f"Ja existem dados com o prefixo '{prefixo}'. Use outro --prefixo.")
+
+        with transaction.atomic():
+            departamentos = self._criar_departamentos(options["departamentos"], prefixo)
+            treinamentos = self._criar_treinamentos(
+                options["treinamentos"], options["modulos_por_treinamento"], departamentos, prefixo
+            )
+            modulos = self._criar_modulos(treinamentos, options["modulos_por_treinamento"])
+            colaboradores = self._criar_colaboradores(options["colaboradores"], prefixo)
+            matriculas, progresso = self._criar_matriculas(
+                colaboradores, treinamentos, modulos, options["matriculas"]
+            )
+            self._resetar_sequencias()
+            reconstruir_resumos(treinamentos)
+            reindexar(treinamentos)
+        invalidar_catalogo()
+
+        self.stdout.write(f"Departamentos: {len(departamentos)}")
+        self.stdout.write(f"Treinamentos: {len(treinamentos)}")
+        self.stdout.write(f"Modulos: {sum(len(ids) for ids in modulos.values())}")
+        self.stdout.write(f"Colaboradores: {len(colaboradores)}")
+        self.stdout.write(f"Matriculas: {matriculas}")
+        self.stdout.write(f"Progresso de modulos: {progresso}")
+        self.stdout.write(self.style.SUCCESS("Dados sinteticos gerados."))
+
+    def _proximo_id(self, model):
+        return (model.objects.aggregate(maximo=Max("id"))["maximo"] or 0) + 1
+
+    def _criar_departamentos(self, quantidade, prefixo):
+        inicio = self._proximo_id(Departamento)
+        departamentos = [
+            Departamento(id=inicio + i, nome=f"{prefixo.upper()} Departamento {i + 1:03d}")
+            for i in range(quantidade)
+        ]
+        Departamento.objects.bulk_create(departamentos, batch_size=self.batch_size)
+        return [departamento.id for departamento in departamentos]
+
+    def _criar_treinamentos(self, quantidade, modulos_por_treinamento, departamentos, prefixo):
+        inicio = self._proximo_id(Treinamento)
+        treinamentos = [
+            Treinamento(
+                id=inicio + i,
+                codigo=f"{prefixo.upper()}-{i + 1:05d}",
+                nome=f"Treinamento sintetico {i + 1}",
+                responsavel=f"Responsavel {self.rng.randint(1, 50)}",
+                departamento_id=self.rng.choice(departamentos),
+                total_modulos=modulos_por_treinamento,
+            )
+            for i in range(quantidade)
+        ]
+        Treinamento.objects.bulk_create(treinamentos, batch_size=self.batch_size)
+        return [treinamento.id for treinamento in treinamentos]
+
+    def _criar_modulos(self, treinamentos, modulos_por_treinamento):
+        proximo = self._proximo_id(Modulo)
+        modulos = {}
+        lote = []
+        for treinamento_id in treinamentos:
+            modulos[treinamento_id] = []
+            for ordem in range(modulos_por_treinamento):
+                lote.append(
+                    Modulo(
+                        id=proximo,
+                        treinamento_id=treinamento_id,
+                        titulo=f"Modulo {ordem + 1}",
+                        descricao="Conteudo sintetico " * self.rng.randint(5, 40),
+                        video_iframe="https://www.youtube.com/embed/dQw4w9WgXcQ",
+                        video_origem="youtube",
+                        ordinal=ordem,
+                    )
+                )
+                modulos[treinamento_id].append(proximo)
+                proximo += 1
+            if len(lote) >= self.batch_size:
+                Modulo.objects.bulk_create(lote, batch_size=self.batch_size)
+                lote = []
+        Modulo.objects.bulk_create(lote, batch_size=self.batch_size)
+        nomes = [f"modulo:{treinamento_id}" for treinamento_id in treinamentos]
+        SequenciaCodigo.objects.filter(nome__in=nomes).delete()
+        SequenciaCodigo.objects.bulk_create(
+            [SequenciaCodigo(nome=nome, valor=modulos_por_treinamento) for nome in nomes], batch_size=self.batch_size
+        )
+        return modulos
+
+    def _criar_colaboradores(self, quantidade, prefixo):
+        inicio = self._proximo_id(Colaborador)
+        colaboradores = []
+        lote = []
+        for i in range(quantidade):
+            lote.append(
+                Colaborador(
+                    id=inicio + i,
+                    nome=f"Colaborador {i + 1}",
+                    email=f"{prefixo}.{i + 1}@exemplo.com.br",
+                )
+            )
+            colaboradores.append(inicio + i)
+            if len(lote) >= self.batch_size:
+                Colaborador.objects.bulk_create(lote, batch_size=self.batch_size)
+                lote = []
+        Colaborador.objects.bulk_create(lote, batch_size=self.batch_size)
+        return colaboradores
+
+    def _criar_matriculas(self, colaboradores, treinamentos, modulos, quantidade):
+        agora = timezone.now()
+        proxima_matricula = self._proximo_id(TreinamentoMatricula)
+        proximo_progresso = self._proximo_id(ModuloProgresso)
+        pares = set()
+        matriculas = []
+        progresso = []
+        total_progresso = 0
+
+        while len(pares) < quantidade:
+            par = (self.rng.choice(colaboradores), self.rng.choice(treinamentos))
+            if par in pares:
+                continue
+            pares.add(par)
+            colaborador_id, treinamento_id = par
+            ids_modulos = modulos[treinamento_id]
+            concluidos = self.rng.randint(0, len(ids_modulos))
+            percentual = calcular_percentual(concluidos, len(ids_modulos))
+            iniciado_em = agora - timedelta(days=self.rng.randint(1, 900))
+            if percentual == 100:
+                situacao = "concluido"
+            elif concluidos:
+                situacao = "em_andamento"
+            else:
+                situacao = self.rng.choice(["nao_iniciado", "em_andamento"])
+            matriculas.append(
+                TreinamentoMatricula(
+                    id=proxima_matricula,
+                    colaborador_id=colaborador_id,
+                    treinamento_id=treinamento_id,
+                    status=situacao,
+                    percentual_conclusao=percentual,
+                    modulos_concluidos=concluidos,
+                    iniciado_em=iniciado_em if situacao != "nao_iniciado" else None,
+                    concluido_em=iniciado_em + timedelta(days=7) if situacao == "concluido" else None,
+                )
+            )
+            if self.compacto:
+                matriculas[-1].modulos_bitmap = para_bytes((1 << concluidos) - 1)
+                proxima_matricula += 1
+                if len(matriculas) >= self.batch_size:
+                    self._gravar_matriculas(matriculas, progresso)
+                    matriculas = []
+                continue
+            vistos = concluidos + (1 if concluidos < len(ids_modulos) and self.rng.random() < 0.5 else 0)
+            for indice, modulo_id in enumerate(ids_modulos[:vistos]):
+                feito = indice < concluidos
+                progresso.append(
+                    ModuloProgresso(
+                        id=proximo_progresso,
+                        matricula_id=proxima_matricula,
+                        modulo_id=modulo_id,
+                        concluido=feito,
+                        concluido_em=iniciado_em + timedelta(hours=indice + 1) if feito else None,
+                    )
+                )
+                proximo_progresso += 1
+            proxima_matricula += 1
+
+            if len(matriculas) >= self.batch_size:
+                total_progresso += self._gravar_matriculas(matriculas, progresso)
+                matriculas, progresso = [], []
+
+        total_progresso += self._gravar_matriculas(matriculas, progresso)
+        return len(pares), total_progresso
+
+    def _gravar_matriculas(self, matriculas, progresso):
+        TreinamentoMatricula.objects.bulk_create(matriculas, batch_size=self.batch_size)
+        ModuloProgresso.objects.bulk_create(progresso, batch_size=self.batch_size)
+        return len(progresso)
+
+    def _resetar_sequencias(self):
+        models = [Departamento, Treinamento, Modulo, Colaborador, TreinamentoMatricula, ModuloProgresso]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
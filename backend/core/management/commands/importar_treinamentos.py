@@ -0,0 +1,46 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importacao import ImportadorTreinamentos, ler_csv, ler_json
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa treinamentos e modulos de um arquivo CSV ou JSON. Colunas: departamento, codigo, "
+        "treinamento, responsavel, modulo, descricao, video_iframe, video_origem"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("arquivo")
+        parser.add_argument("--formato", choices=["csv", "json"])
+        parser.add_argument("--delimitador", default=",")
+        parser.add_argument("--encoding", default="utf-8-sig")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        caminho = Path(options["arquivo"])
+        if not caminho.exists():
+            raise CommandError(f"Arquivo nao encontrado: {caminho}")
+        formato = options["formato"] or ("json" if caminho.suffix.lower() in {".json", ".jsonl"} else "csv")
+
+        importador = ImportadorTreinamentos(chunk_size=options["chunk_size"], stdout=self.stdout)
+        with caminho.open(encoding=options["encoding"], newline="") as arquivo:
+            if formato == "json":
+                linhas = ler_json(arquivo)
+            else:
+                linhas = ler_csv(arquivo, options["delimitador"])
+            contagem = importador.importar(linhas)
+
+        for chave in [
+            "departamentos_inseridos",
+            "treinamentos_inseridos",
+            "treinamentos_atualizados",
+            "treinamentos_ignorados",
+            "modulos_inseridos",
+            "modulos_atualizados",
+            "modulos_ignorados",
+            "linhas_invalidas",
+        ]:
+            self.stdout.write(f"{chave}: {contagem[chave]}")
+        self.stdout.write(self.style.SUCCESS("Importacao finalizada."))
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.eventos import processar_lote
+
+
+class Command(BaseCommand):
+    help = "Aplica em lote os eventos de progresso registrados em modo de gravacao em segundo plano"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--intervalo", type=float, default=1.0)
+        parser.add_argument("--uma-vez", action="store_true")
+
+    def handle(self, *args, **options):
+        total_eventos = 0
+        total_aplicados = 0
+        try:
+            while True:
+                close_old_connections()
+                eventos, aplicados = processar_lote(options["batch_size"])
+                total_eventos += eventos
+                total_aplicados += aplicados
+                if eventos and options["verbosity"] > 1:
+                    self.stdout.write(f"Eventos: {eventos} | Progressos aplicados: {aplicados}")
+                if eventos < options["batch_size"]:
+                    if options["uma_vez"]:
+                        break
+                    time.sleep(options["intervalo"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(
+            self.style.SUCCESS(f"Eventos processados: {total_eventos} | Progressos aplicados: {total_aplicados}")
+        )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.progresso import reconciliar_matriculas, reconciliar_totais
+
+
+class Command(BaseCommand):
+    help = "Recalcula os contadores de modulos e o percentual de conclusao das matriculas"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        treinamentos = reconciliar_totais()
+        self.stdout.write(f"Treinamentos corrigidos: {treinamentos}")
+
+        matriculas = reconciliar_matriculas(batch_size=options["batch_size"])
+        self.stdout.write(f"Matriculas corrigidas: {matriculas}")
+
+        self.stdout.write(self.style.SUCCESS("Reconciliacao de progresso finalizada."))
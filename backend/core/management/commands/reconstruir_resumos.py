@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.resumos import reconstruir_resumos
+
+
+class Command(BaseCommand):
+    help = "Reconstroi do zero o resumo de conclusao por treinamento e departamento"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = reconstruir_resumos()
+        self.stdout.write(self.style.SUCCESS(f"Resumos reconstruidos: {total}"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.busca import reindexar
+
+
+class Command(BaseCommand):
+    help = "Reconstroi o indice de busca textual de treinamentos e modulos"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = reindexar(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Termos indexados: {total}"))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.planos import TABELAS_GRANDES, consultas_quentes, explicar
+
+
+class Command(BaseCommand):
+    help = "Roda EXPLAIN nas consultas dos endpoints quentes e falha se alguma varrer uma tabela grande inteira"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tabela", action="append", dest="tabelas", default=[])
+        parser.add_argument("--mostrar-planos", action="store_true")
+
+    def handle(self, *args, **options):
+        tabelas = set(options["tabelas"]) or TABELAS_GRANDES
+        falhas = []
+        for nome, queryset in consultas_quentes().items():
+            plano, varreduras = explicar(queryset, tabelas)
+            if varreduras:
+                falhas.append(nome)
+                self.stdout.write(self.style.ERROR(f"{nome}: varredura completa em {', '.join(sorted(set(varreduras)))}"))
+            else:
+                self.stdout.write(f"{nome}: ok")
+            if options["mostrar_planos"] or varreduras:
+                self.stdout.write(plano)
+
+        if falhas:
+            raise CommandError(f"{len(falhas)} consulta(s) sem indice adequado: {', '.join(falhas)}")
+        self.stdout.write(self.style.SUCCESS("Todas as consultas quentes usam indices."))
@@ -0,0 +1,78 @@
+from itertools import islice
+
+from django.db import transaction
+
+from .models import Colaborador, TreinamentoMatricula, TreinamentoMatriculaArquivada
+from .resumos import reconstruir_resumos
+
+
+def _em_blocos(iteravel, tamanho):
+    iterador = iter(iteravel)
+    while True:
+        bloco = list(islice(iterador, tamanho))
+        if not bloco:
+            return
+        yield bloco
+
+
+def _unicos(iteravel):
+    vistos = set()
+    for valor in iteravel:
+        if valor not in vistos:
+            vistos.add(valor)
+            yield valor
+
+
+def colaboradores_por_email(emails):
+    emails = {email.lower() for email in emails}
+    existentes = dict(Colaborador.objects.filter(email__in=emails).values_list("email", "id"))
+    encontrados = len(existentes)
+    faltantes = emails - set(existentes)
+    if faltantes:
+        Colaborador.objects.bulk_create(
+            [
+                Colaborador(email=email, nome=email.split("@", maxsplit=1)[0], administrador=False)
+                for email in sorted(faltantes)
+            ],
+            ignore_conflicts=True,
+        )
+        existentes.update(Colaborador.objects.filter(email__in=faltantes).values_list("email", "id"))
+    return list(existentes.values()), len(existentes) - encontrados
+
+
+def _pares_matriculados(modelo, colaborador_ids, treinamento_ids):
+    return set(
+        modelo.objects.filter(colaborador_id__in=colaborador_ids, treinamento_id__in=treinamento_ids).values_list(
+            "colaborador_id", "treinamento_id"
+        )
+    )
+
+
+def matricular_em_massa(treinamento_ids, colaborador_ids, batch_size=1000):
+    criadas = 0
+    existentes = 0
+    total_colaboradores = 0
+    treinamento_ids = list(_unicos(treinamento_ids))
+    for bloco in _em_blocos(_unicos(colaborador_ids), batch_size):
+        total_colaboradores += len(bloco)
+        with transaction.atomic():
+            ativos = _pares_matriculados(TreinamentoMatricula, bloco, treinamento_ids)
+            ja_matriculados = ativos | _pares_matriculados(TreinamentoMatriculaArquivada, bloco, treinamento_ids)
+            novas = [
+                TreinamentoMatricula(colaborador_id=colaborador_id, treinamento_id=treinamento_id)
+                for colaborador_id in bloco
+                for treinamento_id in treinamento_ids
+                if (colaborador_id, treinamento_id) not in ja_matriculados
+            ]
+            TreinamentoMatricula.objects.bulk_create(novas, batch_size=batch_size, ignore_conflicts=True)
+            if novas:
+                criadas += len(_pares_matriculados(TreinamentoMatricula, bloco, treinamento_ids) - ativos)
+        existentes += len(ja_matriculados)
+    if criadas:
+        reconstruir_resumos(treinamento_ids)
+    return {
+        "criadas": criadas,
+        "existentes": existentes,
+        "colaboradores": total_colaboradores,
+        "treinamentos": len(treinamento_ids),
+    }
@@ -0,0 +1,82 @@
+import bisect
+import threading
+
+LIMITES_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+LIMITES_QUERIES = (1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+
+class Histograma:
+    def __init__(self, limites):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)
+        self.soma = 0.0
+        self.maximo = 0.0
+        self.total = 0
+
+    def registrar(self, valor):
+        self.contagens[bisect.bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.maximo = max(self.maximo, valor)
+        self.total += 1
+
+    def percentil(self, p: float):
+        if not self.total:
+            return 0
+        alvo = self.total * p
+        acumulado = 0
+        for indice, contagem in enumerate(self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo:
+                return self.limites[indice] if indice < len(self.limites) else self.maximo
+        return self.maximo
+
+    def como_dict(self):
+        buckets = {f"<={limite}": contagem for limite, contagem in zip(self.limites, self.contagens)}
+        buckets["+inf"] = self.contagens[-1]
+        return {
+            "total": self.total,
+            "media": round(self.soma / self.total, 3) if self.total else 0,
+            "maximo": round(self.maximo, 3),
+            "p50": self.percentil(0.5),
+            "p95": self.percentil(0.95),
+            "p99": self.percentil(0.99),
+            "buckets": buckets,
+        }
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def _novo(self):
+        return {
+            "queries": Histograma(LIMITES_QUERIES),
+            "db_ms": Histograma(LIMITES_MS),
+            "ser_ms": Histograma(LIMITES_MS),
+            "total_ms": Histograma(LIMITES_MS),
+        }
+
+    def registrar(self, endpoint: str, queries: int, db_ms: float, ser_ms: float, total_ms: float):
+        with self._lock:
+            metricas = self._endpoints.get(endpoint)
+            if metricas is None:
+                metricas = self._endpoints[endpoint] = self._novo()
+            metricas["queries"].registrar(queries)
+            metricas["db_ms"].registrar(db_ms)
+            metricas["ser_ms"].registrar(ser_ms)
+            metricas["total_ms"].registrar(total_ms)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                endpoint: {nome: histograma.como_dict() for nome, histograma in metricas.items()}
+                for endpoint, metricas in sorted(self._endpoints.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+registro = RegistroMetricas()
@@ -0,0 +1,116 @@
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+from .metricas import registro
+
+
+@dataclass
+class MetricasRequisicao:
+    endpoint: str = ""
+    queries: int = 0
+    db_ms: float = 0.0
+    ser_ms: float = 0.0
+    total_ms: float = 0.0
+
+    def server_timing(self) -> str:
+        return ", ".join(
+            [
+                f'db;dur={self.db_ms:.2f};desc="{self.queries} queries"',
+                f"ser;dur={self.ser_ms:.2f}",
+                f"total;dur={self.total_ms:.2f}",
+            ]
+        )
+
+
+_metricas_atual = ContextVar("metricas_atual", default=None)
+
+
+def contar_query(execute, sql, params, many, context):
+    metricas = _metricas_atual.get()
+    if metricas is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metricas.queries += 1
+        metricas.db_ms += (time.perf_counter() - inicio) * 1000
+
+
+def instalar_contador(connection, **kwargs):
+    if contar_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(contar_query)
+
+
+class MetricasMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not getattr(settings, "METRICAS_ATIVAS", False):
+            return self.get_response(request)
+
+        metricas, token = self._iniciar(request)
+        inicio = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _metricas_atual.reset(token)
+        return self._finalizar(request, response, metricas, inicio)
+
+    async def __acall__(self, request):
+        if not getattr(settings, "METRICAS_ATIVAS", False):
+            return await self.get_response(request)
+
+        metricas, token = self._iniciar(request)
+        inicio = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _metricas_atual.reset(token)
+        return self._finalizar(request, response, metricas, inicio)
+
+    def _iniciar(self, request):
+        for connection in connections.all(initialized_only=True):
+            instalar_contador(connection)
+        metricas = MetricasRequisicao()
+        request.metricas = metricas
+        return metricas, _metricas_atual.set(metricas)
+
+    def _finalizar(self, request, response, metricas, inicio):
+        metricas.total_ms = (time.perf_counter() - inicio) * 1000
+
+        match = request.resolver_match
+        metricas.endpoint = match.view_name if match else "desconhecido"
+        registro.registrar(
+            metricas.endpoint, metricas.queries, metricas.db_ms, metricas.ser_ms, metricas.total_ms
+        )
+        if settings.DEBUG or getattr(settings, "METRICAS_SERVER_TIMING", False):
+            response["Server-Timing"] = metricas.server_timing()
+        response.metricas = metricas
+        return response
+
+    def process_template_response(self, request, response):
+        metricas = getattr(request, "metricas", None)
+        if metricas is None:
+            return response
+
+        inicio = time.perf_counter()
+
+        def medir_renderizacao(rendered):
+            metricas.ser_ms += (time.perf_counter() - inicio) * 1000
+
+        response.add_post_render_callback(medir_renderizacao)
+        return response
@@ -0,0 +1,59 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def preencher_contadores(apps, schema_editor):
+    Treinamento = apps.get_model("core", "Treinamento")
+    Modulo = apps.get_model("core", "Modulo")
+    TreinamentoMatricula = apps.get_model("core", "TreinamentoMatricula")
+    ModuloProgresso = apps.get_model("core", "ModuloProgresso")
+
+    Treinamento.objects.update(
+        total_modulos=Coalesce(
+            Subquery(
+                Modulo.objects.filter(treinamento=OuterRef("pk"))
+                .order_by()
+                .values("treinamento")
+                .annotate(total=Count("id"))
+                .values("total")
+            ),
+            Value(0),
+        )
+    )
+    TreinamentoMatricula.objects.update(
+        modulos_concluidos=Coalesce(
+            Subquery(
+                ModuloProgresso.objects.filter(
+                    matricula=OuterRef("pk"),
+                    modulo__treinamento=OuterRef("treinamento"),
+                    concluido=True,
+                )
+                .order_by()
+                .values("matricula")
+                .annotate(total=Count("id"))
+                .values("total")
+            ),
+            Value(0),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0003_modulo_video_origem"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="treinamento",
+            name="total_modulos",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="treinamentomatricula",
+            name="modulos_concluidos",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(preencher_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,76 @@
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+import django.db.models.deletion
+
+
+def preencher_resumos(apps, schema_editor):
+    Treinamento = apps.get_model("core", "Treinamento")
+    TreinamentoMatricula = apps.get_model("core", "TreinamentoMatricula")
+    ResumoTreinamento = apps.get_model("core", "ResumoTreinamento")
+
+    agregados = {
+        linha["treinamento"]: linha
+        for linha in TreinamentoMatricula.objects.order_by()
+        .values("treinamento")
+        .annotate(
+            matriculados=Count("id"),
+            em_andamento=Count("id", filter=Q(status="em_andamento")),
+            concluidos=Count("id", filter=Q(status="concluido")),
+            soma_percentual=Sum("percentual_conclusao"),
+        )
+    }
+    ResumoTreinamento.objects.bulk_create(
+        [
+            ResumoTreinamento(
+                treinamento_id=treinamento_id,
+                departamento_id=departamento_id,
+                matriculados=agregados.get(treinamento_id, {}).get("matriculados", 0),
+                em_andamento=agregados.get(treinamento_id, {}).get("em_andamento", 0),
+                concluidos=agregados.get(treinamento_id, {}).get("concluidos", 0),
+                soma_percentual=agregados.get(treinamento_id, {}).get("soma_percentual") or 0,
+            )
+            for treinamento_id, departamento_id in Treinamento.objects.values_list("id", "departamento_id")
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0004_contadores_progresso"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResumoTreinamento",
+            fields=[
+                (
+                    "treinamento",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="resumo",
+                        serialize=False,
+                        to="core.treinamento",
+                    ),
+                ),
+                ("matriculados", models.PositiveIntegerField(default=0)),
+                ("em_andamento", models.PositiveIntegerField(default=0)),
+                ("concluidos", models.PositiveIntegerField(default=0)),
+                ("soma_percentual", models.BigIntegerField(default=0)),
+                ("atualizado_em", models.DateTimeField(auto_now=True)),
+                (
+                    "departamento",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="resumos",
+                        to="core.departamento",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "RESUMO_TREINAMENTOS",
+            },
+        ),
+        migrations.RunPython(preencher_resumos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+import re
+
+from django.db import migrations, models
+
+PADRAO_CODIGO = re.compile(r"^TRN-(\d+)$")
+
+
+def preparar_codigos(apps, schema_editor):
+    Treinamento = apps.get_model("core", "Treinamento")
+    SequenciaCodigo = apps.get_model("core", "SequenciaCodigo")
+
+    ultimo = 0
+    vistos = set()
+    pendentes = []
+    for treinamento_id, codigo in Treinamento.objects.order_by("id").values_list("id", "codigo"):
+        correspondencia = PADRAO_CODIGO.match(codigo or "")
+        if correspondencia:
+            ultimo = max(ultimo, int(correspondencia.group(1)))
+        ultimo = max(ultimo, treinamento_id)
+        if not codigo or codigo in vistos:
+            pendentes.append(treinamento_id)
+        else:
+            vistos.add(codigo)
+
+    for treinamento_id in pendentes:
+        ultimo += 1
+        while f"TRN-{ultimo:04d}" in vistos:
+            ultimo += 1
+        Treinamento.objects.filter(id=treinamento_id).update(codigo=f"TRN-{ultimo:04d}")
+        vistos.add(f"TRN-{ultimo:04d}")
+
+    SequenciaCodigo.objects.update_or_create(nome="treinamento", defaults={"valor": ultimo})
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0005_resumotreinamento"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SequenciaCodigo",
+            fields=[
+                ("nome", models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ("valor", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "db_table": "SEQUENCIAS_CODIGO",
+            },
+        ),
+        migrations.RunPython(preparar_codigos, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="treinamento",
+            name="codigo",
+            field=models.CharField(max_length=50, unique=True),
+        ),
+    ]
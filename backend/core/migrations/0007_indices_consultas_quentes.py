@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0006_sequencia_codigo_treinamento"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="treinamentomatricula",
+            index=models.Index(fields=["colaborador", "status"], name="tm_colaborador_status_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="treinamentomatricula",
+            index=models.Index(fields=["colaborador", "iniciado_em"], name="tm_colaborador_iniciado_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="treinamentomatricula",
+            index=models.Index(fields=["treinamento", "status"], name="tm_treinamento_status_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="moduloprogresso",
+            index=models.Index(fields=["matricula", "concluido", "modulo"], name="mp_matricula_concluido_idx"),
+        ),
+    ]
@@ -0,0 +1,128 @@
+import re
+import unicodedata
+from collections import Counter
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+TAMANHO_TERMO = 64
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "o", "as", "os", "um", "uma", "uns", "umas", "de", "do", "da", "dos", "das", "em", "no",
+    "na", "nos", "nas", "por", "pelo", "pela", "pelos", "pelas", "para", "pra", "com", "sem", "e",
+    "ou", "que", "se", "ao", "aos", "como", "mais", "mas", "seu", "sua", "seus", "suas", "ser",
+    "sao", "foi", "eh", "esta", "este", "essa", "esse", "isso", "isto", "entre", "sobre", "ate",
+}
+SUFIXOS_PLURAL = [
+    ("oes", "ao"),
+    ("aes", "ao"),
+    ("ais", "al"),
+    ("eis", "el"),
+    ("ois", "ol"),
+    ("ns", "m"),
+    ("res", "r"),
+    ("zes", "z"),
+    ("ses", "s"),
+]
+
+
+def reduzir(termo):
+    if len(termo) <= 3 or termo.isdigit():
+        return termo
+    for sufixo, troca in SUFIXOS_PLURAL:
+        if termo.endswith(sufixo):
+            return termo[: -len(sufixo)] + troca
+    if termo.endswith("s") and not termo.endswith("ss"):
+        return termo[:-1]
+    return termo
+
+
+def contar_termos(texto):
+    decomposto = unicodedata.normalize("NFKD", (texto or "").lower())
+    normalizado = "".join(caractere for caractere in decomposto if not unicodedata.combining(caractere))
+    return Counter(
+        reduzir(token)[:TAMANHO_TERMO]
+        for token in TOKEN_RE.findall(normalizado)
+        if len(token) > 1 and token not in STOPWORDS
+    )
+
+
+def indexar_existentes(apps, schema_editor):
+    Treinamento = apps.get_model("core", "Treinamento")
+    Modulo = apps.get_model("core", "Modulo")
+    TermoBusca = apps.get_model("core", "TermoBusca")
+
+    def linhas(treinamento_id, modulo_id, campos):
+        for campo, texto in campos.items():
+            for termo, frequencia in contar_termos(texto).items():
+                yield TermoBusca(
+                    termo=termo,
+                    treinamento_id=treinamento_id,
+                    modulo_id=modulo_id,
+                    campo=campo,
+                    frequencia=frequencia,
+                )
+
+    lote = []
+    for treinamento_id, nome, responsavel in Treinamento.objects.values_list("id", "nome", "responsavel").iterator():
+        lote.extend(linhas(treinamento_id, None, {"nome": nome, "responsavel": responsavel}))
+    for modulo_id, treinamento_id, titulo, descricao in Modulo.objects.values_list(
+        "id", "treinamento_id", "titulo", "descricao"
+    ).iterator():
+        lote.extend(linhas(treinamento_id, modulo_id, {"titulo": titulo, "descricao": descricao}))
+        if len(lote) >= 5000:
+            TermoBusca.objects.bulk_create(lote)
+            lote = []
+    TermoBusca.objects.bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0007_indices_consultas_quentes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TermoBusca",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("termo", models.CharField(max_length=64)),
+                (
+                    "campo",
+                    models.CharField(
+                        choices=[
+                            ("nome", "Nome"),
+                            ("responsavel", "Responsavel"),
+                            ("titulo", "Titulo"),
+                            ("descricao", "Descricao"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("frequencia", models.PositiveIntegerField(default=1)),
+                (
+                    "modulo",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="termos_busca",
+                        to="core.modulo",
+                    ),
+                ),
+                (
+                    "treinamento",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="termos_busca",
+                        to="core.treinamento",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "TERMOS_BUSCA",
+                "indexes": [models.Index(fields=["termo", "treinamento", "modulo"], name="tb_termo_treinamento_idx")],
+            },
+        ),
+        migrations.RunPython(indexar_existentes, migrations.RunPython.noop),
+    ]
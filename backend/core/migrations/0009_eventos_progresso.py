@@ -0,0 +1,39 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0008_termos_busca"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EventoProgresso",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("concluido", models.BooleanField()),
+                ("criado_em", models.DateTimeField(auto_now_add=True)),
+                (
+                    "colaborador",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="eventos_progresso",
+                        to="core.colaborador",
+                    ),
+                ),
+                (
+                    "modulo",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="eventos_progresso",
+                        to="core.modulo",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "EVENTOS_PROGRESSO",
+                "indexes": [models.Index(fields=["colaborador", "id"], name="ep_colaborador_idx")],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0009_eventos_progresso"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="treinamentomatricula",
+            name="atualizado_em",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="moduloprogresso",
+            name="atualizado_em",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name="treinamentomatricula",
+            index=models.Index(fields=["colaborador", "atualizado_em"], name="tm_colaborador_atualizado_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="moduloprogresso",
+            index=models.Index(fields=["matricula", "atualizado_em"], name="mp_matricula_atualizado_idx"),
+        ),
+        migrations.CreateModel(
+            name="RemocaoProgresso",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("colaborador_id", models.PositiveIntegerField()),
+                (
+                    "tipo",
+                    models.CharField(
+                        choices=[("matricula", "Matricula"), ("modulo", "Modulo")],
+                        max_length=20,
+                    ),
+                ),
+                ("objeto_id", models.PositiveIntegerField()),
+                ("removido_em", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "db_table": "REMOCOES_PROGRESSO",
+                "indexes": [
+                    models.Index(fields=["colaborador_id", "removido_em"], name="rp_colaborador_removido_idx"),
+                    models.Index(fields=["removido_em"], name="rp_removido_idx"),
+                ],
+            },
+        ),
+    ]
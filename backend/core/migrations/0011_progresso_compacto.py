@@ -0,0 +1,45 @@
+from django.db import migrations, models
+
+
+def numerar_modulos(apps, schema_editor):
+    Modulo = apps.get_model("core", "Modulo")
+    SequenciaCodigo = apps.get_model("core", "SequenciaCodigo")
+
+    contagem = {}
+    lote = []
+    for modulo in Modulo.objects.order_by("treinamento_id", "id").only("id", "treinamento_id").iterator():
+        modulo.ordinal = contagem.get(modulo.treinamento_id, 0)
+        contagem[modulo.treinamento_id] = modulo.ordinal + 1
+        lote.append(modulo)
+        if len(lote) >= 2000:
+            Modulo.objects.bulk_update(lote, ["ordinal"])
+            lote = []
+    Modulo.objects.bulk_update(lote, ["ordinal"])
+    SequenciaCodigo.objects.bulk_create(
+        [SequenciaCodigo(nome=f"modulo:{treinamento_id}", valor=total) for treinamento_id, total in contagem.items()],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0010_sincronia_progresso"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="modulo",
+            name="ordinal",
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="treinamentomatricula",
+            name="modulos_bitmap",
+            field=models.BinaryField(default=b"", editable=False),
+        ),
+        migrations.RunPython(numerar_modulos, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name="modulo",
+            unique_together={("treinamento", "ordinal")},
+        ),
+    ]
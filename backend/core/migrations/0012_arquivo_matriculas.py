@@ -0,0 +1,87 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0011_progresso_compacto"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TreinamentoMatriculaArquivada",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("nao_iniciado", "Nao iniciado"),
+                            ("em_andamento", "Em andamento"),
+                            ("concluido", "Concluido"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("percentual_conclusao", models.PositiveIntegerField(default=0)),
+                ("modulos_concluidos", models.PositiveIntegerField(default=0)),
+                ("iniciado_em", models.DateTimeField(blank=True, null=True)),
+                ("concluido_em", models.DateTimeField(blank=True, null=True)),
+                ("atualizado_em", models.DateTimeField()),
+                ("modulos_bitmap", models.BinaryField(default=b"")),
+                ("arquivado_em", models.DateTimeField(auto_now_add=True)),
+                (
+                    "colaborador",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="matriculas_arquivadas",
+                        to="core.colaborador",
+                    ),
+                ),
+                (
+                    "treinamento",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="matriculas_arquivadas",
+                        to="core.treinamento",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "TREINAMENTO_MATRICULAS_ARQUIVO",
+                "unique_together": {("colaborador", "treinamento")},
+                "indexes": [
+                    models.Index(fields=["treinamento", "concluido_em"], name="tma_treinamento_concluido_idx"),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ModuloProgressoArquivado",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("concluido", models.BooleanField(default=False)),
+                ("concluido_em", models.DateTimeField(blank=True, null=True)),
+                ("atualizado_em", models.DateTimeField()),
+                (
+                    "matricula",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="progresso_modulos",
+                        to="core.treinamentomatriculaarquivada",
+                    ),
+                ),
+                (
+                    "modulo",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="progresso_arquivado",
+                        to="core.modulo",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "MODULO_PROGRESSO_ARQUIVO",
+                "unique_together": {("matricula", "modulo")},
+            },
+        ),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import connection, connections, models, router, transaction
+from django.db.models.constants import OnConflict
+from django.utils import timezone
 
 
 class Departamento(models.Model):
@@ -11,11 +13,115 @@ class Departamento(models.Model):
         return self.nome
 
 
+class SequenciaCodigoManager(models.Manager):
+    def _incrementar(self, cursor, nome, quantidade):
+        tabela = connection.ops.quote_name(self.model._meta.db_table)
+        if connection.vendor == "mysql":
+            cursor.execute(
+                f"UPDATE {tabela} SET valor = LAST_INSERT_ID(valor + %s) WHERE nome = %s",
+                [quantidade, nome],
+            )
+            return cursor.lastrowid if cursor.rowcount else None
+        if connection.features.can_return_columns_from_insert:
+            cursor.execute(
+                f"UPDATE {tabela} SET valor = valor + %s WHERE nome = %s RETURNING valor",
+                [quantidade, nome],
+            )
+            linha = cursor.fetchone()
+            return linha[0] if linha else None
+        cursor.execute(f"UPDATE {tabela} SET valor = valor + %s WHERE nome = %s", [quantidade, nome])
+        if not cursor.rowcount:
+            return None
+        cursor.execute(f"SELECT valor FROM {tabela} WHERE nome = %s", [nome])
+        return cursor.fetchone()[0]
+
+    def reservar(self, nome: str, quantidade: int = 1) -> range:
+        if quantidade < 1:
+            return range(0)
+        with transaction.atomic(), connection.cursor() as cursor:
+            ultimo = self._incrementar(cursor, nome, quantidade)
+            if ultimo is None:
+                self.get_or_create(nome=nome)
+                ultimo = self._incrementar(cursor, nome, quantidade)
+        return range(ultimo - quantidade + 1, ultimo + 1)
+
+
+class InsercaoIdempotenteManager(models.Manager):
+    def inserir_se_ausente(self, obj) -> bool:
+        alias = router.db_for_write(self.model)
+        conexao = connections[alias]
+        opcoes = self.model._meta
+        campos = [campo for campo in opcoes.concrete_fields if not campo.primary_key]
+        valores = [campo.get_db_prep_save(campo.pre_save(obj, True), conexao) for campo in campos]
+        colunas = ", ".join(conexao.ops.quote_name(campo.column) for campo in campos)
+        sql = " ".join(
+            parte
+            for parte in (
+                conexao.ops.insert_statement(on_conflict=OnConflict.IGNORE),
+                conexao.ops.quote_name(opcoes.db_table),
+                f"({colunas}) VALUES ({', '.join(['%s'] * len(campos))})",
+                conexao.ops.on_conflict_suffix_sql(campos, OnConflict.IGNORE, None, None),
+            )
+            if parte
+        )
+        with conexao.cursor() as cursor:
+            if conexao.features.can_return_columns_from_insert:
+                cursor.execute(f"{sql} RETURNING {conexao.ops.quote_name(opcoes.pk.column)}", valores)
+                linha = cursor.fetchone()
+                obj.pk = linha[0] if linha else None
+            else:
+                cursor.execute(sql, valores)
+                obj.pk = cursor.lastrowid if cursor.rowcount else None
+        if obj.pk is None:
+            return False
+        obj._state.adding = False
+        obj._state.db = alias
+        return True
+
+
+class RemocaoProgressoManager(models.Manager):
+    def registrar_de(self, consulta, tipo: str, colaborador: str, objeto: str) -> None:
+        consulta = (
+            consulta.order_by()
+            .annotate(
+                remocao_colaborador=models.F(colaborador),
+                remocao_tipo=models.Value(tipo, output_field=models.CharField()),
+                remocao_objeto=models.F(objeto),
+                remocao_em=models.Value(timezone.now(), output_field=models.DateTimeField()),
+            )
+            .values_list("remocao_colaborador", "remocao_tipo", "remocao_objeto", "remocao_em")
+        )
+        alias = router.db_for_write(self.model)
+        conexao = connections[alias]
+        opcoes = self.model._meta
+        colunas = ", ".join(
+            conexao.ops.quote_name(opcoes.get_field(nome).column)
+            for nome in ("colaborador_id", "tipo", "objeto_id", "removido_em")
+        )
+        sql, parametros = consulta.query.get_compiler(alias).as_sql()
+        with conexao.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {conexao.ops.quote_name(opcoes.db_table)} ({colunas}) {sql}", parametros)
+
+
+class SequenciaCodigo(models.Model):
+    nome = models.CharField(max_length=50, primary_key=True)
+    valor = models.BigIntegerField(default=0)
+
+    objects = SequenciaCodigoManager()
+
+    class Meta:
+        db_table = "SEQUENCIAS_CODIGO"
+
+    def __str__(self) -> str:
+        return f"{self.nome}: {self.valor}"
+
+
 class Treinamento(models.Model):
-    codigo = models.CharField(max_length=50)
+    codigo = models.CharField(max_length=50, unique=True)
     nome = models.CharField(max_length=255)
     responsavel = models.CharField(max_length=255)
     ultima_atualizacao = models.DateField(auto_now=True)
+    total_modulos = models.PositiveIntegerField(default=0, editable=False)
     departamento = models.ForeignKey(Departamento, on_delete=models.CASCADE, related_name="treinamentos")
 
     class Meta:
@@ -26,17 +132,13 @@ class Treinamento(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.codigo:
-            ultimo_id = (
-                Treinamento.objects.exclude(codigo__isnull=True)
-                .exclude(codigo__exact="")
-                .order_by("-id")
-                .values_list("id", flat=True)
-                .first()
-            )
-            proximo = (ultimo_id or 0) + 1
-            self.codigo = f"TRN-{proximo:04d}"
+            self.codigo = self.reservar_codigos()[0]
         super().save(*args, **kwargs)
 
+    @staticmethod
+    def reservar_codigos(quantidade: int = 1):
+        return [f"TRN-{numero:04d}" for numero in SequenciaCodigo.objects.reservar("treinamento", quantidade)]
+
 
 class Modulo(models.Model):
     treinamento = models.ForeignKey(Treinamento, on_delete=models.CASCADE, related_name="modulos")
@@ -52,13 +154,35 @@ class Modulo(models.Model):
         ],
         default="youtube",
     )
+    ordinal = models.PositiveIntegerField(null=True, editable=False)
 
     class Meta:
         db_table = "MODULOS"
+        unique_together = ("treinamento", "ordinal")
 
     def __str__(self) -> str:
         return self.titulo
 
+    def save(self, *args, **kwargs):
+        if self.ordinal is None:
+            self.ordinal = self.reservar_ordinais(self.treinamento_id)[0]
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def reservar_ordinais(treinamento_id: int, quantidade: int = 1):
+        return [numero - 1 for numero in SequenciaCodigo.objects.reservar(f"modulo:{treinamento_id}", quantidade)]
+
+    @classmethod
+    def atribuir_ordinais(cls, modulos):
+        por_treinamento = {}
+        for modulo in modulos:
+            if modulo.ordinal is None:
+                por_treinamento.setdefault(modulo.treinamento_id, []).append(modulo)
+        for treinamento_id, pendentes in por_treinamento.items():
+            for modulo, ordinal in zip(pendentes, cls.reservar_ordinais(treinamento_id, len(pendentes))):
+                modulo.ordinal = ordinal
+        return modulos
+
 
 class Colaborador(models.Model):
     nome = models.CharField(max_length=255)
@@ -83,26 +207,208 @@ class TreinamentoMatricula(models.Model):
     treinamento = models.ForeignKey(Treinamento, on_delete=models.CASCADE, related_name="matriculas")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="nao_iniciado")
     percentual_conclusao = models.PositiveIntegerField(default=0)
+    modulos_concluidos = models.PositiveIntegerField(default=0, editable=False)
     iniciado_em = models.DateTimeField(null=True, blank=True)
     concluido_em = models.DateTimeField(null=True, blank=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+    modulos_bitmap = models.BinaryField(default=b"", editable=False)
+
+    objects = InsercaoIdempotenteManager()
 
     class Meta:
         db_table = "TREINAMENTO_MATRICULAS"
         unique_together = ("colaborador", "treinamento")
+        indexes = [
+            models.Index(fields=["colaborador", "status"], name="tm_colaborador_status_idx"),
+            models.Index(fields=["colaborador", "iniciado_em"], name="tm_colaborador_iniciado_idx"),
+            models.Index(fields=["treinamento", "status"], name="tm_treinamento_status_idx"),
+            models.Index(fields=["colaborador", "atualizado_em"], name="tm_colaborador_atualizado_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.colaborador} - {self.treinamento}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if {"treinamento_id", "status", "percentual_conclusao"}.issubset(field_names):
+            instance._treinamento_resumo = instance.treinamento_id
+            instance._estado_resumo = instance.estado_resumo()
+        return instance
+
+    def estado_resumo(self):
+        return (self.status, self.percentual_conclusao)
+
+    def travar_estado_resumo(self, using):
+        atual = (
+            TreinamentoMatricula.objects.using(using)
+            .select_for_update()
+            .filter(pk=self.pk)
+            .values_list("treinamento_id", "status", "percentual_conclusao")
+            .first()
+        )
+        if atual is not None:
+            self._treinamento_resumo = atual[0]
+            self._estado_resumo = atual[1:]
+
+    def save(self, *args, **kwargs):
+        if self._state.adding or self.pk is None:
+            return super().save(*args, **kwargs)
+        using = kwargs.get("using") or router.db_for_write(TreinamentoMatricula, instance=self)
+        with transaction.atomic(using=using):
+            self.travar_estado_resumo(using)
+            super().save(*args, **kwargs)
+
 
 class ModuloProgresso(models.Model):
     matricula = models.ForeignKey(TreinamentoMatricula, on_delete=models.CASCADE, related_name="progresso_modulos")
     modulo = models.ForeignKey(Modulo, on_delete=models.CASCADE, related_name="progresso")
     concluido = models.BooleanField(default=False)
     concluido_em = models.DateTimeField(null=True, blank=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    objects = InsercaoIdempotenteManager()
 
     class Meta:
         db_table = "MODULO_PROGRESSO"
         unique_together = ("matricula", "modulo")
+        indexes = [
+            models.Index(fields=["matricula", "concluido", "modulo"], name="mp_matricula_concluido_idx"),
+            models.Index(fields=["matricula", "atualizado_em"], name="mp_matricula_atualizado_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.matricula} - {self.modulo}"
+
+
+class TreinamentoMatriculaArquivada(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    colaborador = models.ForeignKey(Colaborador, on_delete=models.CASCADE, related_name="matriculas_arquivadas")
+    treinamento = models.ForeignKey(Treinamento, on_delete=models.CASCADE, related_name="matriculas_arquivadas")
+    status = models.CharField(max_length=20, choices=TreinamentoMatricula.STATUS_CHOICES)
+    percentual_conclusao = models.PositiveIntegerField(default=0)
+    modulos_concluidos = models.PositiveIntegerField(default=0)
+    iniciado_em = models.DateTimeField(null=True, blank=True)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+    atualizado_em = models.DateTimeField()
+    modulos_bitmap = models.BinaryField(default=b"")
+    arquivado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "TREINAMENTO_MATRICULAS_ARQUIVO"
+        unique_together = ("colaborador", "treinamento")
+        indexes = [
+            models.Index(fields=["treinamento", "concluido_em"], name="tma_treinamento_concluido_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.colaborador_id} - {self.treinamento_id} (arquivada)"
+
+    def estado_resumo(self):
+        return (self.status, self.percentual_conclusao)
+
+
+class ModuloProgressoArquivado(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    matricula = models.ForeignKey(
+        TreinamentoMatriculaArquivada, on_delete=models.CASCADE, related_name="progresso_modulos"
+    )
+    modulo = models.ForeignKey(Modulo, on_delete=models.CASCADE, related_name="progresso_arquivado")
+    concluido = models.BooleanField(default=False)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+    atualizado_em = models.DateTimeField()
+
+    class Meta:
+        db_table = "MODULO_PROGRESSO_ARQUIVO"
+        unique_together = ("matricula", "modulo")
+
+    def __str__(self) -> str:
+        return f"{self.matricula_id} - {self.modulo_id} (arquivado)"
+
+
+class ResumoTreinamento(models.Model):
+    treinamento = models.OneToOneField(
+        Treinamento, on_delete=models.CASCADE, primary_key=True, related_name="resumo"
+    )
+    departamento = models.ForeignKey(Departamento, on_delete=models.CASCADE, related_name="resumos")
+    matriculados = models.PositiveIntegerField(default=0)
+    em_andamento = models.PositiveIntegerField(default=0)
+    concluidos = models.PositiveIntegerField(default=0)
+    soma_percentual = models.BigIntegerField(default=0)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "RESUMO_TREINAMENTOS"
+
+    def __str__(self) -> str:
+        return f"Resumo {self.treinamento}"
+
+    @property
+    def media_percentual(self) -> float:
+        return round(self.soma_percentual / self.matriculados, 2) if self.matriculados else 0
+
+
+class TermoBusca(models.Model):
+    CAMPO_CHOICES = [
+        ("nome", "Nome"),
+        ("responsavel", "Responsavel"),
+        ("titulo", "Titulo"),
+        ("descricao", "Descricao"),
+    ]
+
+    termo = models.CharField(max_length=64)
+    treinamento = models.ForeignKey(Treinamento, on_delete=models.CASCADE, related_name="termos_busca")
+    modulo = models.ForeignKey(
+        Modulo, on_delete=models.CASCADE, null=True, blank=True, related_name="termos_busca"
+    )
+    campo = models.CharField(max_length=20, choices=CAMPO_CHOICES)
+    frequencia = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        db_table = "TERMOS_BUSCA"
+        indexes = [
+            models.Index(fields=["termo", "treinamento", "modulo"], name="tb_termo_treinamento_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.termo} ({self.campo})"
+
+
+class EventoProgresso(models.Model):
+    colaborador = models.ForeignKey(Colaborador, on_delete=models.CASCADE, related_name="eventos_progresso")
+    modulo = models.ForeignKey(Modulo, on_delete=models.CASCADE, related_name="eventos_progresso")
+    concluido = models.BooleanField()
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "EVENTOS_PROGRESSO"
+        indexes = [
+            models.Index(fields=["colaborador", "id"], name="ep_colaborador_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.colaborador_id} - {self.modulo_id} ({self.concluido})"
+
+
+class RemocaoProgresso(models.Model):
+    TIPO_CHOICES = [
+        ("matricula", "Matricula"),
+        ("modulo", "Modulo"),
+    ]
+
+    colaborador_id = models.PositiveIntegerField()
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
+    objeto_id = models.PositiveIntegerField()
+    removido_em = models.DateTimeField(auto_now_add=True)
+
+    objects = RemocaoProgressoManager()
+
+    class Meta:
+        db_table = "REMOCOES_PROGRESSO"
+        indexes = [
+            models.Index(fields=["colaborador_id", "removido_em"], name="rp_colaborador_removido_idx"),
+            models.Index(fields=["removido_em"], name="rp_removido_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.colaborador_id} - {self.tipo} {self.objeto_id}"
@@ -0,0 +1,86 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+
+
+def estimar_linhas(modelo, alias):
+    conexao = connections[alias]
+    with conexao.cursor() as cursor:
+        if conexao.vendor == "mysql":
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [modelo._meta.db_table],
+            )
+        elif conexao.vendor == "postgresql":
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [modelo._meta.db_table])
+        else:
+            return None
+        linha = cursor.fetchone()
+    if not linha or linha[0] is None or linha[0] < 0:
+        return None
+    return int(linha[0])
+
+
+class ContagemEstimadaPaginator(Paginator):
+    limite_contagem = 100000
+
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, QuerySet):
+            return super().count
+        if not self.object_list.query.where:
+            estimado = estimar_linhas(self.object_list.model, self.object_list.db)
+            if estimado is not None and estimado > self.limite_contagem:
+                return estimado
+        return self.object_list.order_by()[: self.limite_contagem].count()
+
+
+class IdCursorPagination(CursorPagination):
+    ordering = "-id"
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+    def get_ordering(self, request, queryset, view):
+        return (self.ordering,)
+
+
+class CursorOuPaginaPagination(BasePagination):
+    modo_query_param = "paginacao"
+    cursor_class = IdCursorPagination
+    pagina_class = PageNumberPagination
+
+    def __init__(self):
+        self.delegado = self.pagina_class()
+
+    def usa_cursor(self, request) -> bool:
+        return (
+            request.query_params.get(self.modo_query_param) == "cursor"
+            or self.cursor_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.usa_cursor(request):
+            self.delegado = self.cursor_class()
+        return self.delegado.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.delegado.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.delegado.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return self.delegado.get_schema_operation_parameters(view)
+
+    def get_results(self, data):
+        return self.delegado.get_results(data)
+
+    def to_html(self):
+        return self.delegado.to_html()
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.delegado, "display_page_controls", False)
@@ -0,0 +1,155 @@
+import json
+import re
+from datetime import timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+from .arquivo import _candidatas_ao_arquivo, _consulta_arquivadas, _consulta_progresso_arquivado, _proximas_candidatas
+from .busca import _ocorrencias, _ranking_treinamentos
+from .compacto import _consulta_ordinais
+from .exportacao import _bloco_exportacao, filtrar_matriculas
+from .models import (
+    Colaborador,
+    Modulo,
+    ModuloProgresso,
+    ModuloProgressoArquivado,
+    RemocaoProgresso,
+    TermoBusca,
+    TreinamentoMatricula,
+    TreinamentoMatriculaArquivada,
+)
+from .pagination import IdCursorPagination
+from .progresso import _concluidos_subquery, _consulta_matricula, _consulta_progresso
+from .resumos import _consultas_resumo
+from .serializacao import _consulta_bitmap, _consulta_modulos, _consultas_treinamentos
+from .sincronizacao import _consulta_remocoes, _consultas_com_pendentes
+from .views import ModuloProgressoViewSet, TreinamentoMatriculaViewSet
+
+TABELAS_GRANDES = {
+    Colaborador._meta.db_table,
+    Modulo._meta.db_table,
+    TreinamentoMatricula._meta.db_table,
+    ModuloProgresso._meta.db_table,
+    TermoBusca._meta.db_table,
+    RemocaoProgresso._meta.db_table,
+    TreinamentoMatriculaArquivada._meta.db_table,
+    ModuloProgressoArquivado._meta.db_table,
+}
+
+
+def _amostra():
+    matricula = TreinamentoMatricula.objects.order_by("id").values("id", "colaborador_id", "treinamento_id").first()
+    if matricula is None:
+        matricula = {"id": 1, "colaborador_id": 1, "treinamento_id": 1}
+    email = Colaborador.objects.filter(id=matricula["colaborador_id"]).values_list("email", flat=True).first()
+    matricula["email"] = email or "colaborador@exemplo.com.br"
+    modulo_id = Modulo.objects.filter(treinamento_id=matricula["treinamento_id"]).values_list("id", flat=True).first()
+    matricula["modulo_id"] = modulo_id or 1
+    return matricula
+
+
+def _pagina_cursor(queryset, ultimo_id: int):
+    return queryset.filter(id__lt=ultimo_id).order_by(IdCursorPagination.ordering)[: IdCursorPagination.page_size]
+
+
+def consultas_quentes():
+    amostra = _amostra()
+    agora = timezone.now()
+    colaborador_id = amostra["colaborador_id"]
+    treinamento_ids = [amostra["treinamento_id"]]
+    matriculas, progresso = _consultas_com_pendentes(colaborador_id, None, [])
+    matriculas_delta, progresso_delta = _consultas_com_pendentes(colaborador_id, agora, [])
+    treinamentos, treinamentos_arquivo = _consultas_treinamentos(colaborador_id)
+    _, resumo, resumo_arquivo = _consultas_resumo(treinamento_ids)
+    return {
+        "resolver_colaborador": Colaborador.objects.filter(email=amostra["email"]),
+        "me_progresso_matriculas": matriculas,
+        "me_progresso_modulos": progresso,
+        "me_progresso_delta_matriculas": matriculas_delta,
+        "me_progresso_delta_modulos": progresso_delta,
+        "me_progresso_bitmap": _consulta_bitmap(colaborador_id, agora),
+        "me_progresso_remocoes": _consulta_remocoes(colaborador_id, agora),
+        "usuario_treinamentos": treinamentos,
+        "usuario_treinamentos_arquivo": treinamentos_arquivo,
+        "restaurar_arquivada": _consulta_arquivadas([colaborador_id], treinamento_ids),
+        "restaurar_arquivada_progresso": _consulta_progresso_arquivado([amostra["id"]]),
+        "concluir_modulo_matricula": _consulta_matricula(colaborador_id, amostra["treinamento_id"]),
+        "concluir_modulo_progresso": _consulta_progresso(amostra["id"], amostra["modulo_id"]),
+        "recontar_concluidos": TreinamentoMatricula.objects.filter(pk__in=[amostra["id"]]).annotate(
+            concluidos=_concluidos_subquery()
+        ),
+        "catalogo_modulos": _consulta_modulos(treinamento_ids),
+        "ordinais_modulos": _consulta_ordinais(treinamento_ids),
+        "resumo_treinamento": resumo,
+        "resumo_treinamento_arquivo": resumo_arquivo,
+        "arquivar_candidatas": _proximas_candidatas(_candidatas_ao_arquivo(agora), 0, 1000),
+        "exportacao_lote": _bloco_exportacao(filtrar_matriculas({}), 0, 2000),
+        "exportacao_periodo": _bloco_exportacao(
+            filtrar_matriculas({"iniciado_de": agora.date() - timedelta(days=30), "iniciado_ate": agora.date()}),
+            0,
+            2000,
+        ),
+        "exportacao_arquivo_periodo": _bloco_exportacao(
+            filtrar_matriculas(
+                {
+                    "treinamento": amostra["treinamento_id"],
+                    "concluido_de": agora.date() - timedelta(days=30),
+                    "concluido_ate": agora.date(),
+                },
+                TreinamentoMatriculaArquivada,
+            ),
+            0,
+            2000,
+        ),
+        "paginacao_cursor_matriculas": _pagina_cursor(TreinamentoMatriculaViewSet.queryset, amostra["id"] + 1),
+        "paginacao_cursor_progresso": _pagina_cursor(ModuloProgressoViewSet.queryset, amostra["id"] + 1),
+        "busca_termos": _ranking_treinamentos(_ocorrencias(["treinamento", "fiscal"]), 20),
+    }
+
+
+def _varreduras_sqlite(plano, tabelas):
+    varreduras = []
+    for linha in plano.splitlines():
+        correspondencia = re.search(r"\bSCAN (\w+)(.*)$", linha)
+        if not correspondencia:
+            continue
+        tabela, resto = correspondencia.groups()
+        if tabela in tabelas and "INDEX" not in resto:
+            varreduras.append(tabela)
+    return varreduras
+
+
+def _varreduras_mysql(plano, tabelas):
+    varreduras = []
+
+    def percorrer(no):
+        if isinstance(no, dict):
+            if no.get("access_type") == "ALL" and no.get("table_name") in tabelas:
+                varreduras.append(no["table_name"])
+            for valor in no.values():
+                percorrer(valor)
+        elif isinstance(no, list):
+            for valor in no:
+                percorrer(valor)
+
+    percorrer(json.loads(plano))
+    return varreduras
+
+
+def _varreduras_postgresql(plano, tabelas):
+    return [
+        tabela
+        for tabela in re.findall(r'Seq Scan on "?(\w+)"?', plano)
+        if tabela in tabelas or tabela.upper() in tabelas
+    ]
+
+
+def explicar(queryset, tabelas=TABELAS_GRANDES):
+    if connection.vendor == "mysql":
+        plano = queryset.explain(format="json")
+        return plano, _varreduras_mysql(plano, tabelas)
+    plano = queryset.explain()
+    if connection.vendor == "postgresql":
+        return plano, _varreduras_postgresql(plano, tabelas)
+    return plano, _varreduras_sqlite(plano, tabelas)
@@ -0,0 +1,460 @@
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .arquivo import restaurar_arquivadas
+from .compacto import contar, linhas_virtuais, modo_compacto, ordinais_dos_treinamentos, para_bytes, para_inteiro
+from .models import Colaborador, Modulo, ModuloProgresso, Treinamento, TreinamentoMatricula
+from .resumos import calcular_delta, reconstruir_resumos, registrar_deltas
+
+
+def calcular_percentual(concluidos: int, total: int) -> int:
+    if not total:
+        return 0
+    return int((min(concluidos, total) / total) * 100)
+
+
+def aplicar_percentual(matricula: TreinamentoMatricula, total: int):
+    percentual = calcular_percentual(matricula.modulos_concluidos, total)
+    if percentual == 100:
+        matricula.status = "concluido"
+        matricula.concluido_em = timezone.now()
+    elif percentual > 0:
+        matricula.status = "em_andamento"
+    else:
+        matricula.status = "nao_iniciado"
+
+    matricula.percentual_conclusao = percentual
+    if matricula.status == "em_andamento" and not matricula.iniciado_em:
+        matricula.iniciado_em = timezone.now()
+
+
+def _consulta_matricula(colaborador_id: int, treinamento_id: int):
+    return TreinamentoMatricula.objects.filter(colaborador_id=colaborador_id, treinamento_id=treinamento_id)
+
+
+def travar_matricula(colaborador_id: int, treinamento_id: int, **iniciais):
+    consulta = _consulta_matricula(colaborador_id, treinamento_id).select_for_update()
+    matricula = consulta.first() if connection.features.has_select_for_update else None
+    if matricula is None:
+        matricula = TreinamentoMatricula(colaborador_id=colaborador_id, treinamento_id=treinamento_id, **iniciais)
+        if TreinamentoMatricula.objects.inserir_se_ausente(matricula):
+            return matricula, restaurar_arquivadas([matricula]).get((colaborador_id, treinamento_id))
+        matricula = consulta.first()
+        if matricula is None:
+            raise _referencia_inexistente(colaborador_id, treinamento_id)
+    return matricula, matricula.estado_resumo()
+
+
+def _registrar_resumo(matricula: TreinamentoMatricula, antes):
+    registrar_deltas({matricula.treinamento_id: calcular_delta(antes, matricula.estado_resumo())})
+    matricula._treinamento_resumo = matricula.treinamento_id
+    matricula._estado_resumo = matricula.estado_resumo()
+
+
+def _treinamento_inexistente(treinamento_id: int) -> ValidationError:
+    return ValidationError({"treinamento_id": [f"Treinamento inexistente: {treinamento_id}"]})
+
+
+def _referencia_inexistente(colaborador_id: int, treinamento_id: int) -> ValidationError:
+    if not Colaborador.objects.filter(pk=colaborador_id).exists():
+        return ValidationError({"colaborador_id": [f"Colaborador inexistente: {colaborador_id}"]})
+    return _treinamento_inexistente(treinamento_id)
+
+
+def iniciar_matricula(colaborador_id: int, treinamento_id: int) -> TreinamentoMatricula:
+    if not Treinamento.objects.filter(pk=treinamento_id).exists():
+        raise _treinamento_inexistente(treinamento_id)
+    return _iniciar_na_transacao(colaborador_id, treinamento_id)
+
+
+async def ainiciar_matricula(colaborador_id: int, treinamento_id: int) -> TreinamentoMatricula:
+    if not await Treinamento.objects.filter(pk=treinamento_id).aexists():
+        raise _treinamento_inexistente(treinamento_id)
+    return await sync_to_async(_iniciar_na_transacao)(colaborador_id, treinamento_id)
+
+
+def _iniciar_na_transacao(colaborador_id: int, treinamento_id: int) -> TreinamentoMatricula:
+    agora = timezone.now()
+    with transaction.atomic():
+        matricula, antes = travar_matricula(colaborador_id, treinamento_id, status="em_andamento", iniciado_em=agora)
+        if matricula.status == "nao_iniciado" or not matricula.iniciado_em:
+            if matricula.status == "nao_iniciado":
+                matricula.status = "em_andamento"
+            matricula.iniciado_em = matricula.iniciado_em or agora
+            matricula.atualizado_em = agora
+            TreinamentoMatricula.objects.filter(pk=matricula.pk).update(
+                status=matricula.status, iniciado_em=matricula.iniciado_em, atualizado_em=agora
+            )
+        _registrar_resumo(matricula, antes)
+    return matricula
+
+
+def _consulta_progresso(matricula, modulo_id: int):
+    return ModuloProgresso.objects.filter(matricula=matricula, modulo_id=modulo_id)
+
+
+def _gravar_progresso(matricula: TreinamentoMatricula, modulo_id: int, concluido: bool, agora):
+    concluido_em = agora if concluido else None
+    progresso = _consulta_progresso(matricula, modulo_id).first()
+    if progresso is None:
+        progresso = ModuloProgresso(
+            matricula=matricula, modulo_id=modulo_id, concluido=concluido, concluido_em=concluido_em
+        )
+        if ModuloProgresso.objects.inserir_se_ausente(progresso):
+            return progresso, int(concluido)
+        progresso = _conferir_modulo(modulo_id, _consulta_progresso(matricula, modulo_id).first())
+    if progresso.concluido == concluido:
+        return progresso, 0
+    alterados = ModuloProgresso.objects.filter(pk=progresso.pk, concluido=progresso.concluido).update(
+        concluido=concluido, concluido_em=concluido_em, atualizado_em=agora
+    )
+    progresso.concluido = concluido
+    progresso.concluido_em = concluido_em
+    progresso.atualizado_em = agora
+    return progresso, (1 if concluido else -1) if alterados else 0
+
+
+def _consulta_modulo(modulo_id: int):
+    return Modulo.objects.filter(pk=modulo_id).values_list("treinamento_id", "treinamento__total_modulos")
+
+
+def _conferir_modulo(modulo_id: int, modulo):
+    if modulo is None:
+        raise ValidationError({"modulo_id": [f"Modulo inexistente: {modulo_id}"]})
+    return modulo
+
+
+def concluir_modulo(colaborador_id: int, modulo_id: int, concluido: bool):
+    treinamento_id, total = _conferir_modulo(modulo_id, _consulta_modulo(modulo_id).first())
+    return _concluir_na_transacao(colaborador_id, modulo_id, concluido, treinamento_id, total)
+
+
+async def aconcluir_modulo(colaborador_id: int, modulo_id: int, concluido: bool):
+    treinamento_id, total = _conferir_modulo(modulo_id, await _consulta_modulo(modulo_id).afirst())
+    return await sync_to_async(_concluir_na_transacao)(colaborador_id, modulo_id, concluido, treinamento_id, total)
+
+
+def _concluir_na_transacao(colaborador_id: int, modulo_id: int, concluido: bool, treinamento_id: int, total: int):
+    agora = timezone.now()
+    with transaction.atomic():
+        matricula, antes = travar_matricula(colaborador_id, treinamento_id)
+        progresso, variacao = _gravar_progresso(matricula, modulo_id, concluido, agora)
+        if variacao:
+            matricula.modulos_concluidos = max(matricula.modulos_concluidos + variacao, 0)
+            matricula.atualizado_em = agora
+            aplicar_percentual(matricula, total)
+            TreinamentoMatricula.objects.filter(pk=matricula.pk).update(
+                modulos_concluidos=matricula.modulos_concluidos,
+                status=matricula.status,
+                percentual_conclusao=matricula.percentual_conclusao,
+                iniciado_em=matricula.iniciado_em,
+                concluido_em=matricula.concluido_em,
+                atualizado_em=agora,
+            )
+        _registrar_resumo(matricula, antes)
+    return matricula, progresso
+
+
+def _conferir_lote(desejado: dict, modulos: dict):
+    inexistentes = sorted(set(desejado) - set(modulos))
+    if inexistentes:
+        raise ValidationError({"modulo_id": [f"Modulo inexistente: {modulo_id}" for modulo_id in inexistentes]})
+
+
+def marcar_modulos_em_lote(colaborador_id: int, itens):
+    desejado = {item["modulo_id"]: item["concluido"] for item in itens}
+    modulos = Modulo.objects.select_related("treinamento").in_bulk(list(desejado))
+    _conferir_lote(desejado, modulos)
+    return _marcar_lote(colaborador_id, desejado, modulos)
+
+
+async def amarcar_modulos_em_lote(colaborador_id: int, itens):
+    desejado = {item["modulo_id"]: item["concluido"] for item in itens}
+    modulos = {
+        modulo.id: modulo
+        async for modulo in Modulo.objects.select_related("treinamento").filter(id__in=list(desejado))
+    }
+    _conferir_lote(desejado, modulos)
+    return await sync_to_async(_marcar_lote)(colaborador_id, desejado, modulos)
+
+
+def _marcar_lote(colaborador_id: int, desejado: dict, modulos: dict):
+    with transaction.atomic():
+        matriculas, _, ordinais = marcar_progresso(
+            {(colaborador_id, modulo_id): concluido for modulo_id, concluido in desejado.items()},
+            modulos={
+                modulo.id: (modulo.treinamento_id, modulo.ordinal, modulo.treinamento.total_modulos)
+                for modulo in modulos.values()
+            },
+        )
+        for treinamento_id in {modulo.treinamento_id for modulo in modulos.values()}:
+            if (colaborador_id, treinamento_id) not in matriculas:
+                raise _referencia_inexistente(colaborador_id, treinamento_id)
+
+    if modo_compacto():
+        return [
+            (
+                matricula,
+                [
+                    linha
+                    for linha in linhas_virtuais(matricula, ordinais[matricula.treinamento_id], todas=True)
+                    if linha.modulo_id in desejado
+                ],
+            )
+            for matricula in matriculas.values()
+        ]
+
+    progresso_por_matricula = {}
+    for progresso in ModuloProgresso.objects.filter(
+        matricula__in=list(matriculas.values()), modulo_id__in=list(desejado)
+    ).order_by("pk"):
+        progresso_por_matricula.setdefault(progresso.matricula_id, []).append(progresso)
+
+    return [
+        (matricula, progresso_por_matricula.get(matricula.pk, []))
+        for matricula in matriculas.values()
+    ]
+
+
+def _gravar_linhas(matriculas: dict, desejados: dict, modulos: dict, momentos: dict, agora):
+    por_id = {matricula.pk: matricula for matricula in matriculas.values()}
+    existentes = {
+        (por_id[progresso.matricula_id].colaborador_id, progresso.modulo_id): progresso
+        for progresso in ModuloProgresso.objects.filter(
+            matricula_id__in=list(por_id), modulo_id__in={modulo_id for _, modulo_id in desejados}
+        )
+        if (por_id[progresso.matricula_id].colaborador_id, progresso.modulo_id) in desejados
+    }
+    novos = []
+    alterados = []
+    for (colaborador_id, modulo_id), concluido in desejados.items():
+        progresso = existentes.get((colaborador_id, modulo_id))
+        concluido_em = momentos.get((colaborador_id, modulo_id), agora) if concluido else None
+        if progresso is None:
+            novos.append(
+                ModuloProgresso(
+                    matricula=matriculas[(colaborador_id, modulos[modulo_id][0])],
+                    modulo_id=modulo_id,
+                    concluido=concluido,
+                    concluido_em=concluido_em,
+                )
+            )
+        elif progresso.concluido != concluido:
+            progresso.concluido = concluido
+            progresso.concluido_em = concluido_em
+            progresso.atualizado_em = agora
+            alterados.append(progresso)
+    ModuloProgresso.objects.bulk_create(novos, ignore_conflicts=True)
+    ModuloProgresso.objects.bulk_update(alterados, ["concluido", "concluido_em", "atualizado_em"])
+
+    contagem = dict(
+        ModuloProgresso.objects.filter(
+            matricula_id__in=list(por_id),
+            modulo__treinamento=F("matricula__treinamento"),
+            concluido=True,
+        )
+        .order_by()
+        .values("matricula")
+        .annotate(total=Count("id"))
+        .values_list("matricula", "total")
+    )
+    for matricula in matriculas.values():
+        matricula.modulos_concluidos = contagem.get(matricula.pk, 0)
+
+
+def _gravar_bitmaps(matriculas: dict, desejados: dict, modulos: dict, ordinais: dict):
+    valores = {chave: para_inteiro(matricula.modulos_bitmap) for chave, matricula in matriculas.items()}
+    for (colaborador_id, modulo_id), concluido in desejados.items():
+        treinamento_id, ordinal, _ = modulos[modulo_id]
+        if concluido:
+            valores[(colaborador_id, treinamento_id)] |= 1 << ordinal
+        else:
+            valores[(colaborador_id, treinamento_id)] &= ~(1 << ordinal)
+    for chave, matricula in matriculas.items():
+        matricula.modulos_bitmap = para_bytes(valores[chave])
+        matricula.modulos_concluidos = contar(valores[chave], ordinais[matricula.treinamento_id])
+
+
+def marcar_progresso(desejados: dict, momentos: dict = None, modulos: dict = None):
+    if modulos is None:
+        modulos = {
+            modulo_id: (treinamento_id, ordinal, total)
+            for modulo_id, treinamento_id, ordinal, total in Modulo.objects.filter(
+                id__in={modulo_id for _, modulo_id in desejados}
+            ).values_list("id", "treinamento_id", "ordinal", "treinamento__total_modulos")
+        }
+    desejados = {chave: concluido for chave, concluido in desejados.items() if chave[1] in modulos}
+    if not desejados:
+        return {}, {}, {}
+
+    compacto = modo_compacto()
+    pares = {(colaborador_id, modulos[modulo_id][0]) for colaborador_id, modulo_id in desejados}
+    totais = {treinamento_id: total for treinamento_id, _, total in modulos.values()}
+    ordinais = ordinais_dos_treinamentos(totais) if compacto else {}
+    agora = timezone.now()
+
+    def carregar(colaborador_ids, treinamento_ids):
+        return {
+            (matricula.colaborador_id, matricula.treinamento_id): matricula
+            for matricula in TreinamentoMatricula.objects.select_for_update()
+            .filter(colaborador_id__in=list(colaborador_ids), treinamento_id__in=list(treinamento_ids))
+            .order_by("pk")
+            if (matricula.colaborador_id, matricula.treinamento_id) in pares
+        }
+
+    with transaction.atomic(savepoint=False):
+        matriculas = carregar({colaborador_id for colaborador_id, _ in pares}, totais)
+        antes = {chave: matricula.estado_resumo() for chave, matricula in matriculas.items()}
+        faltantes = pares - set(matriculas)
+        if faltantes:
+            TreinamentoMatricula.objects.bulk_create(
+                [
+                    TreinamentoMatricula(colaborador_id=colaborador_id, treinamento_id=treinamento_id)
+                    for colaborador_id, treinamento_id in sorted(faltantes)
+                ],
+                ignore_conflicts=True,
+            )
+            criadas = carregar(
+                {colaborador_id for colaborador_id, _ in faltantes},
+                {treinamento_id for _, treinamento_id in faltantes},
+            )
+            matriculas.update(criadas)
+            antes.update(restaurar_arquivadas(criadas.values()))
+            desejados = {
+                (colaborador_id, modulo_id): concluido
+                for (colaborador_id, modulo_id), concluido in desejados.items()
+                if (colaborador_id, modulos[modulo_id][0]) in matriculas
+            }
+
+        if compacto:
+            _gravar_bitmaps(matriculas, desejados, modulos, ordinais)
+        else:
+            _gravar_linhas(matriculas, desejados, modulos, momentos or {}, agora)
+
+        deltas = defaultdict(lambda: (0, 0, 0, 0))
+        for chave, matricula in matriculas.items():
+            matricula.atualizado_em = agora
+            aplicar_percentual(matricula, totais[matricula.treinamento_id])
+            delta = calcular_delta(antes.get(chave), matricula.estado_resumo())
+            deltas[matricula.treinamento_id] = tuple(a + b for a, b in zip(deltas[matricula.treinamento_id], delta))
+        campos = [
+            "modulos_concluidos",
+            "status",
+            "percentual_conclusao",
+            "iniciado_em",
+            "concluido_em",
+            "atualizado_em",
+        ]
+        TreinamentoMatricula.objects.bulk_update(
+            list(matriculas.values()), ["modulos_bitmap", *campos] if compacto else campos
+        )
+        registrar_deltas(dict(deltas))
+    return matriculas, desejados, ordinais
+
+
+def _concluidos_subquery():
+    return Coalesce(
+        Subquery(
+            ModuloProgresso.objects.filter(
+                matricula=OuterRef("pk"),
+                modulo__treinamento=OuterRef("treinamento"),
+                concluido=True,
+            )
+            .order_by()
+            .values("matricula")
+            .annotate(total=Count("id"))
+            .values("total")
+        ),
+        Value(0),
+    )
+
+
+def recontar_concluidos(matriculas) -> int:
+    if modo_compacto():
+        return 0
+    return matriculas.update(modulos_concluidos=_concluidos_subquery())
+
+
+def reconciliar_totais(queryset=None) -> int:
+    if queryset is None:
+        queryset = Treinamento.objects.all()
+    total_modulos = Coalesce(
+        Subquery(
+            Modulo.objects.filter(treinamento=OuterRef("pk"))
+            .order_by()
+            .values("treinamento")
+            .annotate(total=Count("id"))
+            .values("total")
+        ),
+        Value(0),
+    )
+    divergentes = queryset.annotate(esperado=total_modulos).exclude(total_modulos=F("esperado"))
+    ids = list(divergentes.values_list("id", flat=True))
+    if ids:
+        Treinamento.objects.filter(id__in=ids).update(total_modulos=total_modulos)
+    return len(ids)
+
+
+def reconciliar_matriculas(queryset=None, batch_size: int = 500) -> int:
+    if queryset is None:
+        queryset = TreinamentoMatricula.objects.all()
+    colunas = [
+        "id",
+        "treinamento",
+        "modulos_concluidos",
+        "status",
+        "percentual_conclusao",
+        "iniciado_em",
+        "concluido_em",
+    ]
+    if modo_compacto():
+        ordinais = ordinais_dos_treinamentos(
+            queryset.order_by().values_list("treinamento_id", flat=True).distinct()
+        )
+        matriculas = queryset.annotate(total=F("treinamento__total_modulos")).only(*colunas, "modulos_bitmap")
+    else:
+        matriculas = queryset.annotate(esperado=_concluidos_subquery(), total=F("treinamento__total_modulos")).only(
+            *colunas
+        )
+    corrigidas = 0
+    lote = []
+    for matricula in matriculas.order_by("pk").iterator(chunk_size=batch_size):
+        if modo_compacto():
+            matricula.esperado = contar(para_inteiro(matricula.modulos_bitmap), ordinais[matricula.treinamento_id])
+        percentual = calcular_percentual(matricula.esperado, matricula.total)
+        status_divergente = (percentual == 100) != (matricula.status == "concluido")
+        if (
+            matricula.modulos_concluidos == matricula.esperado
+            and matricula.percentual_conclusao == percentual
+            and not status_divergente
+        ):
+            continue
+        matricula.modulos_concluidos = matricula.esperado
+        if matricula.percentual_conclusao != percentual or status_divergente:
+            aplicar_percentual(matricula, matricula.total)
+        lote.append(matricula)
+        if len(lote) >= batch_size:
+            corrigidas += _salvar_lote(lote)
+            lote = []
+    if lote:
+        corrigidas += _salvar_lote(lote)
+    return corrigidas
+
+
+def _salvar_lote(lote) -> int:
+    agora = timezone.now()
+    for matricula in lote:
+        matricula.atualizado_em = agora
+    TreinamentoMatricula.objects.bulk_update(
+        lote,
+        ["modulos_concluidos", "status", "percentual_conclusao", "iniciado_em", "concluido_em", "atualizado_em"],
+    )
+    reconstruir_resumos({matricula.treinamento_id for matricula in lote})
+    return len(lote)
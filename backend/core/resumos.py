@@ -0,0 +1,178 @@
+import time
+from collections import defaultdict
+from functools import partial
+
+from django.db import OperationalError, connection, transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import ResumoTreinamento, Treinamento, TreinamentoMatricula, TreinamentoMatriculaArquivada
+
+CAMPOS_RESUMO = ["matriculados", "em_andamento", "concluidos", "soma_percentual", "atualizado_em"]
+
+
+def _contribuicao(estado):
+    if estado is None:
+        return (0, 0, 0, 0)
+    status, percentual = estado
+    return (1, int(status == "em_andamento"), int(status == "concluido"), percentual)
+
+
+def calcular_delta(antes, depois):
+    return tuple(d - a for a, d in zip(_contribuicao(antes), _contribuicao(depois)))
+
+
+def deltas_de_remocao(*consultas) -> dict:
+    deltas = defaultdict(lambda: (0, 0, 0, 0))
+    for consulta in consultas:
+        for treinamento_id, *antes in consulta.values_list("treinamento_id", "status", "percentual_conclusao"):
+            delta = calcular_delta(tuple(antes), None)
+            deltas[treinamento_id] = tuple(a + b for a, b in zip(deltas[treinamento_id], delta))
+    return dict(deltas)
+
+
+def registrar_deltas(deltas, criar_se_ausente=True):
+    deltas = {treinamento_id: delta for treinamento_id, delta in deltas.items() if any(delta)}
+    if deltas:
+        transaction.on_commit(partial(aplicar_deltas, deltas, criar_se_ausente), robust=True)
+
+
+def aplicar_deltas(deltas, criar_se_ausente=True):
+    ausentes = [
+        treinamento_id for treinamento_id, delta in deltas.items() if not _aplicar_delta(treinamento_id, delta)
+    ]
+    if ausentes and criar_se_ausente:
+        reconstruir_resumos(ausentes)
+
+
+def _aplicar_delta(treinamento_id, delta, tentativas=3) -> int:
+    matriculados, em_andamento, concluidos, soma = delta
+    for tentativa in range(1, tentativas + 1):
+        try:
+            return ResumoTreinamento.objects.filter(treinamento_id=treinamento_id).update(
+                matriculados=F("matriculados") + matriculados,
+                em_andamento=F("em_andamento") + em_andamento,
+                concluidos=F("concluidos") + concluidos,
+                soma_percentual=F("soma_percentual") + soma,
+                atualizado_em=timezone.now(),
+            )
+        except OperationalError:
+            if tentativa == tentativas:
+                raise
+            time.sleep(0.05 * tentativa)
+
+
+def registrar_alteracao(treinamento_id, antes, depois, criar_se_ausente=True):
+    registrar_deltas({treinamento_id: calcular_delta(antes, depois)}, criar_se_ausente)
+
+
+def _consultas_resumo(treinamento_ids=None):
+    treinamentos = Treinamento.objects.order_by("id")
+    matriculas = TreinamentoMatricula.objects.all()
+    arquivadas = TreinamentoMatriculaArquivada.objects.all()
+    if treinamento_ids is not None:
+        treinamentos = treinamentos.filter(id__in=treinamento_ids)
+        matriculas = matriculas.filter(treinamento_id__in=treinamento_ids)
+        arquivadas = arquivadas.filter(treinamento_id__in=treinamento_ids)
+    return (
+        treinamentos.values_list("id", "departamento_id"),
+        matriculas.order_by()
+        .values("treinamento")
+        .annotate(
+            matriculados=Count("id"),
+            em_andamento=Count("id", filter=Q(status="em_andamento")),
+            concluidos=Count("id", filter=Q(status="concluido")),
+            soma_percentual=Coalesce(Sum("percentual_conclusao"), Value(0)),
+        ),
+        arquivadas.order_by()
+        .values("treinamento")
+        .annotate(
+            matriculados=Count("id"),
+            concluidos=Count("id", filter=Q(status="concluido")),
+            soma_percentual=Coalesce(Sum("percentual_conclusao"), Value(0)),
+        ),
+    )
+
+
+def reconstruir_resumos(treinamento_ids=None, batch_size=500):
+    treinamentos, matriculas, arquivadas = _consultas_resumo(treinamento_ids)
+    agregados = {linha["treinamento"]: linha for linha in matriculas}
+    for linha in arquivadas:
+        somado = agregados.setdefault(linha["treinamento"], {})
+        for campo in ("matriculados", "concluidos", "soma_percentual"):
+            somado[campo] = somado.get(campo, 0) + linha[campo]
+    agora = timezone.now()
+    resumos = []
+    for treinamento_id, departamento_id in treinamentos:
+        linha = agregados.get(treinamento_id, {})
+        resumos.append(
+            ResumoTreinamento(
+                treinamento_id=treinamento_id,
+                departamento_id=departamento_id,
+                matriculados=linha.get("matriculados", 0),
+                em_andamento=linha.get("em_andamento", 0),
+                concluidos=linha.get("concluidos", 0),
+                soma_percentual=linha.get("soma_percentual", 0),
+                atualizado_em=agora,
+            )
+        )
+    unique_fields = ["treinamento"] if connection.features.supports_update_conflicts_with_target else None
+    ResumoTreinamento.objects.bulk_create(
+        resumos,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=["departamento"] + CAMPOS_RESUMO,
+    )
+    return len(resumos)
+
+
+def resumo_por_treinamento(departamento_id=None):
+    resumos = ResumoTreinamento.objects.select_related("treinamento").order_by("treinamento_id")
+    if departamento_id:
+        resumos = resumos.filter(departamento_id=departamento_id)
+    return [
+        {
+            "treinamento_id": resumo.treinamento_id,
+            "treinamento": resumo.treinamento.nome,
+            "departamento_id": resumo.departamento_id,
+            "matriculados": resumo.matriculados,
+            "nao_iniciados": resumo.matriculados - resumo.em_andamento - resumo.concluidos,
+            "em_andamento": resumo.em_andamento,
+            "concluidos": resumo.concluidos,
+            "media_percentual": resumo.media_percentual,
+        }
+        for resumo in resumos
+    ]
+
+
+def resumo_por_departamento():
+    linhas = (
+        ResumoTreinamento.objects.order_by("departamento_id")
+        .values("departamento_id", "departamento__nome")
+        .annotate(
+            treinamentos=Count("treinamento"),
+            total_matriculados=Sum("matriculados"),
+            total_em_andamento=Sum("em_andamento"),
+            total_concluidos=Sum("concluidos"),
+            total_percentual=Sum("soma_percentual"),
+        )
+    )
+    return [
+        {
+            "departamento_id": linha["departamento_id"],
+            "departamento": linha["departamento__nome"],
+            "treinamentos": linha["treinamentos"],
+            "matriculados": linha["total_matriculados"],
+            "nao_iniciados": linha["total_matriculados"] - linha["total_em_andamento"] - linha["total_concluidos"],
+            "em_andamento": linha["total_em_andamento"],
+            "concluidos": linha["total_concluidos"],
+            "media_percentual": (
+                round(linha["total_percentual"] / linha["total_matriculados"], 2)
+                if linha["total_matriculados"]
+                else 0
+            ),
+        }
+        for linha in linhas
+    ]
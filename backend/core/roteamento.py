@@ -0,0 +1,184 @@
+import base64
+import json
+import random
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.settings import api_settings
+
+FIXACAO_KEY = "replica:fixar:{identidade}"
+
+_estado_atual = ContextVar("roteamento_estado", default=None)
+_indisponiveis = {}
+
+
+@dataclass
+class EstadoRoteamento:
+    leitura: bool
+    identidade: Optional[str] = None
+    replica: Optional[str] = None
+    escreveu: bool = False
+    falhou: bool = False
+
+
+def replicas_configuradas():
+    return [alias for alias in getattr(settings, "REPLICAS_LEITURA", []) if alias in settings.DATABASES]
+
+
+def _quarentena(alias):
+    _indisponiveis[alias] = time.monotonic() + getattr(settings, "REPLICA_QUARENTENA_SEGUNDOS", 30)
+
+
+def _disponivel(alias) -> bool:
+    ate = _indisponiveis.get(alias)
+    if ate is not None and ate > time.monotonic():
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError:
+        _quarentena(alias)
+        return False
+    _indisponiveis.pop(alias, None)
+    return True
+
+
+def escolher_replica() -> str:
+    candidatas = replicas_configuradas()
+    random.shuffle(candidatas)
+    for alias in candidatas:
+        if _disponivel(alias):
+            return alias
+    return DEFAULT_DB_ALIAS
+
+
+def vigiar_replica(execute, sql, params, many, context):
+    try:
+        return execute(sql, params, many, context)
+    except DatabaseError:
+        _quarentena(context["connection"].alias)
+        estado = _estado_atual.get()
+        if estado is not None:
+            estado.falhou = True
+        raise
+
+
+def instalar_vigia(connection, **kwargs):
+    if connection.alias in replicas_configuradas() and vigiar_replica not in connection.execute_wrappers:
+        connection.execute_wrappers.append(vigiar_replica)
+
+
+class RoteadorReplicas:
+    def db_for_read(self, model, **hints):
+        estado = _estado_atual.get()
+        if estado is None or not estado.leitura or estado.escreveu:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if estado.replica is None:
+            estado.replica = escolher_replica()
+        return estado.replica
+
+    def db_for_write(self, model, **hints):
+        estado = _estado_atual.get()
+        if estado is not None:
+            estado.escreveu = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replicas_configuradas():
+            return False
+        return None
+
+
+def identidade_da_requisicao(request) -> Optional[str]:
+    cabecalho = request.headers.get("Authorization", "")
+    partes = cabecalho.split()
+    if len(partes) == 2 and partes[0] in api_settings.AUTH_HEADER_TYPES:
+        try:
+            payload = partes[1].split(".")[1]
+            claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+            return str(claims[api_settings.USER_ID_CLAIM])
+        except (IndexError, KeyError, TypeError, ValueError):
+            return None
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return str(user.pk)
+    return None
+
+
+def _janela():
+    return getattr(settings, "REPLICA_FIXACAO_SEGUNDOS", 5)
+
+
+class RoteamentoReplicasMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not replicas_configuradas():
+            return self.get_response(request)
+
+        identidade = identidade_da_requisicao(request)
+        fixado = identidade is not None and cache.get(FIXACAO_KEY.format(identidade=identidade))
+        estado = EstadoRoteamento(leitura=request.method in SAFE_METHODS and not fixado, identidade=identidade)
+        response = self._executar(request, estado)
+        if self._repetir(response, estado):
+            estado = EstadoRoteamento(leitura=False, identidade=identidade)
+            response = self._executar(request, estado)
+        if estado.escreveu and identidade is not None:
+            cache.set(FIXACAO_KEY.format(identidade=identidade), True, _janela())
+        return self._anotar(response, estado)
+
+    async def __acall__(self, request):
+        if not replicas_configuradas():
+            return await self.get_response(request)
+
+        identidade = identidade_da_requisicao(request)
+        fixado = identidade is not None and await cache.aget(FIXACAO_KEY.format(identidade=identidade))
+        estado = EstadoRoteamento(leitura=request.method in SAFE_METHODS and not fixado, identidade=identidade)
+        response = await self._aexecutar(request, estado)
+        if self._repetir(response, estado):
+            estado = EstadoRoteamento(leitura=False, identidade=identidade)
+            response = await self._aexecutar(request, estado)
+        if estado.escreveu and identidade is not None:
+            await cache.aset(FIXACAO_KEY.format(identidade=identidade), True, _janela())
+        return self._anotar(response, estado)
+
+    def _executar(self, request, estado):
+        token = _estado_atual.set(estado)
+        try:
+            return self.get_response(request)
+        finally:
+            _estado_atual.reset(token)
+
+    async def _aexecutar(self, request, estado):
+        token = _estado_atual.set(estado)
+        try:
+            return await self.get_response(request)
+        finally:
+            _estado_atual.reset(token)
+
+    def _repetir(self, response, estado) -> bool:
+        return estado.falhou and not estado.escreveu and response.status_code >= 500
+
+    def _anotar(self, response, estado):
+        if settings.DEBUG:
+            response["X-Banco-Leitura"] = estado.replica or DEFAULT_DB_ALIAS
+        return response
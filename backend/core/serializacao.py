@@ -0,0 +1,259 @@
+from datetime import datetime
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+from .compacto import aordinais_dos_treinamentos, codificar, modo_compacto, ordinais_dos_treinamentos, para_inteiro
+from .models import (
+    Departamento,
+    Modulo,
+    ModuloProgresso,
+    Treinamento,
+    TreinamentoMatricula,
+    TreinamentoMatriculaArquivada,
+)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = encoders.JSONEncoder()
+
+
+def _escapar_separadores(conteudo: bytes) -> bytes:
+    return conteudo.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
+
+
+def renderizar_json(data) -> bytes:
+    if orjson is not None:
+        try:
+            return _escapar_separadores(
+                orjson.dumps(
+                    data,
+                    default=_encoder.default,
+                    option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+                )
+            )
+        except TypeError:
+            pass
+    return JSONRenderer().render(data)
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return renderizar_json(data)
+
+
+def data_hora_iso(valor):
+    if valor is None:
+        return None
+    return _encoder.default(valor)
+
+
+def formatador_data_hora():
+    formato = api_settings.DATETIME_FORMAT
+
+    def formatar(valor):
+        if valor is None:
+            return None
+        if formato is None or isinstance(valor, str):
+            return valor
+        if formato.lower() == "iso-8601":
+            return data_hora_iso(valor)
+        return valor.strftime(formato)
+
+    return formatar
+
+
+def formatador_data():
+    formato = api_settings.DATE_FORMAT
+
+    def formatar(valor):
+        if not valor:
+            return None
+        if formato is None or isinstance(valor, str):
+            return valor
+        if formato.lower() == "iso-8601":
+            return valor.isoformat()
+        return valor.strftime(formato)
+
+    return formatar
+
+
+def _consultas_progresso(colaborador_id: int, desde=None):
+    matriculas = TreinamentoMatricula.objects.filter(colaborador_id=colaborador_id)
+    progresso = ModuloProgresso.objects.filter(matricula__in=matriculas).order_by("matricula_id", "id")
+    matriculas = matriculas.order_by("id")
+    if desde is not None:
+        matriculas = matriculas.filter(atualizado_em__gt=desde)
+        progresso = progresso.filter(atualizado_em__gt=desde)
+    return (
+        matriculas.values_list("treinamento_id", "status", "percentual_conclusao", "iniciado_em", "concluido_em"),
+        progresso.values_list("modulo_id", "concluido"),
+    )
+
+
+def _payload_progresso(matriculas, progresso) -> dict:
+    return {
+        "matriculas": [
+            {
+                "treinamento_id": treinamento_id,
+                "status": status,
+                "percentual_conclusao": percentual,
+                "iniciado_em": data_hora_iso(iniciado_em),
+                "concluido_em": data_hora_iso(concluido_em),
+            }
+            for treinamento_id, status, percentual, iniciado_em, concluido_em in matriculas
+        ],
+        "modulos": [{"modulo_id": modulo_id, "concluido": concluido} for modulo_id, concluido in progresso],
+    }
+
+
+def progresso_do_colaborador(colaborador_id: int, desde=None) -> dict:
+    return _payload_progresso(*_consultas_progresso(colaborador_id, desde))
+
+
+async def aprogresso_do_colaborador(colaborador_id: int, desde=None) -> dict:
+    matriculas, progresso = _consultas_progresso(colaborador_id, desde)
+    return _payload_progresso([linha async for linha in matriculas], [linha async for linha in progresso])
+
+
+def _consulta_bitmap(colaborador_id: int, desde=None):
+    consulta = TreinamentoMatricula.objects.filter(colaborador_id=colaborador_id).order_by("id")
+    if desde is not None:
+        consulta = consulta.filter(atualizado_em__gt=desde)
+    return consulta.values_list(
+        "treinamento_id", "status", "percentual_conclusao", "iniciado_em", "concluido_em", "modulos_bitmap"
+    )
+
+
+def _payload_bitmap(linhas, ordinais, desde, formato: str) -> dict:
+    matriculas = [
+        {
+            "treinamento_id": treinamento_id,
+            "status": status,
+            "percentual_conclusao": percentual,
+            "iniciado_em": data_hora_iso(iniciado_em),
+            "concluido_em": data_hora_iso(concluido_em),
+        }
+        for treinamento_id, status, percentual, iniciado_em, concluido_em, _ in linhas
+    ]
+    if formato == "bitmap":
+        for matricula, linha in zip(matriculas, linhas):
+            matricula["modulos_bitmap"] = codificar(para_inteiro(linha[-1]))
+        return {"matriculas": matriculas}
+
+    modulos = []
+    for linha in linhas:
+        valor = para_inteiro(linha[-1])
+        for ordinal, modulo_id in ordinais[linha[0]].items():
+            concluido = bool(valor >> ordinal & 1)
+            if concluido or desde is not None:
+                modulos.append({"modulo_id": modulo_id, "concluido": concluido})
+    return {"matriculas": matriculas, "modulos": modulos}
+
+
+def progresso_em_bitmap(colaborador_id: int, desde=None, formato: str = "lista") -> dict:
+    linhas = list(_consulta_bitmap(colaborador_id, desde))
+    ordinais = ordinais_dos_treinamentos({linha[0] for linha in linhas}) if linhas and formato != "bitmap" else {}
+    return _payload_bitmap(linhas, ordinais, desde, formato)
+
+
+async def aprogresso_em_bitmap(colaborador_id: int, desde=None, formato: str = "lista") -> dict:
+    linhas = [linha async for linha in _consulta_bitmap(colaborador_id, desde)]
+    ordinais = {}
+    if linhas and formato != "bitmap":
+        ordinais = await aordinais_dos_treinamentos({linha[0] for linha in linhas})
+    return _payload_bitmap(linhas, ordinais, desde, formato)
+
+
+def ordenar_por_inicio(linhas, indice: int) -> list:
+    return sorted(linhas, key=lambda linha: (linha[indice] is not None, linha[indice] or datetime.min), reverse=True)
+
+
+def _consultas_treinamentos(colaborador_id: int):
+    colunas = ("treinamento_id", "treinamento__nome", "iniciado_em", "concluido_em", "status")
+    return (
+        TreinamentoMatricula.objects.filter(colaborador_id=colaborador_id)
+        .order_by("-iniciado_em")
+        .values_list(*colunas),
+        TreinamentoMatriculaArquivada.objects.filter(colaborador_id=colaborador_id).values_list(*colunas),
+    )
+
+
+def treinamentos_do_colaborador(colaborador_id: int) -> list:
+    formatar = formatador_data_hora()
+    linhas, arquivadas = _consultas_treinamentos(colaborador_id)
+    linhas = list(linhas)
+    arquivadas = list(arquivadas)
+    if arquivadas:
+        linhas = ordenar_por_inicio(linhas + arquivadas, 2)
+    return [
+        {
+            "id": treinamento_id,
+            "nome": nome,
+            "iniciado_em": formatar(iniciado_em),
+            "concluido_em": formatar(concluido_em),
+            "status": status,
+        }
+        for treinamento_id, nome, iniciado_em, concluido_em, status in linhas
+    ]
+
+
+def _consulta_modulos(treinamento_ids):
+    return Modulo.objects.filter(treinamento_id__in=list(treinamento_ids)).values_list(
+        "id", "titulo", "descricao", "video_iframe", "video_origem", "treinamento_id", "ordinal"
+    )
+
+
+def catalogo_compilado() -> list:
+    formatar = formatador_data()
+    departamentos = list(Departamento.objects.values_list("id", "nome"))
+    if not departamentos:
+        return []
+
+    treinamentos = {departamento_id: [] for departamento_id, _ in departamentos}
+    por_treinamento = {}
+    for treinamento_id, codigo, nome, responsavel, atualizacao, departamento_id in Treinamento.objects.filter(
+        departamento_id__in=list(treinamentos)
+    ).values_list("id", "codigo", "nome", "responsavel", "ultima_atualizacao", "departamento_id"):
+        modulos = por_treinamento[treinamento_id] = []
+        treinamentos[departamento_id].append(
+            {
+                "id": treinamento_id,
+                "codigo": codigo,
+                "nome": nome,
+                "responsavel": responsavel,
+                "ultima_atualizacao": formatar(atualizacao),
+                "departamento": departamento_id,
+                "modulos": modulos,
+            }
+        )
+
+    if por_treinamento:
+        compacto = modo_compacto()
+        for modulo_id, titulo, descricao, video_iframe, video_origem, treinamento_id, ordinal in _consulta_modulos(
+            por_treinamento
+        ):
+            modulo = {
+                "id": modulo_id,
+                "titulo": titulo,
+                "descricao": descricao,
+                "video_iframe": video_iframe,
+                "video_origem": video_origem,
+                "treinamento": treinamento_id,
+            }
+            if compacto:
+                modulo["ordinal"] = ordinal
+            por_treinamento[treinamento_id].append(modulo)
+
+    return [
+        {"id": departamento_id, "nome": nome, "treinamentos": treinamentos[departamento_id]}
+        for departamento_id, nome in departamentos
+    ]
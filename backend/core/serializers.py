@@ -1,5 +1,10 @@
+from functools import lru_cache
+
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from .campos import CONTAGENS_NO_RESUMO, campos_recolhidos, contagens_exibidas
+from .compacto import modo_compacto
+from .sincronizacao import decodificar_cursor
 from .models import (
     Departamento,
     Treinamento,
@@ -10,13 +15,49 @@ from .models import (
 )
 
 
-class ModuloSerializer(serializers.ModelSerializer):
+class SelecaoCamposMixin:
+    def __init__(self, *args, selecao=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if selecao is not None and not selecao.completa:
+            self.aplicar_selecao(selecao)
+
+    def aplicar_selecao(self, selecao):
+        model = self.Meta.model
+        recolhidos = campos_recolhidos(model, selecao)
+        contagens = contagens_exibidas(model, selecao)
+        for nome in list(self.fields):
+            if nome in recolhidos or not selecao.inclui(nome):
+                self.fields.pop(nome)
+        for nome in contagens:
+            self.fields[nome] = serializers.IntegerField(read_only=True)
+        for nome, campo in self.fields.items():
+            aninhado = getattr(campo, "child", campo)
+            if isinstance(aninhado, SelecaoCamposMixin):
+                aninhado.aplicar_selecao(selecao.filha(nome))
+
+
+@lru_cache(maxsize=None)
+def esquema_selecao(serializer_class) -> dict:
+    esquema = dict.fromkeys(CONTAGENS_NO_RESUMO.get(serializer_class.Meta.model, {}))
+    for nome, campo in serializer_class().fields.items():
+        aninhado = getattr(campo, "child", campo)
+        esquema[nome] = esquema_selecao(type(aninhado)) if isinstance(aninhado, SelecaoCamposMixin) else None
+    return esquema
+
+
+class ModuloSerializer(SelecaoCamposMixin, serializers.ModelSerializer):
     class Meta:
         model = Modulo
-        fields = ["id", "titulo", "descricao", "video_iframe", "video_origem", "treinamento"]
+        fields = ["id", "titulo", "descricao", "video_iframe", "video_origem", "treinamento", "ordinal"]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not modo_compacto():
+            fields.pop("ordinal")
+        return fields
 
 
-class TreinamentoSerializer(serializers.ModelSerializer):
+class TreinamentoSerializer(SelecaoCamposMixin, serializers.ModelSerializer):
     modulos = ModuloSerializer(many=True, read_only=True)
 
     class Meta:
@@ -35,7 +76,7 @@ class TreinamentoSerializer(serializers.ModelSerializer):
         }
 
 
-class DepartamentoSerializer(serializers.ModelSerializer):
+class DepartamentoSerializer(SelecaoCamposMixin, serializers.ModelSerializer):
     treinamentos = TreinamentoSerializer(many=True, read_only=True)
 
     class Meta:
@@ -69,6 +110,23 @@ class ModuloProgressoSerializer(serializers.ModelSerializer):
         fields = ["id", "matricula", "modulo", "concluido", "concluido_em"]
 
 
+class ModuloProgressoCompactoSerializer(serializers.Serializer):
+    id = serializers.CharField(read_only=True)
+    matricula = serializers.PrimaryKeyRelatedField(queryset=TreinamentoMatricula.objects.all())
+    modulo = serializers.PrimaryKeyRelatedField(queryset=Modulo.objects.all())
+    concluido = serializers.BooleanField(default=False)
+    concluido_em = serializers.DateTimeField(
+        read_only=True, help_text="Sempre nulo no armazenamento compacto: o bitmap nao guarda a data por modulo."
+    )
+
+    def validate(self, attrs):
+        matricula = attrs.get("matricula") or self.instance.matricula
+        modulo = attrs.get("modulo") or self.instance.modulo
+        if matricula.treinamento_id != modulo.treinamento_id:
+            raise serializers.ValidationError("O modulo nao pertence ao treinamento da matricula.")
+        return attrs
+
+
 class EmailLoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
     nome = serializers.CharField(max_length=255, required=False, allow_blank=True)
@@ -83,6 +141,73 @@ class ConcluirModuloSerializer(serializers.Serializer):
     concluido = serializers.BooleanField()
 
 
+class ConcluirModulosLoteSerializer(serializers.ListSerializer):
+    child = ConcluirModuloSerializer()
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("allow_empty", False)
+        super().__init__(*args, **kwargs)
+
+
+class MatriculaEmMassaSerializer(serializers.Serializer):
+    treinamentos = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    colaboradores = serializers.ListField(child=serializers.IntegerField(), required=False)
+    emails = serializers.ListField(child=serializers.EmailField(), required=False)
+    todos = serializers.BooleanField(default=False)
+
+    def validate_treinamentos(self, value):
+        ids = sorted(set(value))
+        existentes = set(Treinamento.objects.filter(id__in=ids).values_list("id", flat=True))
+        faltantes = [treinamento_id for treinamento_id in ids if treinamento_id not in existentes]
+        if faltantes:
+            raise serializers.ValidationError(f"Treinamentos inexistentes: {faltantes}")
+        return ids
+
+    def validate(self, attrs):
+        alvos = [bool(attrs.get("colaboradores")), bool(attrs.get("emails")), attrs["todos"]]
+        if sum(alvos) != 1:
+            raise serializers.ValidationError("Informe apenas um alvo: colaboradores, emails ou todos.")
+        return attrs
+
+
+class ExportacaoMatriculasSerializer(serializers.Serializer):
+    formato = serializers.ChoiceField(choices=["csv", "xlsx"], default="csv")
+    departamento = serializers.IntegerField(required=False)
+    treinamento = serializers.IntegerField(required=False)
+    status = serializers.ChoiceField(choices=TreinamentoMatricula.STATUS_CHOICES, required=False)
+    iniciado_de = serializers.DateField(required=False)
+    iniciado_ate = serializers.DateField(required=False)
+    concluido_de = serializers.DateField(required=False)
+    concluido_ate = serializers.DateField(required=False)
+
+
+class DashboardConclusaoSerializer(serializers.Serializer):
+    agrupar = serializers.ChoiceField(choices=["treinamento", "departamento"], default="treinamento")
+    departamento = serializers.IntegerField(required=False)
+
+
+class BuscaSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200)
+    limite = serializers.IntegerField(min_value=1, max_value=100, default=20)
+    departamento = serializers.IntegerField(required=False)
+
+
+class MeProgressoSerializer(serializers.Serializer):
+    since = serializers.CharField(required=False)
+    formato = serializers.ChoiceField(choices=["lista", "bitmap"], default="lista")
+
+    def validate_since(self, value):
+        try:
+            return decodificar_cursor(value)
+        except ValueError:
+            raise serializers.ValidationError("Cursor invalido.")
+
+    def validate_formato(self, value):
+        if value == "bitmap" and not modo_compacto():
+            raise serializers.ValidationError("O formato bitmap exige o armazenamento compacto de progresso.")
+        return value
+
+
 class UsuarioSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=False, allow_blank=True)
 
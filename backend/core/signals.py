@@ -0,0 +1,247 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .autenticacao import registrar_situacao_usuario
+from .busca import indexar_modulo, indexar_treinamento
+from .catalogo import invalidar_catalogo
+from .colaboradores import invalidar_colaborador
+from .models import (
+    Colaborador,
+    Departamento,
+    Modulo,
+    ModuloProgresso,
+    ResumoTreinamento,
+    Treinamento,
+    TreinamentoMatricula,
+    TreinamentoMatriculaArquivada,
+)
+from .progresso import recontar_concluidos
+from .resumos import deltas_de_remocao, reconstruir_resumos, registrar_alteracao, registrar_deltas
+from .sincronizacao import registrar_remocao, registrar_remocoes_de_matriculas, registrar_remocoes_de_progresso
+
+CASCATAS_DO_PROGRESSO = (Departamento, Treinamento, Colaborador, Modulo, TreinamentoMatricula)
+
+
+def _em_cascata(origin, *modelos) -> bool:
+    modelo = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(modelo, modelos)
+
+
+def _removidos(instance, origin, marca: str):
+    modelo = type(instance)
+    if isinstance(origin, QuerySet) and origin.model is modelo:
+        if getattr(origin, marca, False):
+            return None
+        setattr(origin, marca, True)
+        return origin
+    return modelo.objects.filter(pk=instance.pk)
+
+
+@receiver(post_save, sender=Departamento)
+@receiver(post_delete, sender=Departamento)
+@receiver(post_save, sender=Treinamento)
+@receiver(post_delete, sender=Treinamento)
+@receiver(post_save, sender=Modulo)
+@receiver(post_delete, sender=Modulo)
+def invalidar_catalogo_ao_alterar(sender, **kwargs):
+    transaction.on_commit(invalidar_catalogo)
+
+
+@receiver(pre_save, sender=Modulo)
+def guardar_treinamento_anterior(sender, instance, **kwargs):
+    instance._treinamento_anterior_id = None
+    if instance.pk:
+        instance._treinamento_anterior_id = (
+            Modulo.objects.filter(pk=instance.pk).values_list("treinamento_id", flat=True).first()
+        )
+    anterior = instance._treinamento_anterior_id
+    if anterior is not None and anterior != instance.treinamento_id:
+        instance.ordinal = Modulo.reservar_ordinais(instance.treinamento_id)[0]
+
+
+@receiver(post_save, sender=Modulo)
+def contar_modulo_salvo(sender, instance, created, **kwargs):
+    anterior = getattr(instance, "_treinamento_anterior_id", None)
+    if created or anterior is None:
+        Treinamento.objects.filter(pk=instance.treinamento_id).update(total_modulos=F("total_modulos") + 1)
+    elif anterior != instance.treinamento_id:
+        Treinamento.objects.filter(pk=anterior, total_modulos__gt=0).update(
+            total_modulos=F("total_modulos") - 1
+        )
+        Treinamento.objects.filter(pk=instance.treinamento_id).update(total_modulos=F("total_modulos") + 1)
+
+
+@receiver(post_delete, sender=Modulo)
+def descontar_modulo_removido(sender, instance, origin=None, **kwargs):
+    if _em_cascata(origin, Departamento, Treinamento):
+        return
+    Treinamento.objects.filter(pk=instance.treinamento_id, total_modulos__gt=0).update(
+        total_modulos=F("total_modulos") - 1
+    )
+
+
+@receiver(post_delete, sender=Modulo)
+def recontar_modulo_removido(sender, instance, origin=None, **kwargs):
+    if not _em_cascata(origin, Departamento, Treinamento):
+        recontar_concluidos(
+            TreinamentoMatricula.objects.filter(treinamento_id=instance.treinamento_id, modulos_concluidos__gt=0)
+        )
+
+
+@receiver(pre_delete, sender=ModuloProgresso)
+def guardar_progresso_removido(sender, instance, origin=None, **kwargs):
+    if instance.concluido and not _em_cascata(origin, *CASCATAS_DO_PROGRESSO):
+        vars(origin).setdefault("_matriculas_recontar", set()).add(instance.matricula_id)
+
+
+@receiver(post_delete, sender=ModuloProgresso)
+def descontar_progresso_removido(sender, origin=None, **kwargs):
+    matriculas = vars(origin).pop("_matriculas_recontar", None)
+    if matriculas:
+        recontar_concluidos(TreinamentoMatricula.objects.filter(pk__in=matriculas))
+
+
+@receiver(post_save, sender=Treinamento)
+def indexar_treinamento_salvo(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or {"nome", "responsavel"} & set(update_fields):
+        indexar_treinamento(instance)
+
+
+@receiver(post_save, sender=Modulo)
+def indexar_modulo_salvo(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or {"titulo", "descricao", "treinamento"} & set(update_fields):
+        indexar_modulo(instance)
+
+
+@receiver(pre_save, sender=Colaborador)
+def guardar_email_anterior(sender, instance, **kwargs):
+    instance._email_anterior = None
+    if instance.pk:
+        instance._email_anterior = (
+            Colaborador.objects.filter(pk=instance.pk).values_list("email", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Colaborador)
+def invalidar_colaborador_salvo(sender, instance, **kwargs):
+    anterior = getattr(instance, "_email_anterior", None)
+    if anterior and anterior != instance.email:
+        transaction.on_commit(partial(invalidar_colaborador, anterior, avancar=True))
+    transaction.on_commit(partial(invalidar_colaborador, instance.email))
+
+
+@receiver(post_delete, sender=Colaborador)
+def invalidar_colaborador_removido(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidar_colaborador, instance.email, avancar=True))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def registrar_usuario_salvo(sender, instance, **kwargs):
+    registrar_situacao_usuario(instance.pk, instance.is_active)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def registrar_usuario_removido(sender, instance, **kwargs):
+    registrar_situacao_usuario(instance.pk, False)
+
+
+@receiver(post_save, sender=Treinamento)
+def atualizar_departamento_do_resumo(sender, instance, created, **kwargs):
+    if created:
+        ResumoTreinamento.objects.create(treinamento=instance, departamento_id=instance.departamento_id)
+    else:
+        ResumoTreinamento.objects.filter(treinamento_id=instance.pk).exclude(
+            departamento_id=instance.departamento_id
+        ).update(departamento_id=instance.departamento_id)
+
+
+@receiver(post_save, sender=TreinamentoMatricula)
+def atualizar_resumo_matricula_salva(sender, instance, created, **kwargs):
+    depois = instance.estado_resumo()
+    anterior = getattr(instance, "_treinamento_resumo", instance.treinamento_id)
+    if created:
+        registrar_alteracao(instance.treinamento_id, None, depois)
+    elif not hasattr(instance, "_estado_resumo"):
+        reconstruir_resumos([instance.treinamento_id])
+    elif anterior != instance.treinamento_id:
+        registrar_alteracao(anterior, instance._estado_resumo, None)
+        registrar_alteracao(instance.treinamento_id, None, depois)
+        registrar_remocao(instance.colaborador_id, "matricula", anterior)
+    else:
+        registrar_alteracao(instance.treinamento_id, instance._estado_resumo, depois)
+    instance._treinamento_resumo = instance.treinamento_id
+    instance._estado_resumo = depois
+
+
+@receiver(pre_delete, sender=Colaborador)
+def descontar_matriculas_do_colaborador(sender, instance, origin=None, **kwargs):
+    colaboradores = _removidos(instance, origin, "_resumo_descontado")
+    if colaboradores is not None:
+        deltas = deltas_de_remocao(
+            TreinamentoMatricula.objects.select_for_update().filter(colaborador__in=colaboradores.values("pk")),
+            TreinamentoMatriculaArquivada.objects.filter(colaborador__in=colaboradores.values("pk")),
+        )
+        registrar_deltas(deltas, criar_se_ausente=False)
+
+
+@receiver(pre_delete, sender=TreinamentoMatricula)
+def travar_matricula_removida(sender, instance, using, origin=None, **kwargs):
+    if isinstance(origin, TreinamentoMatricula):
+        instance.travar_estado_resumo(using)
+        return
+    if _em_cascata(origin, Departamento, Treinamento, Colaborador):
+        return
+    matriculas = _removidos(instance, origin, "_resumo_descontado")
+    if matriculas is not None:
+        registrar_deltas(deltas_de_remocao(matriculas.select_for_update()), criar_se_ausente=False)
+
+
+@receiver(post_delete, sender=TreinamentoMatricula)
+def atualizar_resumo_matricula_removida(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, TreinamentoMatricula):
+        antes = getattr(instance, "_estado_resumo", instance.estado_resumo())
+        treinamento_id = getattr(instance, "_treinamento_resumo", instance.treinamento_id)
+        registrar_alteracao(treinamento_id, antes, None, criar_se_ausente=False)
+
+
+@receiver(pre_delete, sender=TreinamentoMatriculaArquivada)
+def atualizar_resumo_arquivada_removida(sender, instance, origin=None, **kwargs):
+    if _em_cascata(origin, Departamento, Treinamento, Colaborador):
+        return
+    arquivadas = _removidos(instance, origin, "_resumo_descontado")
+    if arquivadas is not None:
+        registrar_deltas(deltas_de_remocao(arquivadas), criar_se_ausente=False)
+
+
+@receiver(pre_delete, sender=Treinamento)
+def registrar_remocoes_do_treinamento(sender, instance, **kwargs):
+    registrar_remocoes_de_matriculas(TreinamentoMatricula.objects.filter(treinamento_id=instance.pk))
+
+
+@receiver(pre_delete, sender=Modulo)
+def registrar_remocoes_do_modulo(sender, instance, origin=None, **kwargs):
+    if not _em_cascata(origin, Departamento, Treinamento):
+        registrar_remocoes_de_progresso(ModuloProgresso.objects.filter(modulo_id=instance.pk))
+
+
+@receiver(pre_delete, sender=TreinamentoMatricula)
+def registrar_matricula_removida(sender, instance, origin=None, **kwargs):
+    if _em_cascata(origin, Departamento, Treinamento, Colaborador):
+        return
+    matriculas = _removidos(instance, origin, "_remocoes_registradas")
+    if matriculas is not None:
+        registrar_remocoes_de_matriculas(matriculas)
+
+
+@receiver(pre_delete, sender=ModuloProgresso)
+def registrar_progresso_removido(sender, instance, origin=None, **kwargs):
+    if _em_cascata(origin, *CASCATAS_DO_PROGRESSO):
+        return
+    progresso = _removidos(instance, origin, "_remocoes_registradas")
+    if progresso is not None:
+        registrar_remocoes_de_progresso(progresso)
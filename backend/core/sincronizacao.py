@@ -0,0 +1,217 @@
+import base64
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .compacto import (
+    aordinais_dos_treinamentos,
+    codificar,
+    linhas_virtuais,
+    modo_compacto,
+    ordinais_dos_treinamentos,
+    para_inteiro,
+)
+from .eventos import em_segundo_plano, mesclar_pendentes, pendentes_do_colaborador
+from .models import ModuloProgresso, RemocaoProgresso, TreinamentoMatricula
+from .serializacao import (
+    aprogresso_do_colaborador,
+    aprogresso_em_bitmap,
+    data_hora_iso,
+    progresso_do_colaborador,
+    progresso_em_bitmap,
+)
+
+
+def _margem() -> timedelta:
+    return timedelta(seconds=getattr(settings, "PROGRESSO_SINCRONIA_MARGEM_SEGUNDOS", 2))
+
+
+def _retencao() -> timedelta:
+    return timedelta(days=getattr(settings, "PROGRESSO_REMOCOES_RETENCAO_DIAS", 30))
+
+
+def codificar_cursor(momento: datetime) -> str:
+    return base64.urlsafe_b64encode(momento.isoformat().encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> datetime:
+    try:
+        texto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(cursor)
+    momento = datetime.fromisoformat(texto)
+    try:
+        if settings.USE_TZ and timezone.is_naive(momento):
+            return timezone.make_aware(momento)
+        if not settings.USE_TZ and timezone.is_aware(momento):
+            return timezone.make_naive(momento)
+    except OverflowError:
+        raise ValueError(cursor)
+    return momento
+
+
+def registrar_remocao(colaborador_id: int, tipo: str, objeto_id: int):
+    RemocaoProgresso.objects.create(colaborador_id=colaborador_id, tipo=tipo, objeto_id=objeto_id)
+
+
+def registrar_remocoes_de_progresso(progresso):
+    RemocaoProgresso.objects.registrar_de(progresso, "modulo", "matricula__colaborador_id", "modulo_id")
+
+
+def registrar_remocoes_de_matriculas(matriculas):
+    RemocaoProgresso.objects.registrar_de(matriculas, "matricula", "colaborador_id", "treinamento_id")
+    registrar_remocoes_de_progresso(ModuloProgresso.objects.filter(matricula__in=matriculas.values("pk")))
+
+
+def expurgar_remocoes(dias=None) -> int:
+    limite = timezone.now() - (timedelta(days=dias) if dias is not None else _retencao())
+    removidas, _ = RemocaoProgresso.objects.filter(removido_em__lt=limite).delete()
+    return removidas
+
+
+def _consulta_remocoes(colaborador_id: int, desde: datetime):
+    return (
+        RemocaoProgresso.objects.filter(colaborador_id=colaborador_id, removido_em__gt=desde)
+        .order_by("id")
+        .values_list("tipo", "objeto_id")
+    )
+
+
+def _agrupar_remocoes(linhas) -> dict:
+    removidos = {"matriculas": [], "modulos": []}
+    for tipo, objeto_id in linhas:
+        removidos["matriculas" if tipo == "matricula" else "modulos"].append(objeto_id)
+    return removidos
+
+
+def remocoes_desde(colaborador_id: int, desde: datetime) -> dict:
+    return _agrupar_remocoes(_consulta_remocoes(colaborador_id, desde))
+
+
+async def aremocoes_desde(colaborador_id: int, desde: datetime) -> dict:
+    return _agrupar_remocoes([linha async for linha in _consulta_remocoes(colaborador_id, desde)])
+
+
+def _consultas_com_pendentes(colaborador_id: int, desde, pendentes):
+    matriculas = TreinamentoMatricula.objects.filter(colaborador_id=colaborador_id)
+    progresso = ModuloProgresso.objects.filter(matricula__in=matriculas).order_by("matricula_id", "id")
+    matriculas = matriculas.order_by("id")
+    if desde is not None:
+        progresso = progresso.filter(
+            Q(atualizado_em__gt=desde) | Q(modulo_id__in={modulo_id for modulo_id, *_ in pendentes})
+        )
+        matriculas = matriculas.filter(
+            Q(atualizado_em__gt=desde) | Q(treinamento_id__in={item[2] for item in pendentes})
+        )
+    return matriculas, progresso
+
+
+def _treinamentos_com_pendentes(matriculas, pendentes) -> set:
+    return {matricula.treinamento_id for matricula in matriculas} | {item[2] for item in pendentes}
+
+
+def _payload_com_pendentes(colaborador_id: int, desde, formato: str, pendentes, matriculas, progresso, ordinais):
+    if modo_compacto():
+        progresso = [
+            linha
+            for matricula in matriculas
+            for linha in linhas_virtuais(matricula, ordinais[matricula.treinamento_id], todas=desde is not None)
+        ]
+    matriculas, progresso = mesclar_pendentes(colaborador_id, matriculas, progresso, pendentes)
+    payload = {
+        "matriculas": [
+            {
+                "treinamento_id": m.treinamento_id,
+                "status": m.status,
+                "percentual_conclusao": m.percentual_conclusao,
+                "iniciado_em": data_hora_iso(m.iniciado_em),
+                "concluido_em": data_hora_iso(m.concluido_em),
+            }
+            for m in matriculas
+        ],
+    }
+    if formato == "bitmap":
+        valores = {m.treinamento_id: para_inteiro(m.modulos_bitmap) for m in matriculas}
+        posicoes = {modulo_id: ordinal for itens in ordinais.values() for ordinal, modulo_id in itens.items()}
+        for modulo_id, concluido, treinamento_id, _ in pendentes:
+            if concluido:
+                valores[treinamento_id] |= 1 << posicoes[modulo_id]
+            else:
+                valores[treinamento_id] &= ~(1 << posicoes[modulo_id])
+        for item in payload["matriculas"]:
+            item["modulos_bitmap"] = codificar(valores[item["treinamento_id"]])
+        return payload
+    payload["modulos"] = [
+        {
+            "modulo_id": p.modulo_id,
+            "concluido": p.concluido,
+        }
+        for p in progresso
+    ]
+    return payload
+
+
+def _progresso_com_pendentes(colaborador_id: int, desde=None, formato: str = "lista") -> dict:
+    pendentes = list(pendentes_do_colaborador(colaborador_id))
+    matriculas, progresso = _consultas_com_pendentes(colaborador_id, desde, pendentes)
+    matriculas = list(matriculas)
+    if modo_compacto():
+        ordinais = ordinais_dos_treinamentos(_treinamentos_com_pendentes(matriculas, pendentes))
+        progresso = []
+    else:
+        ordinais = {}
+        progresso = list(progresso)
+    return _payload_com_pendentes(colaborador_id, desde, formato, pendentes, matriculas, progresso, ordinais)
+
+
+async def _aprogresso_com_pendentes(colaborador_id: int, desde=None, formato: str = "lista") -> dict:
+    pendentes = [item async for item in pendentes_do_colaborador(colaborador_id)]
+    matriculas, progresso = _consultas_com_pendentes(colaborador_id, desde, pendentes)
+    matriculas = [matricula async for matricula in matriculas]
+    if modo_compacto():
+        ordinais = await aordinais_dos_treinamentos(_treinamentos_com_pendentes(matriculas, pendentes))
+        progresso = []
+    else:
+        ordinais = {}
+        progresso = [item async for item in progresso]
+    return _payload_com_pendentes(colaborador_id, desde, formato, pendentes, matriculas, progresso, ordinais)
+
+
+def _janela(desde):
+    agora = timezone.now()
+    completo = desde is None or desde < agora - _retencao()
+    return agora, completo, None if completo else desde - _margem()
+
+
+def _fechar(payload: dict, agora, completo: bool) -> dict:
+    payload["completo"] = completo
+    payload["cursor"] = codificar_cursor(agora)
+    return payload
+
+
+def montar_progresso(colaborador_id: int, desde=None, formato: str = "lista") -> dict:
+    agora, completo, limite = _janela(desde)
+    if em_segundo_plano():
+        payload = _progresso_com_pendentes(colaborador_id, limite, formato)
+    elif modo_compacto():
+        payload = progresso_em_bitmap(colaborador_id, limite, formato)
+    else:
+        payload = progresso_do_colaborador(colaborador_id, limite)
+    if not completo:
+        payload["removidos"] = remocoes_desde(colaborador_id, limite)
+    return _fechar(payload, agora, completo)
+
+
+async def amontar_progresso(colaborador_id: int, desde=None, formato: str = "lista") -> dict:
+    agora, completo, limite = _janela(desde)
+    if em_segundo_plano():
+        payload = await _aprogresso_com_pendentes(colaborador_id, limite, formato)
+    elif modo_compacto():
+        payload = await aprogresso_em_bitmap(colaborador_id, limite, formato)
+    else:
+        payload = await aprogresso_do_colaborador(colaborador_id, limite)
+    if not completo:
+        payload["removidos"] = await aremocoes_desde(colaborador_id, limite)
+    return _fechar(payload, agora, completo)
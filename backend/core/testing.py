@@ -0,0 +1,41 @@
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+ORCAMENTO_QUERIES = {
+    "catalogo_publico": 3,
+    "me_progresso": 3,
+    "iniciar_treinamento": 6,
+    "concluir_modulo": 9,
+    "concluir_modulos_lote": 10,
+}
+
+
+def orcamento_para(endpoint: str) -> int:
+    orcamentos = {**ORCAMENTO_QUERIES, **getattr(settings, "ORCAMENTO_QUERIES", {})}
+    return orcamentos[endpoint]
+
+
+@contextmanager
+def limite_de_queries(maximo: int, using: str = "default"):
+    with CaptureQueriesContext(connections[using]) as contexto:
+        yield contexto
+    if len(contexto) > maximo:
+        queries = "\n".join(f"{indice}. {query['sql']}" for indice, query in enumerate(contexto.captured_queries, 1))
+        raise AssertionError(f"{len(contexto)} queries executadas, limite de {maximo}:\n{queries}")
+
+
+class OrcamentoQueriesMixin:
+    def assertDentroDoOrcamento(self, response, endpoint: str = None):
+        metricas = getattr(response, "metricas", None)
+        if metricas is None:
+            self.fail("Resposta sem metricas; MetricasMiddleware esta habilitado?")
+        endpoint = endpoint or metricas.endpoint
+        maximo = orcamento_para(endpoint)
+        self.assertLessEqual(
+            metricas.queries,
+            maximo,
+            f"{endpoint} executou {metricas.queries} queries, orcamento de {maximo}",
+        )
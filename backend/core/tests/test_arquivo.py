@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core.arquivo import arquivar_matriculas
+from core.models import Colaborador, Departamento, Modulo, ResumoTreinamento, Treinamento, TreinamentoMatricula
+from core.progresso import concluir_modulo
+from core.resumos import reconstruir_resumos
+
+CAMPOS_RESUMO = ("matriculados", "em_andamento", "concluidos", "soma_percentual")
+
+
+class ArquivoTest(TestCase):
+    def setUp(self):
+        departamento = Departamento.objects.create(nome="Departamento Fiscal")
+        self.treinamento = Treinamento.objects.create(
+            nome="Treinamento", responsavel="Responsavel", departamento=departamento
+        )
+        self.modulo = Modulo.objects.create(treinamento=self.treinamento, titulo="Modulo", descricao="Descricao")
+        self.colaboradores = [
+            Colaborador.objects.create(nome=f"Colaborador {indice}", email=f"colaborador{indice}@exemplo.com.br")
+            for indice in range(3)
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            for colaborador in self.colaboradores:
+                matricula, _ = concluir_modulo(colaborador.id, self.modulo.id, True)
+                TreinamentoMatricula.objects.filter(pk=matricula.pk).update(
+                    concluido_em=timezone.now() - timedelta(days=400)
+                )
+
+    def resumo(self):
+        return ResumoTreinamento.objects.filter(treinamento=self.treinamento).values(*CAMPOS_RESUMO).get()
+
+    def test_arquivar_preserva_resumo(self):
+        antes = self.resumo()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(arquivar_matriculas(), (3, 3))
+        self.assertEqual(self.resumo(), antes)
+
+    def test_remover_colaborador_desconta_arquivada(self):
+        arquivar_matriculas()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.colaboradores[0].delete()
+        atual = self.resumo()
+        self.assertEqual((atual["matriculados"], atual["concluidos"]), (2, 2))
+        reconstruir_resumos([self.treinamento.id])
+        self.assertEqual(self.resumo(), atual)
@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core.autenticacao import TokenColaboradorSerializer
+from core.colaboradores import limpar_cache_local
+
+
+class UsuarioInativoTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        limpar_cache_local()
+        self.user = get_user_model().objects.create_user(
+            "colaborador@exemplo.com.br", "colaborador@exemplo.com.br", "senha"
+        )
+        token = TokenColaboradorSerializer.get_token(self.user).access_token
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_token_de_usuario_desativado(self):
+        self.assertEqual(self.client.get("/api/public/me/progresso/").status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/public/me/progresso/").status_code, 401)
+        self.user.is_active = True
+        self.user.save()
+        self.assertEqual(self.client.get("/api/public/me/progresso/").status_code, 200)
+
+    def test_token_de_usuario_removido(self):
+        self.user.delete()
+        self.assertEqual(self.client.get("/api/public/me/progresso/").status_code, 401)
@@ -0,0 +1,23 @@
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ValidationError
+
+from core.campos import Selecao
+from core.serializers import DepartamentoSerializer, esquema_selecao
+
+
+class SelecaoTest(SimpleTestCase):
+    def selecao(self, **params):
+        return Selecao.da_requisicao(params, esquema_selecao(DepartamentoSerializer))
+
+    def test_campos_conhecidos(self):
+        selecao = self.selecao(fields="nome,treinamentos.modulos.titulo,treinamentos.total_modulos")
+        reordenada = self.selecao(fields="treinamentos.total_modulos,treinamentos.modulos.titulo,nome")
+        self.assertEqual(selecao.chave(), reordenada.chave())
+
+    def test_rejeita_campos_desconhecidos(self):
+        for params in ({"fields": "nome,inexistente"}, {"fields": "nome.x"}, {"expand": "treinamentos.x"}):
+            with self.subTest(params=params), self.assertRaises(ValidationError):
+                self.selecao(**params)
+
+    def test_expand_sem_resumo_nao_altera_a_chave(self):
+        self.assertEqual(self.selecao(expand="treinamentos.modulos").chave(), Selecao().chave())
@@ -0,0 +1,22 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.catalogo import versao_atual
+from core.models import Departamento, Modulo, Treinamento
+
+
+class InvalidacaoCatalogoTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        departamento = Departamento.objects.create(nome="Departamento Fiscal")
+        self.treinamento = Treinamento.objects.create(
+            nome="Treinamento", responsavel="Responsavel", departamento=departamento
+        )
+
+    def test_invalida_somente_apos_commit(self):
+        versao = versao_atual()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            Modulo.objects.create(treinamento=self.treinamento, titulo="Modulo", descricao="Descricao")
+            self.assertEqual(versao_atual(), versao)
+        self.assertTrue(callbacks)
+        self.assertNotEqual(versao_atual(), versao)
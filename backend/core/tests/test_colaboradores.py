@@ -0,0 +1,41 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.colaboradores import GERACAO_KEY, _cache_local, _chave, colaborador_id_por_email, limpar_cache_local
+from core.models import Colaborador
+
+EMAIL = "colaborador@exemplo.com.br"
+
+
+class CacheColaboradorTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        limpar_cache_local()
+
+    def test_remocao_invalida_cache_local(self):
+        colaborador_id = colaborador_id_por_email(EMAIL)
+        self.assertEqual(colaborador_id_por_email(EMAIL), colaborador_id)
+        with self.captureOnCommitCallbacks(execute=True):
+            Colaborador.objects.filter(pk=colaborador_id).delete()
+            self.assertEqual(colaborador_id_por_email(EMAIL), colaborador_id)
+        self.assertNotEqual(colaborador_id_por_email(EMAIL), colaborador_id)
+
+    def test_remocao_em_outro_processo(self):
+        colaborador_id = colaborador_id_por_email(EMAIL)
+        Colaborador.objects.filter(pk=colaborador_id)._raw_delete("default")
+        cache.delete(_chave(EMAIL))
+        cache.set(GERACAO_KEY, 1, None)
+        self.assertEqual(colaborador_id_por_email(EMAIL), colaborador_id)
+        depois = time.monotonic() + _cache_local.intervalo_geracao + 1
+        with mock.patch("core.colaboradores.time.monotonic", return_value=depois):
+            self.assertNotEqual(colaborador_id_por_email(EMAIL), colaborador_id)
+
+    def test_geracao_lida_uma_vez_por_intervalo(self):
+        colaborador_id_por_email(EMAIL)
+        with mock.patch.object(cache, "get", wraps=cache.get) as leitura:
+            colaborador_id_por_email(EMAIL)
+            colaborador_id_por_email(EMAIL)
+        leitura.assert_not_called()
@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from core.autenticacao import TokenColaboradorSerializer
+from core.catalogo import etag_para
+from core.colaboradores import limpar_cache_local
+from core.models import Colaborador, Departamento, Modulo, Treinamento
+from core.serializacao import catalogo_compilado
+from core.serializers import ModuloSerializer
+
+
+class OrdinalTest(TestCase):
+    def setUp(self):
+        departamento = Departamento.objects.create(nome="Departamento Fiscal")
+        treinamento = Treinamento.objects.create(
+            nome="Treinamento", responsavel="Responsavel", departamento=departamento
+        )
+        self.modulo = Modulo.objects.create(treinamento=treinamento, titulo="Modulo", descricao="Descricao")
+
+    def modulo_do_catalogo(self):
+        return catalogo_compilado()[0]["treinamentos"][0]["modulos"][0]
+
+    def test_ordinal_oculto_no_formato_em_linhas(self):
+        self.assertNotIn("ordinal", ModuloSerializer(self.modulo).data)
+        self.assertNotIn("ordinal", self.modulo_do_catalogo())
+
+    @override_settings(PROGRESSO_COMPACTO=True)
+    def test_ordinal_exposto_no_formato_compacto(self):
+        self.assertEqual(ModuloSerializer(self.modulo).data["ordinal"], 0)
+        self.assertEqual(self.modulo_do_catalogo()["ordinal"], 0)
+
+    def test_etag_muda_com_o_formato(self):
+        etag = etag_para("versao")
+        with override_settings(PROGRESSO_COMPACTO=True):
+            self.assertNotEqual(etag_para("versao"), etag)
+
+
+@override_settings(PROGRESSO_COMPACTO=True)
+class ProgressoCompactoTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        limpar_cache_local()
+        departamento = Departamento.objects.create(nome="Departamento Fiscal")
+        treinamento = Treinamento.objects.create(
+            nome="Treinamento", responsavel="Responsavel", departamento=departamento
+        )
+        self.modulo = Modulo.objects.create(treinamento=treinamento, titulo="Modulo", descricao="Descricao")
+        user = get_user_model().objects.create_user("colaborador@exemplo.com.br", "colaborador@exemplo.com.br", "senha")
+        Colaborador.objects.create(nome="Colaborador", email="colaborador@exemplo.com.br")
+        token = TokenColaboradorSerializer.get_token(user).access_token
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_concluido_em_por_modulo_sempre_nulo(self):
+        response = self.client.post(
+            "/api/public/concluir-modulo/", {"modulo_id": self.modulo.id, "concluido": True}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertTrue(response.json()["progresso"]["concluido"])
+        self.assertIsNone(response.json()["progresso"]["concluido_em"])
+        self.assertIsNotNone(response.json()["matricula"]["concluido_em"])
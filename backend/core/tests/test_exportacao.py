@@ -0,0 +1,33 @@
+from datetime import date, datetime
+
+from django.test import TestCase
+
+from core.exportacao import filtrar_matriculas
+from core.models import Colaborador, Departamento, Treinamento, TreinamentoMatricula
+
+
+class FiltrarMatriculasTest(TestCase):
+    def setUp(self):
+        departamento = Departamento.objects.create(nome="Departamento Fiscal")
+        treinamento = Treinamento.objects.create(
+            nome="Treinamento", responsavel="Responsavel", departamento=departamento
+        )
+        for indice, iniciado_em in enumerate(
+            [
+                datetime(2024, 3, 9, 23, 59, 59),
+                datetime(2024, 3, 10, 0, 0),
+                datetime(2024, 3, 12, 23, 59, 59, 999999),
+                datetime(2024, 3, 13, 0, 0),
+            ]
+        ):
+            colaborador = Colaborador.objects.create(nome=f"Colaborador {indice}", email=f"c{indice}@exemplo.com.br")
+            TreinamentoMatricula.objects.create(
+                colaborador=colaborador, treinamento=treinamento, status="em_andamento", iniciado_em=iniciado_em
+            )
+
+    def test_periodo_inclui_o_dia_final_inteiro(self):
+        filtradas = filtrar_matriculas({"iniciado_de": date(2024, 3, 10), "iniciado_ate": date(2024, 3, 12)})
+        self.assertEqual(
+            sorted(filtradas.values_list("iniciado_em", flat=True)),
+            [datetime(2024, 3, 10, 0, 0), datetime(2024, 3, 12, 23, 59, 59, 999999)],
+        )
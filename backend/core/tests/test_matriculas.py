@@ -0,0 +1,35 @@
+from django.test import TestCase
+
+from core.matriculas import colaboradores_por_email, matricular_em_massa
+from core.models import Colaborador, Departamento, Treinamento, TreinamentoMatricula
+
+
+class MatricularEmMassaTest(TestCase):
+    def setUp(self):
+        departamento = Departamento.objects.create(nome="Departamento Fiscal")
+        self.treinamento = Treinamento.objects.create(
+            nome="Treinamento", responsavel="Responsavel", departamento=departamento
+        )
+
+    def test_conta_somente_linhas_criadas(self):
+        colaborador_ids, criados = colaboradores_por_email(["a@exemplo.com.br", "b@exemplo.com.br"])
+        self.assertEqual(criados, 2)
+        TreinamentoMatricula.objects.create(colaborador_id=colaborador_ids[0], treinamento=self.treinamento)
+        resultado = matricular_em_massa([self.treinamento.id], colaborador_ids + colaborador_ids)
+        self.assertEqual((resultado["criadas"], resultado["existentes"]), (1, 1))
+
+    def test_repetidos_entre_blocos_contam_uma_vez(self):
+        colaborador_ids, _ = colaboradores_por_email(["a@exemplo.com.br", "b@exemplo.com.br"])
+        TreinamentoMatricula.objects.create(colaborador_id=colaborador_ids[0], treinamento=self.treinamento)
+        resultado = matricular_em_massa(
+            [self.treinamento.id, self.treinamento.id], colaborador_ids + colaborador_ids, batch_size=1
+        )
+        self.assertEqual(
+            (resultado["criadas"], resultado["existentes"], resultado["colaboradores"], resultado["treinamentos"]),
+            (1, 1, 2, 1),
+        )
+
+    def test_colaboradores_existentes_nao_contam(self):
+        Colaborador.objects.create(nome="a", email="a@exemplo.com.br")
+        _, criados = colaboradores_por_email(["A@exemplo.com.br", "b@exemplo.com.br"])
+        self.assertEqual(criados, 1)
@@ -0,0 +1,30 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from core.autenticacao import TokenColaboradorSerializer
+
+
+class ServerTimingTest(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user("colaborador@exemplo.com.br", "colaborador@exemplo.com.br", "senha")
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {TokenColaboradorSerializer.get_token(user).access_token}"
+        )
+
+    @override_settings(METRICAS_ATIVAS=True, METRICAS_SERVER_TIMING=False, DEBUG=False)
+    def test_cabecalho_oculto_por_padrao(self):
+        response = self.client.get("/api/public/me/progresso/")
+        self.assertNotIn("Server-Timing", response)
+        self.assertGreater(response.metricas.queries, 0)
+
+    @override_settings(METRICAS_ATIVAS=True, METRICAS_SERVER_TIMING=True, DEBUG=False)
+    def test_cabecalho_habilitado(self):
+        self.assertIn("Server-Timing", self.client.get("/api/public/me/progresso/"))
+
+    @override_settings(METRICAS_ATIVAS=False, METRICAS_SERVER_TIMING=True)
+    def test_metricas_desligadas(self):
+        response = self.client.get("/api/public/me/progresso/")
+        self.assertNotIn("Server-Timing", response)
+        self.assertFalse(hasattr(response, "metricas"))
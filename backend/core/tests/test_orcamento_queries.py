@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from core.autenticacao import TokenColaboradorSerializer
+from core.colaboradores import limpar_cache_local
+from core.models import Colaborador, Departamento, Modulo, ModuloProgresso, Treinamento, TreinamentoMatricula
+from core.testing import OrcamentoQueriesMixin
+
+
+@override_settings(METRICAS_ATIVAS=True)
+class OrcamentoQueriesTest(OrcamentoQueriesMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        limpar_cache_local()
+        self.departamento = Departamento.objects.create(nome="Departamento Fiscal")
+        user = get_user_model().objects.create_user("colaborador@exemplo.com.br", "colaborador@exemplo.com.br", "senha")
+        self.colaborador = Colaborador.objects.create(nome="Colaborador", email="colaborador@exemplo.com.br")
+        token = TokenColaboradorSerializer.get_token(user).access_token
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.treinamentos = []
+
+    def semear(self, quantidade: int):
+        for indice in range(len(self.treinamentos), quantidade):
+            treinamento = Treinamento.objects.create(
+                nome=f"Treinamento {indice}", responsavel="Responsavel", departamento=self.departamento
+            )
+            modulos = [
+                Modulo.objects.create(treinamento=treinamento, titulo=f"Modulo {ordem}", descricao="Descricao")
+                for ordem in range(3)
+            ]
+            matricula = TreinamentoMatricula.objects.create(
+                colaborador=self.colaborador, treinamento=treinamento, status="em_andamento"
+            )
+            ModuloProgresso.objects.create(matricula=matricula, modulo=modulos[0], concluido=True)
+            self.treinamentos.append((treinamento, modulos))
+
+    def medir(self, endpoint: str, requisitar):
+        contagens = []
+        for quantidade in (1, 25):
+            self.semear(quantidade)
+            cache.clear()
+            response = requisitar()
+            self.assertLess(response.status_code, 400, response.content)
+            self.assertDentroDoOrcamento(response, endpoint)
+            contagens.append(response.metricas.queries)
+        self.assertEqual(contagens[0], contagens[1], f"{endpoint} cresce com o numero de matriculas")
+
+    def test_me_progresso(self):
+        self.medir("me_progresso", lambda: self.client.get("/api/public/me/progresso/"))
+
+    def test_catalogo(self):
+        self.medir("catalogo_publico", lambda: self.client.get("/api/public/catalogo/"))
+
+    def test_iniciar_treinamento(self):
+        self.medir(
+            "iniciar_treinamento",
+            lambda: self.client.post(
+                "/api/public/iniciar-treinamento/", {"treinamento_id": self.treinamentos[-1][0].id}, format="json"
+            ),
+        )
+
+    def test_iniciar_treinamento_nova_matricula(self):
+        self.semear(25)
+        treinamento = Treinamento.objects.create(
+            nome="Treinamento novo", responsavel="Responsavel", departamento=self.departamento
+        )
+        response = self.client.post(
+            "/api/public/iniciar-treinamento/", {"treinamento_id": treinamento.id}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertDentroDoOrcamento(response, "iniciar_treinamento")
+
+    def test_concluir_modulo(self):
+        self.medir(
+            "concluir_modulo",
+            lambda: self.client.post(
+                "/api/public/concluir-modulo/",
+                {"modulo_id": self.treinamentos[-1][1][1].id, "concluido": True},
+                format="json",
+            ),
+        )
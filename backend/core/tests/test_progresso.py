@@ -0,0 +1,145 @@
+from collections import Counter
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core.autenticacao import TokenColaboradorSerializer
+from core.colaboradores import limpar_cache_local
+from core.management.commands.estresse_progresso import IMPLEMENTACOES, Command
+from core.eventos import aplicar_eventos
+from core.models import (
+    Colaborador,
+    Departamento,
+    EventoProgresso,
+    Modulo,
+    ModuloProgresso,
+    Treinamento,
+    TreinamentoMatricula,
+)
+from core.progresso import marcar_modulos_em_lote
+
+
+class EstresseProgressoTest(TransactionTestCase):
+    def test_cliques_duplicados_concorrentes(self):
+        comando = Command()
+        fixture = comando._preparar(colaboradores=2, modulos=4)
+        rodadas, esperado = comando._planejar(fixture, {"seed": 7, "rodadas": 10, "threads": 4})
+        _, _, erros = comando._executar(IMPLEMENTACOES["upsert"], rodadas, 4)
+        if connection.vendor != "sqlite":
+            self.assertEqual(erros, Counter())
+        self.assertEqual(comando._conferir(fixture, {} if erros else esperado), [])
+
+
+class ColaboradorRemovidoTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        limpar_cache_local()
+        departamento = Departamento.objects.create(nome="Departamento Fiscal")
+        self.treinamento = Treinamento.objects.create(
+            nome="Treinamento", responsavel="Responsavel", departamento=departamento
+        )
+        self.modulo = Modulo.objects.create(treinamento=self.treinamento, titulo="Modulo", descricao="Descricao")
+        user = get_user_model().objects.create_user("colaborador@exemplo.com.br", "colaborador@exemplo.com.br", "senha")
+        colaborador = Colaborador.objects.create(nome="Colaborador", email="colaborador@exemplo.com.br")
+        token = TokenColaboradorSerializer.get_token(user).access_token
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        colaborador.delete()
+
+    def requisitar(self, caminho, dados):
+        with mock.patch.object(TreinamentoMatricula.objects, "inserir_se_ausente", return_value=False):
+            return self.client.post(caminho, dados, format="json")
+
+    def test_iniciar_com_colaborador_removido(self):
+        response = self.requisitar("/api/public/iniciar-treinamento/", {"treinamento_id": self.treinamento.id})
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertIn("colaborador_id", response.json())
+
+    def test_concluir_com_colaborador_removido(self):
+        response = self.requisitar("/api/public/concluir-modulo/", {"modulo_id": self.modulo.id, "concluido": True})
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertIn("colaborador_id", response.json())
+
+
+class ProgressoRemovidoTest(TestCase):
+    def setUp(self):
+        departamento = Departamento.objects.create(nome="Departamento Fiscal")
+        treinamento = Treinamento.objects.create(
+            nome="Treinamento", responsavel="Responsavel", departamento=departamento
+        )
+        self.modulos = [
+            Modulo.objects.create(treinamento=treinamento, titulo=f"Modulo {i}", descricao="") for i in range(3)
+        ]
+        self.matriculas = []
+        for i in range(3):
+            colaborador = Colaborador.objects.create(nome=f"Colaborador {i}", email=f"colaborador{i}@exemplo.com.br")
+            matricula = TreinamentoMatricula.objects.create(colaborador=colaborador, treinamento=treinamento)
+            ModuloProgresso.objects.bulk_create(
+                ModuloProgresso(matricula=matricula, modulo=modulo, concluido=True) for modulo in self.modulos
+            )
+            self.matriculas.append(matricula)
+        TreinamentoMatricula.objects.update(modulos_concluidos=len(self.modulos))
+
+    def concluidos(self):
+        return list(TreinamentoMatricula.objects.order_by("pk").values_list("modulos_concluidos", flat=True))
+
+    def test_remocao_de_progresso_em_lote(self):
+        with CaptureQueriesContext(connection) as consultas:
+            ModuloProgresso.objects.filter(modulo__in=self.modulos[:2]).delete()
+        atualizacoes = [consulta for consulta in consultas.captured_queries if consulta["sql"].startswith("UPDATE")]
+        self.assertEqual(len(atualizacoes), 1)
+        self.assertEqual(self.concluidos(), [1, 1, 1])
+
+    def test_remocao_de_modulo(self):
+        self.modulos[0].delete()
+        self.assertEqual(self.concluidos(), [2, 2, 2])
+
+    def test_remocao_de_uma_linha(self):
+        ModuloProgresso.objects.filter(matricula=self.matriculas[0]).first().delete()
+        self.assertEqual(self.concluidos(), [2, 3, 3])
+
+
+class MarcarProgressoTest(TestCase):
+    def setUp(self):
+        departamento = Departamento.objects.create(nome="Departamento Fiscal")
+        treinamento = Treinamento.objects.create(
+            nome="Treinamento", responsavel="Responsavel", departamento=departamento
+        )
+        self.modulos = [
+            Modulo.objects.create(treinamento=treinamento, titulo=f"Modulo {i}", descricao="") for i in range(2)
+        ]
+        self.colaboradores = [
+            Colaborador.objects.create(nome=f"Colaborador {i}", email=f"colaborador{i}@exemplo.com.br")
+            for i in range(2)
+        ]
+
+    def estado(self):
+        return {
+            "matriculas": sorted(
+                TreinamentoMatricula.objects.values_list("colaborador_id", "modulos_concluidos", "percentual_conclusao")
+            ),
+            "progresso": sorted(
+                ModuloProgresso.objects.values_list("matricula__colaborador_id", "modulo_id", "concluido")
+            ),
+        }
+
+    def test_eventos_e_lote_gravam_o_mesmo_progresso(self):
+        for colaborador in self.colaboradores:
+            marcar_modulos_em_lote(colaborador.id, [{"modulo_id": self.modulos[0].id, "concluido": True}])
+        pelo_lote = self.estado()
+        TreinamentoMatricula.objects.all().delete()
+        eventos = [
+            EventoProgresso.objects.create(colaborador=colaborador, modulo=self.modulos[0], concluido=True)
+            for colaborador in self.colaboradores
+        ]
+        self.assertEqual(aplicar_eventos(eventos), 2)
+        self.assertEqual(self.estado(), pelo_lote)
+        self.assertEqual(
+            set(ModuloProgresso.objects.values_list("concluido_em", flat=True)),
+            {evento.criado_em for evento in eventos},
+        )
@@ -0,0 +1,69 @@
+from django.test import TestCase
+
+from core.importacao import ImportadorTreinamentos
+from core.models import Colaborador, Departamento, ResumoTreinamento, Treinamento, TreinamentoMatricula
+from core.resumos import aplicar_deltas, reconstruir_resumos
+
+CAMPOS_RESUMO = ("matriculados", "em_andamento", "concluidos", "soma_percentual")
+
+
+class ResumoTreinamentoTest(TestCase):
+    def setUp(self):
+        self.departamento = Departamento.objects.create(nome="Departamento Fiscal")
+        self.treinamento = Treinamento.objects.create(
+            nome="Treinamento", responsavel="Responsavel", departamento=self.departamento
+        )
+        colaborador = Colaborador.objects.create(nome="Colaborador", email="colaborador@exemplo.com.br")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.matricula = TreinamentoMatricula.objects.create(colaborador=colaborador, treinamento=self.treinamento)
+
+    def resumo(self, treinamento):
+        return ResumoTreinamento.objects.filter(treinamento=treinamento).values(*CAMPOS_RESUMO).get()
+
+    def test_saves_com_copias_desatualizadas(self):
+        primeira = TreinamentoMatricula.objects.get(pk=self.matricula.pk)
+        segunda = TreinamentoMatricula.objects.get(pk=self.matricula.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            primeira.status, primeira.percentual_conclusao = "concluido", 100
+            primeira.save()
+            segunda.status, segunda.percentual_conclusao = "em_andamento", 50
+            segunda.save()
+        atual = self.resumo(self.treinamento)
+        reconstruir_resumos([self.treinamento.id])
+        self.assertEqual(self.resumo(self.treinamento), atual)
+
+    def test_remocao_com_copia_desatualizada(self):
+        copia = TreinamentoMatricula.objects.get(pk=self.matricula.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.matricula.status, self.matricula.percentual_conclusao = "concluido", 100
+            self.matricula.save()
+            copia.delete()
+        self.assertEqual(self.resumo(self.treinamento), dict.fromkeys(CAMPOS_RESUMO, 0))
+
+    def test_deltas_aplicados_apos_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.matricula.status, self.matricula.percentual_conclusao = "concluido", 100
+            self.matricula.save()
+        self.assertEqual(self.resumo(self.treinamento)["concluidos"], 0)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.resumo(self.treinamento)["concluidos"], 1)
+
+    def test_remocao_do_colaborador_em_cascata(self):
+        outro = Treinamento.objects.create(nome="Outro", responsavel="Responsavel", departamento=self.departamento)
+        with self.captureOnCommitCallbacks(execute=True):
+            TreinamentoMatricula.objects.create(
+                colaborador=self.matricula.colaborador, treinamento=outro, status="concluido", percentual_conclusao=100
+            )
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.matricula.colaborador.delete()
+        self.assertEqual(len([callback for callback in callbacks if callback.func is aplicar_deltas]), 1)
+        self.assertEqual(self.resumo(self.treinamento), dict.fromkeys(CAMPOS_RESUMO, 0))
+        self.assertEqual(self.resumo(outro), dict.fromkeys(CAMPOS_RESUMO, 0))
+
+    def test_importacao_cria_resumo(self):
+        ImportadorTreinamentos().importar(
+            [{"departamento": "Departamento Fiscal", "treinamento": "Importado", "responsavel": "Responsavel"}]
+        )
+        importado = Treinamento.objects.get(nome="Importado")
+        self.assertEqual(self.resumo(importado), dict.fromkeys(CAMPOS_RESUMO, 0))
@@ -0,0 +1,102 @@
+import base64
+import json
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.core.handlers.exception import convert_exception_to_response
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+
+from core.models import Departamento, TreinamentoMatricula
+from core.roteamento import FIXACAO_KEY, RoteadorReplicas, RoteamentoReplicasMiddleware, _indisponiveis
+
+REPLICA = "replica_teste"
+
+
+def cabecalho(identidade):
+    payload = base64.urlsafe_b64encode(json.dumps({"user_id": identidade}).encode()).decode().rstrip("=")
+    return f"Bearer cabecalho.{payload}.assinatura"
+
+
+@override_settings(REPLICAS_LEITURA=[REPLICA], DEBUG=True)
+class RoteamentoReplicasTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        _indisponiveis.clear()
+        descritor, arquivo = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(descritor)
+        connections.settings[REPLICA] = {**connections.settings[DEFAULT_DB_ALIAS], "NAME": arquivo, "TEST": {}}
+        self.addCleanup(os.remove, arquivo)
+        self.addCleanup(connections.settings.pop, REPLICA)
+        self.addCleanup(_indisponiveis.clear)
+        self.addCleanup(self.fechar_replica)
+        self.fabrica = RequestFactory()
+        self.bancos = []
+
+    def fechar_replica(self):
+        connections[REPLICA].close()
+        del connections[REPLICA]
+
+    def requisicao(self, metodo, view, identidade="1"):
+        middleware = RoteamentoReplicasMiddleware(convert_exception_to_response(view))
+        request = getattr(self.fabrica, metodo)("/api/teste/", HTTP_AUTHORIZATION=cabecalho(identidade))
+        return middleware(request)
+
+    def ler(self, request):
+        self.bancos.append(TreinamentoMatricula.objects.all().db)
+        return HttpResponse()
+
+    def escrever(self, request):
+        Departamento.objects.create(nome="Departamento Fiscal")
+        self.bancos.append(TreinamentoMatricula.objects.all().db)
+        return HttpResponse()
+
+    def test_leitura_vai_para_replica(self):
+        response = self.requisicao("get", self.ler)
+        self.assertEqual(self.bancos, [REPLICA])
+        self.assertEqual(response["X-Banco-Leitura"], REPLICA)
+
+    def test_escrita_fixa_leituras_no_principal(self):
+        self.requisicao("post", self.escrever)
+        self.assertTrue(cache.get(FIXACAO_KEY.format(identidade="1")))
+        self.requisicao("get", self.ler)
+        self.requisicao("get", self.ler, identidade="2")
+        self.assertEqual(self.bancos, [DEFAULT_DB_ALIAS, DEFAULT_DB_ALIAS, REPLICA])
+
+    def test_leitura_apos_escrita_na_mesma_requisicao(self):
+        def view(request):
+            self.ler(request)
+            return self.escrever(request)
+
+        self.requisicao("get", view)
+        self.assertEqual(self.bancos, [REPLICA, DEFAULT_DB_ALIAS])
+
+    def test_bloco_atomico_le_do_principal(self):
+        def view(request):
+            with transaction.atomic():
+                return self.ler(request)
+
+        self.requisicao("get", view)
+        self.assertEqual(self.bancos, [DEFAULT_DB_ALIAS])
+
+    def test_falha_na_replica_coloca_em_quarentena_e_repete(self):
+        def view(request):
+            self.ler(request)
+            return HttpResponse(str(TreinamentoMatricula.objects.count()))
+
+        with self.assertLogs("django.request", "ERROR"):
+            response = self.requisicao("get", view)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"0")
+        self.assertEqual(self.bancos, [REPLICA, DEFAULT_DB_ALIAS])
+        self.assertIn(REPLICA, _indisponiveis)
+
+        self.requisicao("get", self.ler, identidade="2")
+        self.assertEqual(self.bancos[-1], DEFAULT_DB_ALIAS)
+
+    def test_migracoes_nao_rodam_na_replica(self):
+        roteador = RoteadorReplicas()
+        self.assertIs(roteador.allow_migrate(REPLICA, "core", "treinamentomatricula"), False)
+        self.assertIsNone(roteador.allow_migrate(DEFAULT_DB_ALIAS, "core", "treinamentomatricula"))
@@ -0,0 +1,85 @@
+import base64
+from datetime import datetime
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.compacto import compactar_linhas
+from core.models import (
+    Colaborador,
+    Departamento,
+    Modulo,
+    ModuloProgresso,
+    RemocaoProgresso,
+    Treinamento,
+    TreinamentoMatricula,
+)
+from core.sincronizacao import codificar_cursor, decodificar_cursor
+
+
+def cursor(texto: str) -> str:
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip("=")
+
+
+class CursorTest(SimpleTestCase):
+    def test_cursor_emitido_pelo_servidor(self):
+        momento = datetime(2026, 10, 18, 10, 30)
+        self.assertEqual(decodificar_cursor(codificar_cursor(momento)), momento)
+
+    def test_cursor_com_fuso_normalizado(self):
+        momento = decodificar_cursor(cursor("2026-10-18T10:00:00+03:00"))
+        self.assertIsNone(momento.tzinfo)
+
+    def test_cursor_fora_do_intervalo(self):
+        with self.assertRaises(ValueError):
+            decodificar_cursor(cursor("0001-01-01T00:00:00+14:00"))
+
+
+class RemocoesTest(TestCase):
+    def setUp(self):
+        departamento = Departamento.objects.create(nome="Departamento Fiscal")
+        self.treinamento = Treinamento.objects.create(
+            nome="Treinamento", responsavel="Responsavel", departamento=departamento
+        )
+        self.modulos = [
+            Modulo.objects.create(treinamento=self.treinamento, titulo=f"Modulo {i}", descricao="") for i in range(3)
+        ]
+        self.colaboradores = [
+            Colaborador.objects.create(nome=f"Colaborador {i}", email=f"colaborador{i}@exemplo.com.br")
+            for i in range(4)
+        ]
+        for colaborador in self.colaboradores:
+            matricula = TreinamentoMatricula.objects.create(colaborador=colaborador, treinamento=self.treinamento)
+            ModuloProgresso.objects.bulk_create(
+                ModuloProgresso(matricula=matricula, modulo=modulo, concluido=True) for modulo in self.modulos
+            )
+
+    def remocoes(self):
+        return set(RemocaoProgresso.objects.values_list("colaborador_id", "tipo", "objeto_id"))
+
+    def esperadas(self, tipo, objetos):
+        ids = [objeto.id for objeto in objetos]
+        return {(colaborador.id, tipo, objeto_id) for colaborador in self.colaboradores for objeto_id in ids}
+
+    def test_remocao_do_treinamento(self):
+        esperadas = self.esperadas("matricula", [self.treinamento]) | self.esperadas("modulo", self.modulos)
+        with CaptureQueriesContext(connection) as consultas:
+            self.treinamento.delete()
+        insercoes = [consulta for consulta in consultas.captured_queries if consulta["sql"].startswith("INSERT")]
+        self.assertEqual(len(insercoes), 2)
+        self.assertEqual(self.remocoes(), esperadas)
+
+    def test_remocao_do_modulo(self):
+        esperadas = self.esperadas("modulo", self.modulos[:1])
+        self.modulos[0].delete()
+        self.assertEqual(self.remocoes(), esperadas)
+
+    def test_remocao_de_progresso_em_lote(self):
+        ModuloProgresso.objects.filter(modulo__in=self.modulos[1:]).delete()
+        self.assertEqual(self.remocoes(), self.esperadas("modulo", self.modulos[1:]))
+
+    def test_compactacao_com_remocao_de_linhas(self):
+        compactar_linhas(remover=True)
+        self.assertFalse(ModuloProgresso.objects.exists())
+        self.assertEqual(self.remocoes(), self.esperadas("modulo", self.modulos))
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
@@ -12,17 +13,32 @@ from .views import (
     EmailLoginView,
     IniciarTreinamentoView,
     ConcluirModuloView,
+    ConcluirModulosLoteView,
     PublicCatalogoView,
+    BuscaView,
     MeProgressoView,
+    MetricasView,
+    DashboardConclusaoView,
 )
 
+if getattr(settings, "VIEWS_ASSINCRONAS", False):
+    from .views_async import (
+        ConcluirModuloViewAssincrona as ConcluirModuloView,
+        IniciarTreinamentoViewAssincrona as IniciarTreinamentoView,
+        MeProgressoViewAssincrona as MeProgressoView,
+        PublicCatalogoViewAssincrona as PublicCatalogoView,
+    )
+
+if getattr(settings, "PROGRESSO_COMPACTO", False):
+    from .views import ModuloProgressoCompactoViewSet as ModuloProgressoViewSet
+
 router = DefaultRouter()
 router.register(r"departamentos", DepartamentoViewSet)
 router.register(r"treinamentos", TreinamentoViewSet)
 router.register(r"modulos", ModuloViewSet)
 router.register(r"colaboradores", ColaboradorViewSet)
 router.register(r"matriculas", TreinamentoMatriculaViewSet)
-router.register(r"progresso", ModuloProgressoViewSet)
+router.register(r"progresso", ModuloProgressoViewSet, basename="moduloprogresso")
 router.register(r"usuarios", UsuarioViewSet)
 
 urlpatterns = [
@@ -30,6 +46,10 @@ urlpatterns = [
     path("public/login-email/", EmailLoginView.as_view(), name="login_email"),
     path("public/iniciar-treinamento/", IniciarTreinamentoView.as_view(), name="iniciar_treinamento"),
     path("public/concluir-modulo/", ConcluirModuloView.as_view(), name="concluir_modulo"),
+    path("public/concluir-modulos/", ConcluirModulosLoteView.as_view(), name="concluir_modulos_lote"),
     path("public/catalogo/", PublicCatalogoView.as_view(), name="catalogo_publico"),
+    path("public/busca/", BuscaView.as_view(), name="busca"),
     path("public/me/progresso/", MeProgressoView.as_view(), name="me_progresso"),
+    path("dashboard/conclusao/", DashboardConclusaoView.as_view(), name="dashboard_conclusao"),
+    path("admin/metricas/", MetricasView.as_view(), name="metricas"),
 ]
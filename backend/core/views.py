@@ -1,10 +1,31 @@
 from django.contrib.auth import get_user_model
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .autenticacao import JWTColaboradorAuthentication
+from .busca import buscar
+from .campos import Selecao, otimizar_departamentos, otimizar_modulos, otimizar_treinamentos
+from .catalogo import etag_confere, etag_para, obter_snapshot, versao_atual
+from .colaboradores import resolver_colaborador_id
+from .compacto import (
+    ler_identificador,
+    linha_virtual,
+    linhas_virtuais,
+    modo_compacto,
+    ordinais_dos_treinamentos,
+    para_inteiro,
+)
+from .eventos import em_segundo_plano, registrar_eventos
+from .exportacao import gerar_csv, gerar_xlsx, linhas_com_arquivo
+from .matriculas import colaboradores_por_email, matricular_em_massa
+from .metricas import registro
 from .models import (
     Departamento,
     Treinamento,
@@ -13,6 +34,16 @@ from .models import (
     TreinamentoMatricula,
     ModuloProgresso,
 )
+from .pagination import CursorOuPaginaPagination
+from .progresso import (
+    concluir_modulo,
+    iniciar_matricula,
+    marcar_modulos_em_lote,
+    marcar_progresso,
+    reconciliar_matriculas,
+)
+from .resumos import resumo_por_departamento, resumo_por_treinamento
+from .serializacao import JSONRapidoRenderer, treinamentos_do_colaborador
 from .serializers import (
     DepartamentoSerializer,
     TreinamentoSerializer,
@@ -20,30 +51,66 @@ from .serializers import (
     ColaboradorSerializer,
     TreinamentoMatriculaSerializer,
     ModuloProgressoSerializer,
+    ModuloProgressoCompactoSerializer,
     EmailLoginSerializer,
     IniciarTreinamentoSerializer,
     ConcluirModuloSerializer,
+    ConcluirModulosLoteSerializer,
+    MatriculaEmMassaSerializer,
+    ExportacaoMatriculasSerializer,
+    DashboardConclusaoSerializer,
+    BuscaSerializer,
+    MeProgressoSerializer,
     UsuarioSerializer,
-    UsuarioTreinamentoSerializer,
+    esquema_selecao,
 )
+from .sincronizacao import montar_progresso
+
+
+def serializer_de_progresso():
+    return ModuloProgressoCompactoSerializer if modo_compacto() else ModuloProgressoSerializer
+
+
+class SelecaoCamposViewSetMixin:
+    otimizar_queryset = None
+
+    def get_selecao(self):
+        if not hasattr(self, "_selecao"):
+            if self.request.method in permissions.SAFE_METHODS:
+                self._selecao = Selecao.da_requisicao(
+                    self.request.query_params, esquema_selecao(self.get_serializer_class())
+                )
+            else:
+                self._selecao = Selecao()
+        return self._selecao
 
+    def get_queryset(self):
+        return type(self).otimizar_queryset(super().get_queryset(), self.get_selecao())
 
-class DepartamentoViewSet(viewsets.ModelViewSet):
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("selecao", self.get_selecao())
+        return super().get_serializer(*args, **kwargs)
+
+
+class DepartamentoViewSet(SelecaoCamposViewSetMixin, viewsets.ModelViewSet):
     queryset = Departamento.objects.all()
     serializer_class = DepartamentoSerializer
     permission_classes = [permissions.IsAuthenticated]
+    otimizar_queryset = otimizar_departamentos
 
 
-class TreinamentoViewSet(viewsets.ModelViewSet):
-    queryset = Treinamento.objects.select_related("departamento").prefetch_related("modulos")
+class TreinamentoViewSet(SelecaoCamposViewSetMixin, viewsets.ModelViewSet):
+    queryset = Treinamento.objects.all()
     serializer_class = TreinamentoSerializer
     permission_classes = [permissions.IsAuthenticated]
+    otimizar_queryset = otimizar_treinamentos
 
 
-class ModuloViewSet(viewsets.ModelViewSet):
-    queryset = Modulo.objects.select_related("treinamento")
+class ModuloViewSet(SelecaoCamposViewSetMixin, viewsets.ModelViewSet):
+    queryset = Modulo.objects.all()
     serializer_class = ModuloSerializer
     permission_classes = [permissions.IsAuthenticated]
+    otimizar_queryset = otimizar_modulos
 
 
 class ColaboradorViewSet(viewsets.ModelViewSet):
@@ -56,12 +123,151 @@ class TreinamentoMatriculaViewSet(viewsets.ModelViewSet):
     queryset = TreinamentoMatricula.objects.select_related("colaborador", "treinamento")
     serializer_class = TreinamentoMatriculaSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CursorOuPaginaPagination
+
+    @action(detail=False, methods=["post"], permission_classes=[permissions.IsAdminUser])
+    def em_massa(self, request):
+        serializer = MatriculaEmMassaSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        dados = serializer.validated_data
+
+        colaboradores_criados = 0
+        if dados["todos"]:
+            colaborador_ids = Colaborador.objects.order_by("id").values_list("id", flat=True).iterator()
+        elif dados.get("emails"):
+            colaborador_ids, colaboradores_criados = colaboradores_por_email(dados["emails"])
+        else:
+            colaborador_ids = sorted(
+                Colaborador.objects.filter(id__in=set(dados["colaboradores"])).values_list("id", flat=True)
+            )
+
+        resultado = matricular_em_massa(dados["treinamentos"], colaborador_ids)
+        resultado["colaboradores_criados"] = colaboradores_criados
+        return Response(resultado)
+
+    @action(detail=False, methods=["get"], permission_classes=[permissions.IsAdminUser])
+    def exportar(self, request):
+        serializer = ExportacaoMatriculasSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        filtros = serializer.validated_data
+        linhas = linhas_com_arquivo(filtros)
+        nome = f"matriculas-{timezone.now():%Y%m%d-%H%M%S}"
+
+        if filtros["formato"] == "xlsx":
+            try:
+                arquivo = gerar_xlsx(linhas)
+            except ImportError:
+                return Response(
+                    {"detail": "Exportacao em XLSX requer o pacote openpyxl."},
+                    status=status.HTTP_501_NOT_IMPLEMENTED,
+                )
+            return FileResponse(
+                arquivo,
+                as_attachment=True,
+                filename=f"{nome}.xlsx",
+                content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            )
+
+        response = StreamingHttpResponse(gerar_csv(linhas), content_type="text/csv; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="{nome}.csv"'
+        return response
 
 
 class ModuloProgressoViewSet(viewsets.ModelViewSet):
     queryset = ModuloProgresso.objects.select_related("matricula", "modulo")
     serializer_class = ModuloProgressoSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CursorOuPaginaPagination
+
+    def perform_create(self, serializer):
+        progresso = serializer.save()
+        reconciliar_matriculas(TreinamentoMatricula.objects.filter(pk=progresso.matricula_id))
+
+    def perform_update(self, serializer):
+        matricula_anterior = serializer.instance.matricula_id
+        progresso = serializer.save()
+        reconciliar_matriculas(
+            TreinamentoMatricula.objects.filter(pk__in={matricula_anterior, progresso.matricula_id})
+        )
+
+    def perform_destroy(self, instance):
+        matricula_id = instance.matricula_id
+        instance.delete()
+        reconciliar_matriculas(TreinamentoMatricula.objects.filter(pk=matricula_id))
+
+
+class ModuloProgressoCompactoViewSet(viewsets.ViewSet):
+    serializer_class = ModuloProgressoCompactoSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CursorOuPaginaPagination
+
+    def _obter(self, pk):
+        try:
+            matricula_id, modulo_id = ler_identificador(pk)
+        except ValueError:
+            raise NotFound()
+        matricula = get_object_or_404(TreinamentoMatricula, pk=matricula_id)
+        ordinal = (
+            Modulo.objects.filter(pk=modulo_id, treinamento_id=matricula.treinamento_id)
+            .values_list("ordinal", flat=True)
+            .first()
+        )
+        if ordinal is None:
+            raise NotFound()
+        return linha_virtual(matricula, modulo_id, bool(para_inteiro(matricula.modulos_bitmap) >> ordinal & 1))
+
+    def _gravar(self, desejados, matricula, modulo_id):
+        matriculas, _, _ = marcar_progresso(desejados)
+        matricula = matriculas[(matricula.colaborador_id, matricula.treinamento_id)]
+        return linha_virtual(matricula, modulo_id, desejados[(matricula.colaborador_id, modulo_id)])
+
+    def list(self, request):
+        paginator = self.pagination_class()
+        consulta = TreinamentoMatricula.objects.exclude(modulos_bitmap=b"").order_by("id")
+        pagina = paginator.paginate_queryset(consulta, request, view=self)
+        matriculas = consulta if pagina is None else pagina
+        ordinais = ordinais_dos_treinamentos({matricula.treinamento_id for matricula in matriculas})
+        linhas = [
+            linha
+            for matricula in matriculas
+            for linha in linhas_virtuais(matricula, ordinais[matricula.treinamento_id])
+        ]
+        dados = self.serializer_class(linhas, many=True).data
+        if pagina is None:
+            return Response(dados)
+        return paginator.get_paginated_response(dados)
+
+    def retrieve(self, request, pk=None):
+        return Response(self.serializer_class(self._obter(pk)).data)
+
+    def create(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        matricula = serializer.validated_data["matricula"]
+        modulo_id = serializer.validated_data["modulo"].pk
+        linha = self._gravar(
+            {(matricula.colaborador_id, modulo_id): serializer.validated_data["concluido"]}, matricula, modulo_id
+        )
+        return Response(self.serializer_class(linha).data, status=status.HTTP_201_CREATED)
+
+    def update(self, request, pk=None, partial=False):
+        atual = self._obter(pk)
+        serializer = self.serializer_class(atual, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        matricula = serializer.validated_data.get("matricula", atual.matricula)
+        modulo = serializer.validated_data.get("modulo")
+        modulo_id = modulo.pk if modulo else atual.modulo_id
+        desejados = {(atual.matricula.colaborador_id, atual.modulo_id): False}
+        desejados[(matricula.colaborador_id, modulo_id)] = serializer.validated_data.get("concluido", atual.concluido)
+        return Response(self.serializer_class(self._gravar(desejados, matricula, modulo_id)).data)
+
+    def partial_update(self, request, pk=None):
+        return self.update(request, pk, partial=True)
+
+    def destroy(self, request, pk=None):
+        atual = self._obter(pk)
+        marcar_progresso({(atual.matricula.colaborador_id, atual.modulo_id): False})
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class UsuarioViewSet(viewsets.ModelViewSet):
@@ -76,31 +282,14 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         user.save(update_fields=["password"])
         return Response({"status": "senha resetada"})
 
-    @action(detail=True, methods=["get"])
+    @action(detail=True, methods=["get"], renderer_classes=[JSONRapidoRenderer, BrowsableAPIRenderer])
     def treinamentos(self, request, pk=None):
         user = self.get_object()
         email = user.email or user.username
-        colaborador = Colaborador.objects.filter(email=email).first()
-        if not colaborador:
+        colaborador_id = Colaborador.objects.filter(email=email).values_list("id", flat=True).first()
+        if not colaborador_id:
             return Response([])
-
-        matriculas = (
-            TreinamentoMatricula.objects.select_related("treinamento")
-            .filter(colaborador=colaborador)
-            .order_by("-iniciado_em")
-        )
-        payload = [
-            {
-                "id": matricula.treinamento.id,
-                "nome": matricula.treinamento.nome,
-                "iniciado_em": matricula.iniciado_em,
-                "concluido_em": matricula.concluido_em,
-                "status": matricula.status,
-            }
-            for matricula in matriculas
-        ]
-        serializer = UsuarioTreinamentoSerializer(payload, many=True)
-        return Response(serializer.data)
+        return Response(treinamentos_do_colaborador(colaborador_id))
 
 
 class EmailLoginView(APIView):
@@ -119,129 +308,147 @@ class EmailLoginView(APIView):
 
 
 class IniciarTreinamentoView(APIView):
+    authentication_classes = [JWTColaboradorAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
         serializer = IniciarTreinamentoSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        email = request.user.email.lower() if request.user.email else request.user.username.lower()
         treinamento_id = serializer.validated_data["treinamento_id"]
 
-        colaborador, _ = Colaborador.objects.get_or_create(
-            email=email,
-            defaults={"nome": email.split("@", maxsplit=1)[0], "administrador": False},
-        )
-        treinamento = Treinamento.objects.get(id=treinamento_id)
-        matricula, _ = TreinamentoMatricula.objects.get_or_create(
-            colaborador=colaborador,
-            treinamento=treinamento,
-        )
-        matricula.status = "em_andamento"
-        if not matricula.iniciado_em:
-            matricula.iniciado_em = timezone.now()
-        matricula.save(update_fields=["status", "iniciado_em"])
+        colaborador_id = resolver_colaborador_id(request)
+        matricula = iniciar_matricula(colaborador_id, treinamento_id)
         return Response(TreinamentoMatriculaSerializer(matricula).data)
 
 
 class ConcluirModuloView(APIView):
+    authentication_classes = [JWTColaboradorAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
         serializer = ConcluirModuloSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        email = request.user.email.lower() if request.user.email else request.user.username.lower()
         modulo_id = serializer.validated_data["modulo_id"]
         concluido = serializer.validated_data["concluido"]
 
-        colaborador, _ = Colaborador.objects.get_or_create(
-            email=email,
-            defaults={"nome": email.split("@", maxsplit=1)[0], "administrador": False},
-        )
-        modulo = Modulo.objects.select_related("treinamento").get(id=modulo_id)
-        matricula, _ = TreinamentoMatricula.objects.get_or_create(
-            colaborador=colaborador,
-            treinamento=modulo.treinamento,
-        )
-        progresso, _ = ModuloProgresso.objects.get_or_create(matricula=matricula, modulo=modulo)
-        progresso.concluido = concluido
-        progresso.concluido_em = timezone.now() if concluido else None
-        progresso.save(update_fields=["concluido", "concluido_em"])
-
-        total = modulo.treinamento.modulos.count()
-        concluidos = ModuloProgresso.objects.filter(
-            matricula=matricula, modulo__treinamento=modulo.treinamento, concluido=True
-        ).count()
-        percentual = int((concluidos / total) * 100) if total else 0
-
-        if percentual == 100:
-            matricula.status = "concluido"
-            matricula.concluido_em = timezone.now()
-        elif percentual > 0:
-            matricula.status = "em_andamento"
-        else:
-            matricula.status = "nao_iniciado"
+        colaborador_id = resolver_colaborador_id(request)
+        if em_segundo_plano():
+            (evento,) = registrar_eventos(colaborador_id, [serializer.validated_data])
+            return Response(
+                {"evento_id": evento.id, "modulo_id": modulo_id, "concluido": concluido, "pendente": True},
+                status=status.HTTP_202_ACCEPTED,
+            )
 
-        matricula.percentual_conclusao = percentual
-        if matricula.status == "em_andamento" and not matricula.iniciado_em:
-            matricula.iniciado_em = timezone.now()
-        matricula.save(
-            update_fields=["status", "percentual_conclusao", "iniciado_em", "concluido_em"]
-        )
+        if modo_compacto():
+            ((matricula, (progresso,)),) = marcar_modulos_em_lote(colaborador_id, [serializer.validated_data])
+        else:
+            matricula, progresso = concluir_modulo(colaborador_id, modulo_id, concluido)
 
         return Response(
             {
                 "matricula": TreinamentoMatriculaSerializer(matricula).data,
-                "progresso": ModuloProgressoSerializer(progresso).data,
+                "progresso": serializer_de_progresso()(progresso).data,
             }
         )
 
 
+class ConcluirModulosLoteView(APIView):
+    authentication_classes = [JWTColaboradorAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = ConcluirModulosLoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        colaborador_id = resolver_colaborador_id(request)
+        if em_segundo_plano():
+            eventos = registrar_eventos(colaborador_id, serializer.validated_data)
+            return Response(
+                [
+                    {
+                        "evento_id": evento.id,
+                        "modulo_id": evento.modulo_id,
+                        "concluido": evento.concluido,
+                        "pendente": True,
+                    }
+                    for evento in eventos
+                ],
+                status=status.HTTP_202_ACCEPTED,
+            )
+
+        resultado = marcar_modulos_em_lote(colaborador_id, serializer.validated_data)
+
+        return Response(
+            [
+                {
+                    "matricula": TreinamentoMatriculaSerializer(matricula).data,
+                    "progresso": serializer_de_progresso()(progresso, many=True).data,
+                }
+                for matricula, progresso in resultado
+            ]
+        )
+
+
 class PublicCatalogoView(APIView):
+    authentication_classes = [JWTColaboradorAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        email = request.user.email.lower() if request.user.email else request.user.username.lower()
-        Colaborador.objects.get_or_create(
-            email=email,
-            defaults={"nome": email.split("@", maxsplit=1)[0], "administrador": False},
-        )
-        departamentos = Departamento.objects.prefetch_related("treinamentos__modulos")
-        serializer = DepartamentoSerializer(departamentos, many=True)
-        return Response(serializer.data)
+        resolver_colaborador_id(request)
+        selecao = Selecao.da_requisicao(request.query_params, esquema_selecao(DepartamentoSerializer))
+        versao = versao_atual()
+        etag = etag_para(versao, selecao)
+        if etag_confere(request.headers.get("If-None-Match"), etag):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = HttpResponse(obter_snapshot(versao, selecao), content_type="application/json")
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+
+class BuscaView(APIView):
+    authentication_classes = [JWTColaboradorAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        serializer = BuscaSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        filtros = serializer.validated_data
+        return Response(buscar(filtros["q"], filtros["limite"], filtros.get("departamento")))
 
 
 class MeProgressoView(APIView):
+    authentication_classes = [JWTColaboradorAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [JSONRapidoRenderer, BrowsableAPIRenderer]
 
     def get(self, request):
-        email = request.user.email.lower() if request.user.email else request.user.username.lower()
-        colaborador = Colaborador.objects.filter(email=email).first()
-        if not colaborador:
-            colaborador = Colaborador.objects.create(
-                email=email, nome=email.split("@", maxsplit=1)[0], administrador=False
-            )
+        colaborador_id = resolver_colaborador_id(request)
+        serializer = MeProgressoSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        filtros = serializer.validated_data
+        return Response(montar_progresso(colaborador_id, filtros.get("since"), filtros["formato"]))
 
-        matriculas = TreinamentoMatricula.objects.filter(colaborador=colaborador)
-        progresso = ModuloProgresso.objects.filter(matricula__in=matriculas)
 
-        return Response(
-            {
-                "matriculas": [
-                    {
-                        "treinamento_id": m.treinamento_id,
-                        "status": m.status,
-                        "percentual_conclusao": m.percentual_conclusao,
-                        "iniciado_em": m.iniciado_em,
-                        "concluido_em": m.concluido_em,
-                    }
-                    for m in matriculas
-                ],
-                "modulos": [
-                    {
-                        "modulo_id": p.modulo_id,
-                        "concluido": p.concluido,
-                    }
-                    for p in progresso
-                ],
-            }
-        )
+class DashboardConclusaoView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        serializer = DashboardConclusaoSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        filtros = serializer.validated_data
+        if filtros["agrupar"] == "departamento":
+            return Response(resumo_por_departamento())
+        return Response(resumo_por_treinamento(filtros.get("departamento")))
+
+
+class MetricasView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(registro.snapshot())
+
+    def delete(self, request):
+        registro.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
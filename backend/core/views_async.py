@@ -0,0 +1,144 @@
+import json
+
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions, status
+
+from .autenticacao import JWTColaboradorAuthentication
+from .campos import Selecao
+from .catalogo import aobter_snapshot, aversao_atual, etag_confere, etag_para
+from .colaboradores import aresolver_colaborador_id
+from .compacto import modo_compacto
+from .eventos import aregistrar_eventos, em_segundo_plano
+from .progresso import aconcluir_modulo, ainiciar_matricula, amarcar_modulos_em_lote
+from .serializacao import renderizar_json
+from .serializers import (
+    ConcluirModuloSerializer,
+    DepartamentoSerializer,
+    IniciarTreinamentoSerializer,
+    MeProgressoSerializer,
+    ModuloProgressoCompactoSerializer,
+    ModuloProgressoSerializer,
+    TreinamentoMatriculaSerializer,
+    esquema_selecao,
+)
+from .sincronizacao import amontar_progresso
+
+
+def responder(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(renderizar_json(data), status=status_code, content_type="application/json")
+
+
+class APIViewAssincrona(View):
+    autenticador_class = JWTColaboradorAuthentication
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True
+        return view
+
+    async def autenticar(self, request):
+        autenticador = self.autenticador_class()
+        header = autenticador.get_header(request)
+        raw_token = autenticador.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            raise exceptions.NotAuthenticated()
+        return await autenticador.aget_user(autenticador.get_validated_token(raw_token))
+
+    def dados(self, request):
+        if request.content_type == "application/json":
+            try:
+                return json.loads(request.body or b"{}")
+            except ValueError as exc:
+                raise exceptions.ParseError(f"JSON parse error - {exc}")
+        return request.POST
+
+    def validar(self, serializer_class, dados):
+        serializer = serializer_class(data=dados)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            request.user = await self.autenticar(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            detalhe = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+            response = responder(detalhe, exc.status_code)
+            if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+                response.status_code = status.HTTP_401_UNAUTHORIZED
+                response["WWW-Authenticate"] = self.autenticador_class().authenticate_header(request)
+            return response
+
+
+class IniciarTreinamentoViewAssincrona(APIViewAssincrona):
+    http_method_names = ["post", "options"]
+
+    async def post(self, request):
+        treinamento_id = self.validar(IniciarTreinamentoSerializer, self.dados(request))["treinamento_id"]
+
+        colaborador_id = await aresolver_colaborador_id(request)
+        matricula = await ainiciar_matricula(colaborador_id, treinamento_id)
+        return responder(TreinamentoMatriculaSerializer(matricula).data)
+
+
+class ConcluirModuloViewAssincrona(APIViewAssincrona):
+    http_method_names = ["post", "options"]
+
+    async def post(self, request):
+        dados = self.validar(ConcluirModuloSerializer, self.dados(request))
+
+        colaborador_id = await aresolver_colaborador_id(request)
+        if em_segundo_plano():
+            (evento,) = await aregistrar_eventos(colaborador_id, [dados])
+            return responder(
+                {
+                    "evento_id": evento.id,
+                    "modulo_id": dados["modulo_id"],
+                    "concluido": dados["concluido"],
+                    "pendente": True,
+                },
+                status.HTTP_202_ACCEPTED,
+            )
+
+        if modo_compacto():
+            ((matricula, (progresso,)),) = await amarcar_modulos_em_lote(colaborador_id, [dados])
+        else:
+            matricula, progresso = await aconcluir_modulo(colaborador_id, dados["modulo_id"], dados["concluido"])
+
+        return responder(
+            {
+                "matricula": TreinamentoMatriculaSerializer(matricula).data,
+                "progresso": (ModuloProgressoCompactoSerializer if modo_compacto() else ModuloProgressoSerializer)(
+                    progresso
+                ).data,
+            }
+        )
+
+
+class PublicCatalogoViewAssincrona(APIViewAssincrona):
+    http_method_names = ["get", "head", "options"]
+
+    async def get(self, request):
+        await aresolver_colaborador_id(request)
+        selecao = Selecao.da_requisicao(request.GET, esquema_selecao(DepartamentoSerializer))
+        versao = await aversao_atual()
+        etag = etag_para(versao, selecao)
+        if etag_confere(request.headers.get("If-None-Match"), etag):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = HttpResponse(await aobter_snapshot(versao, selecao), content_type="application/json")
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+
+class MeProgressoViewAssincrona(APIViewAssincrona):
+    http_method_names = ["get", "head", "options"]
+
+    async def get(self, request):
+        colaborador_id = await aresolver_colaborador_id(request)
+        filtros = self.validar(MeProgressoSerializer, request.GET)
+        payload = await amontar_progresso(colaborador_id, filtros.get("since"), filtros["formato"])
+        return responder(payload)
@@ -26,8 +26,13 @@ export const fetchCatalogo = async () => {
   return data;
 };
 
-export const fetchMeuProgresso = async () => {
-  const { data } = await api.get('/api/public/me/progresso/');
+export const fetchMeuProgresso = async (since) => {
+  const { data } = await api.get('/api/public/me/progresso/', { params: since ? { since } : {} });
+  return data;
+};
+
+export const buscarTreinamentos = async (q, params = {}) => {
+  const { data } = await api.get('/api/public/busca/', { params: { q, ...params } });
   return data;
 };
 
@@ -51,6 +56,11 @@ export const concluirModulo = async (email, moduloId, concluido) => {
   return data;
 };
 
+export const concluirModulos = async (itens) => {
+  const { data } = await api.post('/api/public/concluir-modulos/', itens);
+  return data;
+};
+
 export const loginAdmin = async (username, password) => {
   const { data } = await api.post('/api/token/', { username, password });
   return data;